@@ -0,0 +1,259 @@
+"""
+Token-budgeted context for the agent.
+
+Every model round trip resends the system prompt, the conversation history and
+all tool results so far, so without a bound the prompt (and with it model
+latency and cost) grows with the size of the cluster. Tokens are counted
+locally: with tiktoken when it is installed, otherwise with a chars/4 estimate.
+
+- List-shaped tool results are encoded as tables (column headers plus rows)
+  instead of repeating every key in every row, keeping only the columns the
+  question needs.
+- Large tool payloads are compacted before they enter the conversation. Rows
+  that look unhealthy are kept in full and the healthy rest is aggregated.
+- Before each model call the prompt is fitted to AGENT_CONTEXT_TOKEN_BUDGET by
+  dropping the oldest history turns (leaving a short note of what was asked)
+  and then shrinking tool results from earlier iterations.
+"""
+
+import functools
+import json
+import os
+from typing import Any, List, Optional, Tuple
+
+AGENT_CONTEXT_TOKEN_BUDGET = int(os.getenv("AGENT_CONTEXT_TOKEN_BUDGET", "8000"))
+AGENT_TOOL_RESULT_TOKEN_LIMIT = int(os.getenv("AGENT_TOOL_RESULT_TOKEN_LIMIT", "1500"))
+
+# Per-message framing overhead used by the chat format
+MESSAGE_OVERHEAD_TOKENS = 4
+HEALTHY_POD_PHASES = ("Running", "Succeeded")
+
+
+@functools.lru_cache(maxsize=1)
+def _encoder():
+    """tiktoken encoder if available (optional dependency), else None"""
+    try:
+        import tiktoken
+        return tiktoken.get_encoding("o200k_base")
+    except Exception:
+        return None
+
+
+def count_tokens(text: Optional[str]) -> int:
+    if not text:
+        return 0
+    encoder = _encoder()
+    if encoder is not None:
+        return len(encoder.encode(text))
+    return (len(text) + 3) // 4
+
+
+def message_tokens(messages: List[dict]) -> int:
+    """Approximate prompt size of a chat message list"""
+    total = 2
+    for m in messages:
+        total += MESSAGE_OVERHEAD_TOKENS + count_tokens(m.get("content"))
+        if m.get("tool_calls"):
+            total += count_tokens(json.dumps(m["tool_calls"]))
+    return total
+
+
+# Columns sent to the model per list field: the defaults, plus optional columns
+# included only when the question mentions one of their keywords
+TABLE_COLUMNS = {
+    "pods": (["name", "status", "ready", "restarts"], {
+        "age": ("age", "old", "new", "recent", "since", "start", "when"),
+        "ip": ("ip", "address", "network"),
+    }),
+    "resources": (["name", "type"], {
+        "location": ("location", "region", "where"),
+        "id": (" id", "resource id", "arm id"),
+    }),
+    "deployments": (["name", "replicas", "availableReplicas", "readyReplicas"], {
+        "updatedReplicas": ("rollout", "update", "upgrade"),
+    }),
+    "services": (["name", "type", "clusterIP"], {
+        "ports": ("port", "endpoint", "expose"),
+    }),
+}
+ALL_COLUMNS_KEYWORDS = ("all details", "all fields", "everything", "full detail")
+
+
+def select_columns(key: str, rows: List[dict], question: Optional[str] = None) -> List[str]:
+    """Columns of a list field to send, based on the question (all columns if unknown)"""
+    present = []
+    for row in rows:
+        present.extend(k for k in row if k not in present)
+    q = f" {question.lower()} " if question else ""
+    if key not in TABLE_COLUMNS or any(k in q for k in ALL_COLUMNS_KEYWORDS):
+        return present
+    defaults, optional = TABLE_COLUMNS[key]
+    wanted = set(defaults) | {col for col, words in optional.items() if any(w in q for w in words)}
+    # Unknown extra fields (e.g. new REST attributes) are kept rather than silently dropped
+    known = set(defaults) | set(optional)
+    return [c for c in present if c in wanted or c not in known]
+
+
+def encode_table(rows: List[dict], columns: List[str]) -> dict:
+    return {"columns": columns, "rows": [[row.get(c) for c in columns] for row in rows]}
+
+
+def decode_table(table: dict) -> List[dict]:
+    return [dict(zip(table["columns"], row)) for row in table["rows"]]
+
+
+def _is_table(value: Any) -> bool:
+    return isinstance(value, dict) and set(value) == {"columns", "rows"}
+
+
+def _is_row_list(value: Any) -> bool:
+    return isinstance(value, list) and bool(value) and all(isinstance(r, dict) for r in value)
+
+
+def encode_tool_result(result: Any, question: Optional[str] = None) -> Any:
+    """Result with each top-level list of dicts replaced by a projected table"""
+    if not isinstance(result, dict):
+        return result
+    return {
+        k: encode_table(v, select_columns(k, v, question)) if _is_row_list(v) else v
+        for k, v in result.items()
+    }
+
+
+def is_unhealthy(row: Any) -> bool:
+    """Heuristic for pod/deployment-like rows worth keeping verbatim"""
+    if not isinstance(row, dict):
+        return False
+    if row.get("ready") is False:
+        return True
+    if row.get("restarts"):
+        return True
+    if "status" in row and "ready" in row and row["status"] not in HEALTHY_POD_PHASES:
+        return True
+    if "replicas" in row and (row.get("availableReplicas", row.get("available")) or 0) < (row["replicas"] or 0):
+        return True
+    return False
+
+
+def _summarize_rows(rows: list, max_tokens: int, columns: List[str]) -> dict:
+    """Keep unhealthy rows (as a table), aggregate the healthy ones (names only if they fit)"""
+    unhealthy = [r for r in rows if is_unhealthy(r)]
+    healthy = [r for r in rows if not is_unhealthy(r)]
+    summary = {"total": len(rows), "unhealthy": encode_table(unhealthy, columns), "healthyCount": len(healthy)}
+
+    statuses = {}
+    for r in healthy:
+        if isinstance(r, dict) and "status" in r:
+            statuses[r["status"]] = statuses.get(r["status"], 0) + 1
+    if statuses:
+        summary["healthyByStatus"] = statuses
+
+    names = [r["name"] for r in healthy if isinstance(r, dict) and "name" in r]
+    if names and count_tokens(json.dumps(names)) <= max_tokens // 2:
+        summary["healthyNames"] = names
+
+    # Even the unhealthy rows may not fit; keep as many as we can
+    keep = len(unhealthy)
+    while keep and count_tokens(json.dumps(summary)) > max_tokens:
+        keep //= 2
+        summary["unhealthyOmitted"] = len(unhealthy) - keep
+        summary["unhealthy"] = encode_table(unhealthy[:keep], columns)
+    return summary
+
+
+def _tail_lines(lines: list, max_tokens: int) -> Tuple[list, int]:
+    """Most recent lines that fit in max_tokens; returns (lines, omitted)"""
+    kept, used = [], 0
+    for line in reversed(lines):
+        cost = count_tokens(str(line)) + 1
+        if used + cost > max_tokens:
+            break
+        kept.append(line)
+        used += cost
+    return kept[::-1], len(lines) - len(kept)
+
+
+def compact_tool_result(result: Any, max_tokens: int = AGENT_TOOL_RESULT_TOKEN_LIMIT,
+                        question: Optional[str] = None) -> str:
+    """
+    JSON for a tool message: list fields as projected tables, reduced to
+    roughly max_tokens when still larger
+    """
+    if isinstance(result, dict):
+        # Already-encoded results (e.g. shrunk again by fit_to_budget) are re-encoded from rows
+        result = {k: decode_table(v) if _is_table(v) else v for k, v in result.items()}
+    encoded = encode_tool_result(result, question)
+    text = json.dumps(encoded, separators=(",", ":"))
+    if count_tokens(text) <= max_tokens:
+        return text
+    if not isinstance(result, dict):
+        return _truncate(text, max_tokens)
+
+    compacted = dict(encoded)
+    list_fields = sorted(
+        (k for k, v in result.items() if isinstance(v, list)),
+        key=lambda k: -count_tokens(json.dumps(encoded[k]))
+    )
+    for key in list_fields:
+        rows = result[key]
+        budget = max(max_tokens - count_tokens(json.dumps({k: v for k, v in compacted.items() if k != key})), 50)
+        if rows and all(isinstance(r, str) for r in rows):
+            compacted[key], omitted = _tail_lines(rows, budget)
+            if omitted:
+                compacted[f"{key}Omitted"] = omitted
+        elif _is_row_list(rows):
+            compacted[key] = _summarize_rows(rows, budget, encoded[key]["columns"])
+        else:
+            continue
+        text = json.dumps(compacted, separators=(",", ":"))
+        if count_tokens(text) <= max_tokens:
+            return text
+    return _truncate(text, max_tokens)
+
+
+def _truncate(text: str, max_tokens: int) -> str:
+    return json.dumps({"truncated": True, "preview": text[:max_tokens * 3]})
+
+
+def fit_to_budget(messages: List[dict], budget: int = AGENT_CONTEXT_TOKEN_BUDGET) -> Tuple[List[dict], int]:
+    """
+    Return (messages, tokens) with the prompt reduced to fit `budget` where possible.
+
+    The system prompt, the latest user message and the newest batch of tool
+    results are never removed. Older history goes first, then tool results from
+    earlier agent iterations are shrunk.
+    """
+    tokens = message_tokens(messages)
+    if tokens <= budget:
+        return messages, tokens
+
+    last_user = max(i for i, m in enumerate(messages) if m["role"] == "user")
+    system, history, current = messages[:1], messages[1:last_user], messages[last_user:]
+
+    dropped = []
+    # A tool result is never kept without the assistant message that called it
+    while history and (message_tokens(system + history + current) > budget or history[0]["role"] == "tool"):
+        dropped.append(history.pop(0))
+    if dropped:
+        asked = [m["content"][:100] for m in dropped if m["role"] == "user"][-5:]
+        note = f"[{len(dropped)} earlier messages omitted to fit the context budget."
+        if asked:
+            note += " Earlier questions: " + " | ".join(asked)
+        history.insert(0, {"role": "system", "content": note + "]"})
+
+    # Shrink tool results older than the newest assistant tool-call batch
+    last_assistant = max((i for i, m in enumerate(current) if m["role"] == "assistant"), default=None)
+    if last_assistant is not None:
+        current = list(current)
+        for i, m in enumerate(current[:last_assistant]):
+            if message_tokens(system + history + current) <= budget:
+                break
+            if m["role"] == "tool":
+                try:
+                    result = json.loads(m["content"])
+                except (TypeError, ValueError):
+                    result = m["content"]
+                current[i] = {**m, "content": compact_tool_result(result, AGENT_TOOL_RESULT_TOKEN_LIMIT // 4)}
+
+    messages = system + history + current
+    return messages, message_tokens(messages)
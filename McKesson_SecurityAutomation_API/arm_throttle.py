@@ -0,0 +1,157 @@
+"""
+Client-side pacing for Azure Resource Manager calls.
+
+ARM throttles reads per subscription and answers 429 when a burst of users plus
+the agent exceeds the quota. The management clients get two azure-core pipeline
+policies (see `arm_client_kwargs`):
+
+- ArmThrottlePolicy runs once per HTTP attempt. It takes a token from a shared
+  token bucket (ARM_RATE_LIMIT_PER_SECOND, ARM_RATE_LIMIT_BURST) and reads the
+  `x-ms-ratelimit-remaining-*` headers. When the remaining quota drops below
+  ARM_RATE_LIMIT_LOW_WATERMARK the bucket refills proportionally slower.
+- JitteredRetryPolicy is azure-core's RetryPolicy (which already honors
+  Retry-After) with jitter added to the exponential backoff, so workers that
+  were throttled together do not retry together. Waits longer than
+  ARM_RETRY_AFTER_MAX_SECONDS are not retried; the 429 goes back to the caller.
+
+The remaining quota, throttled responses and time spent waiting for a token are
+exported as Prometheus metrics.
+"""
+
+import os
+import random
+import threading
+import time
+from typing import Optional
+
+from azure.core.pipeline.policies import HTTPPolicy, RetryPolicy
+
+from metrics import ARM_RATE_LIMIT, ARM_RATE_LIMIT_WAIT, ARM_RATELIMIT_REMAINING, ARM_THROTTLED
+
+ARM_RATE_LIMIT_PER_SECOND = float(os.getenv("ARM_RATE_LIMIT_PER_SECOND", "10"))
+ARM_RATE_LIMIT_BURST = float(os.getenv("ARM_RATE_LIMIT_BURST", "20"))
+# Longest a call waits for a token before failing fast with a 429
+ARM_RATE_LIMIT_MAX_WAIT_SECONDS = float(os.getenv("ARM_RATE_LIMIT_MAX_WAIT_SECONDS", "10"))
+# Below this many remaining reads the client-side rate is scaled down
+ARM_RATE_LIMIT_LOW_WATERMARK = int(os.getenv("ARM_RATE_LIMIT_LOW_WATERMARK", "200"))
+ARM_RATE_LIMIT_MIN_FACTOR = 0.05
+
+ARM_MAX_RETRIES = int(os.getenv("ARM_MAX_RETRIES", "4"))
+ARM_RETRY_BACKOFF_SECONDS = float(os.getenv("ARM_RETRY_BACKOFF_SECONDS", "0.8"))
+ARM_RETRY_BACKOFF_MAX_SECONDS = float(os.getenv("ARM_RETRY_BACKOFF_MAX_SECONDS", "30"))
+ARM_RETRY_AFTER_MAX_SECONDS = float(os.getenv("ARM_RETRY_AFTER_MAX_SECONDS", "30"))
+
+RATELIMIT_HEADER_PREFIX = "x-ms-ratelimit-remaining-"
+
+
+class ArmRateLimitExceeded(Exception):
+    """No token became available within the wait limit; treated like an ARM 429"""
+    status_code = 429
+
+    def __init__(self, retry_after: float):
+        super().__init__(f"ARM client-side rate limit exceeded, retry after {retry_after:.1f}s")
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    """Thread-safe token bucket; `acquire` blocks the calling (executor) thread"""
+
+    def __init__(self, rate: float = ARM_RATE_LIMIT_PER_SECOND, burst: float = ARM_RATE_LIMIT_BURST):
+        self.base_rate = rate
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+        ARM_RATE_LIMIT.set(rate)
+
+    def _refill(self, now: float):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self, max_wait: float = ARM_RATE_LIMIT_MAX_WAIT_SECONDS) -> float:
+        """Take one token, waiting up to max_wait seconds; returns the time waited"""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            # Reserve the token now (possibly going negative) so waiters are served in order
+            wait = max(0.0, (1 - self.tokens) / self.rate)
+            if wait > max_wait:
+                raise ArmRateLimitExceeded(wait)
+            self.tokens -= 1
+        if wait:
+            time.sleep(wait)
+        ARM_RATE_LIMIT_WAIT.observe(wait)
+        return wait
+
+    def observe_remaining(self, remaining: int, low_watermark: int = ARM_RATE_LIMIT_LOW_WATERMARK):
+        """Scale the refill rate down as ARM's remaining quota approaches zero"""
+        factor = max(ARM_RATE_LIMIT_MIN_FACTOR, min(1.0, remaining / low_watermark)) if low_watermark else 1.0
+        with self._lock:
+            self._refill(time.monotonic())
+            self.rate = self.base_rate * factor
+        ARM_RATE_LIMIT.set(self.rate)
+
+
+class ArmThrottlePolicy(HTTPPolicy):
+    """Paces every HTTP attempt through the bucket and adapts it to ARM's quota headers"""
+
+    def __init__(self, bucket: TokenBucket):
+        super().__init__()
+        self.bucket = bucket
+
+    def send(self, request):
+        self.bucket.acquire()
+        response = self.next.send(request)
+        headers = response.http_response.headers
+        remaining_reads = None
+        for name, value in headers.items():
+            name = name.lower()
+            if not name.startswith(RATELIMIT_HEADER_PREFIX):
+                continue
+            try:
+                remaining = int(value)
+            except ValueError:
+                continue
+            ARM_RATELIMIT_REMAINING.labels(name[len(RATELIMIT_HEADER_PREFIX):]).set(remaining)
+            if name.endswith("reads"):
+                remaining_reads = remaining if remaining_reads is None else min(remaining_reads, remaining)
+        if remaining_reads is not None:
+            self.bucket.observe_remaining(remaining_reads)
+        if response.http_response.status_code == 429:
+            ARM_THROTTLED.inc()
+        return response
+
+
+class JitteredRetryPolicy(RetryPolicy):
+    """RetryPolicy with jittered exponential backoff and a cap on honored Retry-After"""
+
+    def get_backoff_time(self, settings) -> float:
+        backoff = super().get_backoff_time(settings)
+        return backoff * random.uniform(0.5, 1.5) if backoff else 0
+
+    def is_retry(self, settings, response) -> bool:
+        retry_after = self.get_retry_after(response)
+        if retry_after is not None and retry_after > ARM_RETRY_AFTER_MAX_SECONDS:
+            # Waiting this long would outlast the HTTP request; let the caller see the 429
+            return False
+        return super().is_retry(settings, response)
+
+
+# One bucket for all management clients: the quota is per subscription, not per client.
+# The configured rate is per instance, so each gunicorn worker gets an equal share.
+_WORKERS = max(1, int(os.getenv("WEB_CONCURRENCY", "1")))
+arm_bucket = TokenBucket(ARM_RATE_LIMIT_PER_SECOND / _WORKERS, max(1.0, ARM_RATE_LIMIT_BURST / _WORKERS))
+
+
+def arm_client_kwargs(bucket: Optional[TokenBucket] = None) -> dict:
+    """Keyword arguments for azure-mgmt client constructors"""
+    return {
+        "retry_policy": JitteredRetryPolicy(
+            retry_total=ARM_MAX_RETRIES,
+            retry_status=ARM_MAX_RETRIES,
+            retry_backoff_factor=ARM_RETRY_BACKOFF_SECONDS,
+            retry_backoff_max=ARM_RETRY_BACKOFF_MAX_SECONDS,
+        ),
+        "per_retry_policies": [ArmThrottlePolicy(bucket or arm_bucket)],
+    }
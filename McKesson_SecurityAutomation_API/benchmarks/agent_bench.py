@@ -0,0 +1,288 @@
+"""
+Offline end-to-end benchmark for the agent (/api/agent/chat and /chat/stream).
+
+Runs the app against fake_kube.py, fake_arm.py and fake_openai.py (a scripted
+OpenAI-compatible model) and replays the question corpus in agent_corpus.json.
+No OpenAI tokens are spent and nothing talks to Azure.
+
+For every turn it records latency, time to first answer token (stream only),
+model iterations, prompt and completion tokens, and how the time splits into
+waiting for the model, running tools and everything else (our overhead:
+prompt building, compaction, serialization, HTTP), plus how many tool calls were
+prefetched and how many of those the model used, and the share of turns the
+intent router answered without the model ("routed") and the tool schemas
+offered per model call ("toolsOffered"). With --conversation the corpus runs as
+one conversation, either resending the history (as clients without sessions
+do) or sending the session ID, and "requestBytes" shows the request size.
+
+    python benchmarks/agent_bench.py --repeat 5 --output agent.json
+    python benchmarks/agent_bench.py --ttft-ms 600 --endpoint chat --compare agent.json
+    python benchmarks/agent_bench.py --env AGENT_PREFETCH_ENABLED=false --compare agent.json
+    python benchmarks/agent_bench.py --env AGENT_ROUTER_ENABLED=false --compare agent.json
+    python benchmarks/agent_bench.py --env AGENT_TOOL_SELECTION_ENABLED=false --compare agent.json
+    python benchmarks/agent_bench.py --conversation session --compare history.json
+
+The streaming endpoint reports usage and timings in its `done` event. The
+plain endpoint only returns the answer, so its token and iteration figures are
+per-question averages read from the stub's counters, and its time split is
+not available.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Optional
+
+import httpx
+
+from api_bench import (
+    BENCH_DIR, BENCH_TOKEN, add_upstream_arguments, percentile, start_app, start_process, stop_all,
+    upstream_config, write_report
+)
+
+
+def request_body(question: str, conversation: Optional[dict]) -> bytes:
+    """The request for the next message: alone, with the client-side history or with the session ID"""
+    body = {"message": question}
+    if conversation and conversation["mode"] == "history":
+        body["history"] = conversation["history"][-20:]
+    elif conversation:
+        body.update(session_id=conversation["session_id"], start_session=True)
+    return json.dumps(body).encode()
+
+
+def remember(conversation: Optional[dict], question: str, answer: str, session_id: Optional[str]):
+    if conversation:
+        conversation["history"] += [{"role": "user", "content": question}, {"role": "assistant", "content": answer}]
+        conversation["session_id"] = session_id
+
+
+async def stream_turn(client: httpx.AsyncClient, question: str, conversation: Optional[dict] = None) -> dict:
+    """One turn through the SSE endpoint, with the figures from its done event"""
+    body = request_body(question, conversation)
+    started = time.perf_counter()
+    first_token, done, event = None, None, None
+    async with client.stream("POST", "/api/agent/chat/stream", content=body,
+                             headers={"Content-Type": "application/json"}) as response:
+        response.raise_for_status()
+        async for line in response.aiter_lines():
+            if line.startswith("event: "):
+                event = line[len("event: "):]
+            elif line.startswith("data: "):
+                if event == "token" and first_token is None:
+                    first_token = time.perf_counter()
+                elif event == "done":
+                    done = json.loads(line[len("data: "):])
+                elif event == "error":
+                    raise RuntimeError(json.loads(line[len("data: "):])["detail"])
+    latency = (time.perf_counter() - started) * 1000
+    if done is None:
+        raise RuntimeError("stream ended without a done event")
+    remember(conversation, question, done["response"], done.get("sessionId"))
+    timings = done.get("timingsMs", {})
+    usage = done.get("usage", {})
+    return {
+        "latencyMs": latency,
+        "requestBytes": len(body),
+        "ttftMs": (first_token - started) * 1000 if first_token else None,
+        "iterations": done["iterations"],
+        "promptTokens": usage.get("promptTokens"),
+        "completionTokens": usage.get("completionTokens"),
+        "modelMs": timings.get("model"),
+        "toolsMs": timings.get("tools"),
+        "overheadMs": latency - timings["model"] - timings["tools"] if timings else None,
+        "toolCalls": len(done["tool_calls_made"]),
+        "cachedToolCalls": sum(1 for name in done["tool_calls_made"] if name.endswith("(cached)")),
+        "prefetched": done.get("prefetch", {}).get("started"),
+        "prefetchUsed": done.get("prefetch", {}).get("used"),
+        "routed": 1 if done.get("routed") else 0,
+        "toolsOffered": statistics.fmean(done["toolsOffered"]) if done.get("toolsOffered") else None,
+    }
+
+
+async def chat_turn(client: httpx.AsyncClient, question: str, conversation: Optional[dict] = None) -> dict:
+    """One turn through the plain JSON endpoint"""
+    body = request_body(question, conversation)
+    started = time.perf_counter()
+    response = await client.post("/api/agent/chat", content=body, headers={"Content-Type": "application/json"})
+    response.raise_for_status()
+    made = response.json()["tool_calls_made"]
+    remember(conversation, question, response.json()["response"], response.json().get("session_id"))
+    return {
+        "latencyMs": (time.perf_counter() - started) * 1000,
+        "requestBytes": len(body),
+        "toolCalls": len(made),
+        "cachedToolCalls": sum(1 for name in made if name.endswith("(cached)")),
+    }
+
+
+def _mean(values: list):
+    values = [v for v in values if v is not None]
+    return round(statistics.fmean(values), 1) if values else None
+
+
+def summarize_turns(turns: list, errors: int) -> dict:
+    latencies = sorted(t["latencyMs"] for t in turns)
+    ttfts = sorted(t["ttftMs"] for t in turns if t.get("ttftMs") is not None)
+    summary = {
+        "turns": len(turns),
+        "errors": errors,
+        "latencyMs": {
+            "p50": round(percentile(latencies, 50), 1),
+            "p95": round(percentile(latencies, 95), 1),
+            "p99": round(percentile(latencies, 99), 1),
+            "mean": _mean(latencies),
+        },
+        "ttftMsP50": round(percentile(ttfts, 50), 1) if ttfts else None,
+    }
+    for key in ("requestBytes", "iterations", "promptTokens", "completionTokens", "toolCalls", "cachedToolCalls",
+                "prefetched", "prefetchUsed", "routed", "toolsOffered"):
+        summary[key] = _mean([t.get(key) for t in turns])
+    split = {key: _mean([t.get(key + "Ms") for t in turns]) for key in ("model", "tools", "overhead")}
+    if all(v is not None for v in split.values()):
+        total = sum(split.values()) or 1
+        summary["timeSplitMs"] = split
+        summary["timeSplitPct"] = {k: round(v / total * 100, 1) for k, v in split.items()}
+    return summary
+
+
+async def run_corpus(base_url: str, stub_url: str, corpus: list, endpoint: str, repeat: int,
+                     concurrency: int, warmup: int, timeout: float, conversation_mode: str = "none") -> dict:
+    turn = stream_turn if endpoint == "stream" else chat_turn
+    # One conversation through the whole corpus (concurrency 1), or independent turns
+    conversation = None
+    if conversation_mode != "none":
+        conversation = {"mode": conversation_mode, "history": [], "session_id": None}
+    headers = {"Authorization": f"Bearer {BENCH_TOKEN}"}
+    async with httpx.AsyncClient(base_url=base_url, headers=headers, timeout=timeout) as client, \
+            httpx.AsyncClient(base_url=stub_url, timeout=5) as stub:
+        for _ in range(warmup):
+            for entry in corpus:
+                try:
+                    await turn(client, entry["question"])
+                except Exception:
+                    pass
+
+        questions, all_turns, all_errors = {}, [], 0
+        for entry in corpus:
+            question = entry["question"]
+            before = (await stub.get("/stats")).json()
+            turns, errors = [], 0
+            remaining = iter(range(repeat))
+
+            async def worker():
+                nonlocal errors
+                for _ in remaining:
+                    try:
+                        turns.append(await turn(client, question, conversation))
+                    except Exception as e:
+                        errors += 1
+                        print(f"  error: {question!r}: {e}", file=sys.stderr)
+
+            await asyncio.gather(*(worker() for _ in range(concurrency)))
+            after = (await stub.get("/stats")).json()
+            if endpoint == "chat" and turns:
+                # No per-turn usage on this endpoint: use the stub's counters for the batch
+                calls = after["requests"] - before["requests"]
+                for t in turns:
+                    t["iterations"] = calls / len(turns) - 1
+                    t["promptTokens"] = (after["promptTokens"] - before["promptTokens"]) / len(turns)
+                    t["completionTokens"] = (after["completionTokens"] - before["completionTokens"]) / len(turns)
+
+            questions[question] = summarize_turns(turns, errors)
+            s = questions[question]
+            print(f"{question[:48]:<50} p50 {s['latencyMs']['p50']:>8.1f} ms  iter {s['iterations']}  "
+                  f"prompt {s['promptTokens']}  completion {s['completionTokens']}  routed {s['routed']}",
+                  file=sys.stderr)
+            all_turns.extend(turns)
+            all_errors += errors
+        return {"overall": summarize_turns(all_turns, all_errors), "questions": questions}
+
+
+def compare(report: dict, baseline: dict):
+    """Print latency and token changes against an earlier report"""
+    def change(a, b):
+        if a is None or b is None:
+            return "n/a"
+        return f"{a:.0f}->{b:.0f} ({(b - a) / a * 100:+.0f}%)" if a else f"{a:.0f}->{b:.0f}"
+
+    rows = [("overall", baseline.get("overall"), report["overall"])]
+    rows += [(q, baseline.get("questions", {}).get(q), s) for q, s in report["questions"].items()]
+    print(f"{'question':<50}{'p50 ms':>24}{'prompt tokens':>24}{'overhead ms':>24}", file=sys.stderr)
+    for label, old, new in rows:
+        if old is None:
+            continue
+        print(f"{label[:48]:<50}"
+              f"{change(old['latencyMs']['p50'], new['latencyMs']['p50']):>24}"
+              f"{change(old.get('promptTokens'), new.get('promptTokens')):>24}"
+              f"{change((old.get('timeSplitMs') or {}).get('overhead'), (new.get('timeSplitMs') or {}).get('overhead')):>24}",
+              file=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_upstream_arguments(parser, pods=200)
+    parser.add_argument("--corpus", default=os.path.join(BENCH_DIR, "agent_corpus.json"))
+    parser.add_argument("--questions", type=int, help="only the first N corpus questions")
+    parser.add_argument("--endpoint", choices=["stream", "chat"], default="stream")
+    parser.add_argument("--ttft-ms", type=float, default=300, help="model time to first token")
+    parser.add_argument("--tokens-per-second", type=float, default=80, help="model generation speed")
+    parser.add_argument("--prompt-ms-per-1k", type=float, default=20, help="extra model delay per 1k prompt tokens")
+    parser.add_argument("--chunk-tokens", type=int, default=4, help="words per streamed answer chunk")
+    parser.add_argument("--repeat", type=int, default=3, help="turns per question")
+    parser.add_argument("--concurrency", type=int, default=1, help="turns of the same question in flight")
+    parser.add_argument("--warmup", type=int, default=1, help="untimed passes over the corpus first")
+    parser.add_argument("--conversation", choices=["none", "history", "session"], default="none",
+                        help="independent turns, or one conversation resending its history / using a session")
+    parser.add_argument("--timeout", type=float, default=120, help="per-turn timeout in seconds")
+    parser.add_argument("--output", help="write the JSON report here (default: stdout)")
+    parser.add_argument("--compare", help="earlier JSON report to compare against")
+    args = parser.parse_args()
+    if args.conversation != "none" and args.concurrency != 1:
+        parser.error("--conversation needs --concurrency 1")
+
+    with open(args.corpus) as f:
+        corpus = json.load(f)[:args.questions]
+
+    processes = []
+    try:
+        stub, stub_url = start_process([
+            "fake_openai.py", "--corpus", args.corpus, "--ttft-ms", str(args.ttft_ms),
+            "--tokens-per-second", str(args.tokens_per_second), "--prompt-ms-per-1k", str(args.prompt_ms_per_1k),
+            "--chunk-tokens", str(args.chunk_tokens),
+        ])
+        processes.append(stub)
+        base_url = start_app(args, processes, env={
+            "OPENAI_API_KEY": "benchmark", "OPENAI_BASE_URL": f"{stub_url}/v1",
+        })
+        results = asyncio.run(run_corpus(base_url, stub_url, corpus, args.endpoint, args.repeat,
+                                         args.concurrency, args.warmup, args.timeout, args.conversation))
+    finally:
+        stop_all(processes)
+
+    report = {
+        "startedAt": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "config": {
+            **upstream_config(args),
+            "endpoint": args.endpoint, "questions": len(corpus), "repeat": args.repeat,
+            "concurrency": args.concurrency, "warmup": args.warmup, "conversation": args.conversation,
+            "model": {"ttftMs": args.ttft_ms, "tokensPerSecond": args.tokens_per_second,
+                      "promptMsPer1k": args.prompt_ms_per_1k, "chunkTokens": args.chunk_tokens},
+        },
+        **results,
+    }
+    write_report(report, args.output)
+    if args.compare:
+        with open(args.compare) as f:
+            compare(report, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
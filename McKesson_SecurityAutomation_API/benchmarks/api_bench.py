@@ -0,0 +1,307 @@
+"""
+Offline load benchmark for the /api/azure endpoints.
+
+Starts fake_kube.py and fake_arm.py (each in its own process), runs the app
+against them through bench_app.py under uvicorn, then drives every endpoint at
+the requested concurrency levels and reports latency percentiles and
+throughput. Nothing talks to Azure or a real cluster.
+
+    python benchmarks/api_bench.py --pods 5000 --concurrency 1,10,50 --output run.json
+    python benchmarks/api_bench.py --informers --compare run.json
+    python benchmarks/api_bench.py --endpoints pods --env CACHE_TTL_AKS_STATUS=0
+
+Results are JSON (`--output`): one entry per concurrency level and endpoint with
+p50/p95/p99/mean/max latency in ms, requests per second and status counts.
+`--compare` prints the change against an earlier result file.
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import platform
+import re
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+import httpx
+
+from cold_start import API_DIR, BENCH_ENV, _free_port
+from fake_kube import deployment_name, pod_name, PODS_PER_DEPLOYMENT
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+BENCH_TOKEN = "benchmark-token"
+
+
+def endpoints(pods: int, deployments: int) -> dict:
+    """Label -> request path for every request/response /api/azure endpoint (log streams excluded)"""
+    deployments = deployments or max(1, pods // PODS_PER_DEPLOYMENT)
+    pod = pod_name("hsps", 0, deployments)
+    deployment = deployment_name("hsps", 0)
+    return {
+        "aks/status": "/api/azure/aks/status",
+        "aks/nodepools": "/api/azure/aks/nodepools",
+        "pods": "/api/azure/pods/hsps",
+        "pods/{pod}": f"/api/azure/pods/hsps/{pod}",
+        "pods/{pod}/logs": f"/api/azure/pods/hsps/{pod}/logs",
+        "resourcegroup": "/api/azure/resourcegroup/hsps-demo-rg",
+        "resources/list": "/api/azure/resources/list",
+        "appservice/status": "/api/azure/appservice/mckessondemo-csutherland/status",
+        "functionapp/status": "/api/azure/functionapp/hsps-pod-shutdown/status",
+        "storage/info": "/api/azure/storage/hspspodshutdown/info",
+        "deployments": "/api/azure/deployments/hsps",
+        "services": "/api/azure/services/hsps",
+        "subscription/info": "/api/azure/subscription/info",
+        "costs/summary": "/api/azure/costs/summary",
+        "overview": "/api/azure/overview",
+        "deployments/{deployment}/logs": f"/api/azure/deployments/hsps/{deployment}/logs",
+        "logs?selector": f"/api/azure/logs/hsps?selector=app={deployment}",
+    }
+
+
+def percentile(sorted_samples: list, pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_samples:
+        return 0.0
+    rank = max(1, min(len(sorted_samples), math.ceil(pct / 100 * len(sorted_samples))))
+    return sorted_samples[rank - 1]
+
+
+def summarize(latencies_ms: list, statuses: dict, elapsed: float) -> dict:
+    samples = sorted(latencies_ms)
+    count = len(samples)
+    errors = sum(n for status, n in statuses.items() if not str(status).startswith(("2", "3")))
+    return {
+        "requests": count,
+        "errors": errors,
+        "statusCodes": {str(k): v for k, v in sorted(statuses.items(), key=lambda kv: str(kv[0]))},
+        "rps": round(count / elapsed, 1) if elapsed else 0.0,
+        "latencyMs": {
+            "p50": round(percentile(samples, 50), 2),
+            "p95": round(percentile(samples, 95), 2),
+            "p99": round(percentile(samples, 99), 2),
+            "mean": round(statistics.fmean(samples), 2) if samples else 0.0,
+            "max": round(samples[-1], 2) if samples else 0.0,
+        },
+    }
+
+
+async def drive(client: httpx.AsyncClient, path: str, requests: int, concurrency: int, conditional: bool,
+                max_seconds: float) -> dict:
+    """Send `requests` GETs to one path from `concurrency` workers, stopping early after max_seconds"""
+    latencies, statuses = [], {}
+    remaining = iter(range(requests))
+    etag = {}
+    deadline = time.perf_counter() + max_seconds
+
+    async def worker():
+        for _ in remaining:
+            if time.perf_counter() > deadline:
+                break
+            headers = {"If-None-Match": etag["value"]} if conditional and "value" in etag else {}
+            started = time.perf_counter()
+            try:
+                response = await client.get(path, headers=headers)
+                status = response.status_code
+                if conditional and response.headers.get("etag"):
+                    etag["value"] = response.headers["etag"]
+            except httpx.HTTPError as e:
+                status = type(e).__name__
+            latencies.append((time.perf_counter() - started) * 1000)
+            statuses[status] = statuses.get(status, 0) + 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(latencies, statuses, time.perf_counter() - started)
+
+
+async def run_levels(base_url: str, paths: dict, levels: list, requests: int, warmup: int,
+                     conditional: bool, timeout: float, max_seconds: float) -> list:
+    limits = httpx.Limits(max_connections=max(levels), max_keepalive_connections=max(levels))
+    headers = {"Authorization": f"Bearer {BENCH_TOKEN}"}
+    async with httpx.AsyncClient(base_url=base_url, headers=headers, limits=limits, timeout=timeout) as client:
+        for path in paths.values():
+            # Warm-up: first kubeconfig fetch, client construction, cache fill
+            for _ in range(warmup):
+                try:
+                    await client.get(path)
+                except httpx.HTTPError:
+                    pass
+        runs = []
+        for concurrency in levels:
+            results = {}
+            for label, path in paths.items():
+                results[label] = {"path": path, **await drive(client, path, requests, concurrency, conditional, max_seconds)}
+                print_row(concurrency, label, results[label])
+            runs.append({"concurrency": concurrency, "endpoints": results})
+        return runs
+
+
+def print_row(concurrency: int, label: str, r: dict):
+    lat = r["latencyMs"]
+    errors = f"  errors {r['errors']} {r['statusCodes']}" if r["errors"] else ""
+    print(f"c={concurrency:<4} {label:<30} p50 {lat['p50']:>8.2f}  p95 {lat['p95']:>8.2f}  "
+          f"p99 {lat['p99']:>8.2f} ms  {r['rps']:>8.1f} req/s{errors}", file=sys.stderr)
+
+
+def compare(report: dict, baseline: dict):
+    """Print p50/p95/p99 and rps changes against an earlier report"""
+    before = {(run["concurrency"], label): r for run in baseline.get("runs", []) for label, r in run["endpoints"].items()}
+    print(f"{'':6}{'endpoint':<30}{'p50':>24}{'p95':>24}{'p99':>24}{'req/s':>20}", file=sys.stderr)
+    for run in report["runs"]:
+        for label, r in run["endpoints"].items():
+            old = before.get((run["concurrency"], label))
+            if old is None:
+                continue
+            cells = []
+            for key in ("p50", "p95", "p99"):
+                a, b = old["latencyMs"][key], r["latencyMs"][key]
+                cells.append(f"{a:.1f}->{b:.1f} ({(b - a) / a * 100:+.0f}%)" if a else f"{a:.1f}->{b:.1f}")
+            a, b = old["rps"], r["rps"]
+            cells.append(f"{a:.0f}->{b:.0f} ({(b - a) / a * 100:+.0f}%)" if a else f"{a:.0f}->{b:.0f}")
+            print(f"c={run['concurrency']:<4}{label:<30}" + "".join(f"{c:>24}" for c in cells[:3]) + f"{cells[3]:>20}", file=sys.stderr)
+
+
+def start_process(args: list, env: dict = None) -> (subprocess.Popen, str):
+    """Start a fake server script and read the URL it prints on its first line"""
+    process = subprocess.Popen([sys.executable, *args], cwd=BENCH_DIR, env=env, stdout=subprocess.PIPE, text=True)
+    line = process.stdout.readline()
+    if not line:
+        raise RuntimeError(f"{args[0]} exited with code {process.wait()}")
+    return process, json.loads(line)["url"]
+
+
+def wait_ready(base_url: str, server: subprocess.Popen, informers: bool, timeout: float):
+    deadline = time.monotonic() + timeout
+    headers = {"Authorization": f"Bearer {BENCH_TOKEN}"}
+    with httpx.Client(base_url=base_url, headers=headers, timeout=2) as client:
+        while time.monotonic() < deadline:
+            if server.poll() is not None:
+                raise RuntimeError(f"uvicorn exited with code {server.returncode}")
+            try:
+                if client.get("/health").status_code == 200:
+                    if not informers:
+                        return
+                    status = client.get("/api/cache/stats").json()["informers"]
+                    if status and all(s["synced"] for s in status.values()):
+                        return
+            except httpx.HTTPError:
+                pass
+            time.sleep(0.1)
+    raise TimeoutError(f"app not ready after {timeout}s")
+
+
+def add_upstream_arguments(parser: argparse.ArgumentParser, pods: int):
+    """Options for the fake cluster and ARM, and for the app under test"""
+    parser.add_argument("--pods", type=int, default=pods, help=f"pods per namespace (default {pods})")
+    parser.add_argument("--deployments", type=int, default=0, help=f"default: pods / {PODS_PER_DEPLOYMENT}")
+    parser.add_argument("--resources", type=int, default=40, help="ARM resources in the resource group")
+    parser.add_argument("--kube-latency-ms", type=float, default=5)
+    parser.add_argument("--arm-latency-ms", type=float, default=50)
+    parser.add_argument("--jitter-ms", type=float, default=0, help="uniform +/- jitter on both fakes")
+    parser.add_argument("--informers", action="store_true", help="serve kube reads from informers (waits for sync)")
+    parser.add_argument("--env", action="append", default=[], metavar="KEY=VALUE", help="extra app environment")
+
+
+def upstream_config(args) -> dict:
+    return {
+        "pods": args.pods, "deployments": args.deployments, "resources": args.resources,
+        "kubeLatencyMs": args.kube_latency_ms, "armLatencyMs": args.arm_latency_ms, "jitterMs": args.jitter_ms,
+        "informers": args.informers, "env": args.env,
+    }
+
+
+def start_app(args, processes: list, env: dict = None) -> str:
+    """Start fake_kube, fake_arm and the app (appending them to `processes`); returns the app URL"""
+    jitter = ["--jitter-ms", str(args.jitter_ms)]
+    kube, kube_url = start_process(["fake_kube.py", "--pods", str(args.pods), "--deployments", str(args.deployments),
+                                    "--latency-ms", str(args.kube_latency_ms), *jitter])
+    processes.append(kube)
+    arm, arm_url = start_process(["fake_arm.py", "--kube-url", kube_url, "--resources", str(args.resources),
+                                  "--latency-ms", str(args.arm_latency_ms), *jitter])
+    processes.append(arm)
+
+    port = _free_port()
+    app_env = {
+        **os.environ, **BENCH_ENV, "PYTHONPATH": API_DIR,
+        "BENCH_ARM_URL": arm_url,
+        "VITE_BEARER_TOKEN": BENCH_TOKEN,
+        "INFORMERS_ENABLED": "true" if args.informers else "false",
+        **(env or {}),
+        **dict(kv.split("=", 1) for kv in args.env),
+    }
+    app = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "bench_app:app", "--app-dir", BENCH_DIR,
+         "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        cwd=API_DIR, env=app_env
+    )
+    processes.append(app)
+    base_url = f"http://127.0.0.1:{port}"
+    wait_ready(base_url, app, args.informers, timeout=120)
+    return base_url
+
+
+def stop_all(processes: list):
+    for process in reversed(processes):
+        process.terminate()
+        process.wait(timeout=10)
+
+
+def write_report(report: dict, output: str = None):
+    if output:
+        with open(output, "w") as f:
+            json.dump(report, f, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_upstream_arguments(parser, pods=5000)
+    parser.add_argument("--concurrency", default="10", help="comma-separated levels (default 10)")
+    parser.add_argument("--requests", type=int, default=200, help="requests per endpoint and level")
+    parser.add_argument("--max-seconds", type=float, default=30, help="time cap per endpoint and level")
+    parser.add_argument("--warmup", type=int, default=3, help="untimed requests per endpoint first")
+    parser.add_argument("--endpoints", help="regex selecting endpoint labels or paths")
+    parser.add_argument("--conditional", action="store_true", help="send If-None-Match like the polling UI")
+    parser.add_argument("--timeout", type=float, default=60, help="per-request timeout in seconds")
+    parser.add_argument("--output", help="write the JSON report here (default: stdout)")
+    parser.add_argument("--compare", help="earlier JSON report to compare against")
+    args = parser.parse_args()
+
+    levels = [int(c) for c in args.concurrency.split(",")]
+    paths = endpoints(args.pods, args.deployments)
+    if args.endpoints:
+        pattern = re.compile(args.endpoints)
+        paths = {label: path for label, path in paths.items() if pattern.search(label) or pattern.search(path)}
+
+    processes = []
+    try:
+        base_url = start_app(args, processes)
+        runs = asyncio.run(run_levels(base_url, paths, levels, args.requests, args.warmup,
+                                     args.conditional, args.timeout, args.max_seconds))
+    finally:
+        stop_all(processes)
+
+    report = {
+        "startedAt": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "config": {
+            **upstream_config(args),
+            "requests": args.requests, "maxSeconds": args.max_seconds, "warmup": args.warmup,
+            "conditional": args.conditional,
+        },
+        "runs": runs,
+    }
+    write_report(report, args.output)
+    if args.compare:
+        with open(args.compare) as f:
+            compare(report, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
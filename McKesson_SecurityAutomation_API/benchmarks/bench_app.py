@@ -0,0 +1,38 @@
+"""
+The backend app wired to the fake upstreams (fake_arm.py, fake_kube.py).
+
+Imports `main` unchanged and swaps its lazily built management clients for
+ones pointed at BENCH_ARM_URL. Everything downstream (kubeconfig fetch through
+the AKS client, informers, caches, executors) is the production code path.
+
+    BENCH_ARM_URL=http://127.0.0.1:8800 uvicorn bench_app:app --app-dir benchmarks
+"""
+
+import os
+import sys
+
+API_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path[:0] = [API_DIR, BENCH_DIR]
+
+import main  # noqa: E402
+from fake_arm import FakeCredential, management_client  # noqa: E402
+from lazy import LazyObject  # noqa: E402
+
+ARM_URL = os.environ["BENCH_ARM_URL"]
+
+
+def _client(module: str, name: str):
+    def factory():
+        client_cls = getattr(__import__(module, fromlist=[name]), name)
+        return management_client(client_cls, main.SUBSCRIPTION_ID, ARM_URL)
+    return LazyObject(factory)
+
+
+main.credential = FakeCredential()
+main.resource_client = _client("azure.mgmt.resource", "ResourceManagementClient")
+main.aks_client = _client("azure.mgmt.containerservice", "ContainerServiceClient")
+main.web_client = _client("azure.mgmt.web", "WebSiteManagementClient")
+main.storage_client = _client("azure.mgmt.storage", "StorageManagementClient")
+
+app = main.app
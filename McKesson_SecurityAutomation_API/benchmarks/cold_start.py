@@ -0,0 +1,136 @@
+"""
+Cold-start benchmark for the API backend.
+
+Measures what an App Service restart costs before the app can answer:
+
+- import time of `main`, with the slowest modules from `python -X importtime`
+- time from spawning uvicorn to the first 200 from /health (median/max over runs)
+
+Runs offline: no Azure, Kubernetes or OpenAI calls are made (informers and the
+background client warm-up are disabled unless --with-warmup is given).
+
+    python benchmarks/cold_start.py --runs 5
+    python benchmarks/cold_start.py --json --budget-ms 1500   # exit 1 if over budget
+"""
+
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+
+API_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+BENCH_ENV = {
+    "INFORMERS_ENABLED": "false",
+    "CLIENT_WARMUP_ENABLED": "false",
+    "VITE_AZURE_TENANT_ID": "00000000-0000-0000-0000-000000000000",
+    "VITE_AZURE_CLIENT_ID": "00000000-0000-0000-0000-000000000000",
+    "VITE_AZURE_CLIENT_SECRET": "benchmark",
+}
+
+
+def bench_env(with_warmup: bool = False) -> dict:
+    env = {**os.environ, **BENCH_ENV, "PYTHONPATH": API_DIR}
+    if with_warmup:
+        env["CLIENT_WARMUP_ENABLED"] = "true"
+    return env
+
+
+def import_report(top: int = 15) -> dict:
+    """Cumulative import time of `main` and its slowest top-level imports"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=API_DIR, env=bench_env(), capture_output=True, text=True, check=True
+    )
+    # importtime lists children before their parent, one extra level of indent per depth
+    children, total_us, direct = [], None, []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if not cumulative.strip().isdigit():
+            continue  # header line
+        depth = (len(name) - len(name.lstrip())) // 2
+        if depth == 0:
+            if name.strip() == "main":
+                total_us, direct = int(cumulative), children
+            children = []
+        elif depth == 1:
+            children.append((name.strip(), int(cumulative)))
+    direct.sort(key=lambda m: -m[1])
+    return {
+        "importMainMs": round(total_us / 1000, 1),
+        "slowestImports": [{"module": name, "ms": round(us / 1000, 1)} for name, us in direct[:top]],
+    }
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def time_to_health(timeout: float = 30, with_warmup: bool = False) -> float:
+    """Seconds from spawning uvicorn to the first successful /health response"""
+    port = _free_port()
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        cwd=API_DIR, env=bench_env(with_warmup), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        while time.perf_counter() - started < timeout:
+            if server.poll() is not None:
+                raise RuntimeError(f"uvicorn exited with code {server.returncode}")
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/health", timeout=1) as response:
+                    if response.status == 200:
+                        return time.perf_counter() - started
+            except OSError:
+                time.sleep(0.01)
+        raise TimeoutError(f"/health not ready after {timeout}s")
+    finally:
+        server.terminate()
+        server.wait(timeout=10)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="server starts to time (default 5)")
+    parser.add_argument("--top", type=int, default=15, help="slowest imports to list (default 15)")
+    parser.add_argument("--with-warmup", action="store_true", help="keep the background client warm-up enabled")
+    parser.add_argument("--budget-ms", type=float, help="fail (exit 1) if the median time to /health exceeds this")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args()
+
+    report = import_report(args.top)
+    samples = [time_to_health(with_warmup=args.with_warmup) * 1000 for _ in range(args.runs)]
+    report["timeToHealthMs"] = {
+        "runs": args.runs,
+        "median": round(statistics.median(samples), 1),
+        "max": round(max(samples), 1),
+        "samples": [round(s, 1) for s in samples],
+    }
+    over_budget = args.budget_ms is not None and report["timeToHealthMs"]["median"] > args.budget_ms
+    report["budgetMs"] = args.budget_ms
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(f"import main: {report['importMainMs']} ms")
+        for m in report["slowestImports"]:
+            print(f"  {m['ms']:>8.1f} ms  {m['module']}")
+        t = report["timeToHealthMs"]
+        print(f"time to first /health over {t['runs']} runs: median {t['median']} ms, max {t['max']} ms")
+        if args.budget_ms is not None:
+            print(f"budget {args.budget_ms} ms: {'EXCEEDED' if over_budget else 'ok'}")
+    sys.exit(1 if over_budget else 0)
+
+
+if __name__ == "__main__":
+    main()
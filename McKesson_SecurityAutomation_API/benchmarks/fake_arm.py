@@ -0,0 +1,239 @@
+"""
+Stand-in Azure Resource Manager for offline benchmarks.
+
+Serves the management-plane routes the backend calls (managed cluster, cluster
+user credentials, agent pools, resource group, resources, web apps, storage
+account, subscription) with a configurable latency. The cluster credentials are
+a kubeconfig pointing at a fake_kube.py server, so the Kubernetes endpoints run
+end to end as well.
+
+`management_client` builds a real azure-mgmt client against the fake: plain
+HTTP base URL and no AAD authentication, with the production retry and
+throttling policies.
+
+    python benchmarks/fake_arm.py --port 8800 --kube-url http://127.0.0.1:8801
+"""
+
+import argparse
+import base64
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+RESOURCES_PAGE_SIZE = 100
+
+_PROVIDERS = r"^/subscriptions/([^/]+)/resourcegroups/([^/]+)/providers/"
+_ROUTES = [
+    ("credentials", "POST", re.compile(_PROVIDERS + r"microsoft\.containerservice/managedclusters/([^/]+)/listclusterusercredential$")),
+    ("agent_pools", "GET", re.compile(_PROVIDERS + r"microsoft\.containerservice/managedclusters/([^/]+)/agentpools$")),
+    ("cluster", "GET", re.compile(_PROVIDERS + r"microsoft\.containerservice/managedclusters/([^/]+)$")),
+    ("site", "GET", re.compile(_PROVIDERS + r"microsoft\.web/sites/([^/]+)$")),
+    ("storage", "GET", re.compile(_PROVIDERS + r"microsoft\.storage/storageaccounts/([^/]+)$")),
+    ("resources", "GET", re.compile(r"^/subscriptions/([^/]+)/resourcegroups/([^/]+)/resources$")),
+    ("resource_group", "GET", re.compile(r"^/subscriptions/([^/]+)/resourcegroups/([^/]+)$")),
+    ("subscription", "GET", re.compile(r"^/subscriptions/([^/]+)$")),
+]
+
+
+def kubeconfig(kube_url: str) -> bytes:
+    return json.dumps({
+        "apiVersion": "v1",
+        "kind": "Config",
+        "current-context": "bench",
+        "clusters": [{"name": "bench", "cluster": {"server": kube_url}}],
+        "contexts": [{"name": "bench", "context": {"cluster": "bench", "user": "bench"}}],
+        "users": [{"name": "bench", "user": {"token": "benchmark"}}],
+    }).encode()
+
+
+class FakeArmHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    kube_url = "http://127.0.0.1:0"
+    resources = 40
+    latency = 0.0
+    jitter = 0.0
+
+    def _send(self, status: int, payload: dict):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("x-ms-ratelimit-remaining-subscription-reads", "11999")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _handle(self, method: str):
+        length = int(self.headers.get("Content-Length") or 0)
+        if length:
+            self.rfile.read(length)
+        if self.latency or self.jitter:
+            time.sleep(max(0.0, self.latency + random.uniform(-self.jitter, self.jitter)))
+
+        url = urlparse(self.path)
+        path = url.path.rstrip("/").lower()
+        for route, route_method, pattern in _ROUTES:
+            match = pattern.match(path)
+            if match and route_method == method:
+                # Echo names as requested (paths were lower-cased for matching only)
+                names = [url.path.rstrip("/")[match.start(i):match.end(i)] for i in range(1, pattern.groups + 1)]
+                return self._send(200, getattr(self, "_" + route)(url.path.rstrip("/"), parse_qs(url.query), *names))
+        self._send(404, {"error": {"code": "ResourceNotFound", "message": f"No fake for {method} {url.path}"}})
+
+    def do_GET(self):
+        self._handle("GET")
+
+    def do_POST(self):
+        self._handle("POST")
+
+    def _cluster(self, path, query, subscription, rg, name):
+        return {
+            "id": path, "name": name, "location": "eastus",
+            "type": "Microsoft.ContainerService/ManagedClusters",
+            "properties": {
+                "provisioningState": "Succeeded",
+                "powerState": {"code": "Running"},
+                "kubernetesVersion": "1.28.5",
+                "nodeResourceGroup": f"MC_{rg}_{name}_eastus",
+                "fqdn": f"{name}-dns.hcp.eastus.azmk8s.io",
+                "agentPoolProfiles": [
+                    {"name": "nodepool1", "count": 3, "vmSize": "Standard_DS2_v2", "osType": "Linux", "mode": "System"},
+                ],
+            },
+        }
+
+    def _credentials(self, path, query, subscription, rg, name):
+        value = base64.b64encode(kubeconfig(self.kube_url)).decode()
+        return {"kubeconfigs": [{"name": "clusterUser", "value": value}]}
+
+    def _agent_pools(self, path, query, subscription, rg, name):
+        return {"value": [
+            {"id": f"{path}/{pool}", "name": pool, "properties": {
+                "count": 3, "vmSize": "Standard_DS2_v2", "osType": "Linux",
+                "provisioningState": "Succeeded", "powerState": {"code": "Running"}, "mode": mode,
+            }}
+            for pool, mode in (("nodepool1", "System"), ("userpool", "User"))
+        ]}
+
+    def _site(self, path, query, subscription, rg, name):
+        return {
+            "id": path, "name": name, "location": "eastus",
+            "kind": "functionapp" if "shutdown" in name else "app",
+            "type": "Microsoft.Web/sites",
+            "properties": {
+                "state": "Running",
+                "hostNames": [f"{name}.azurewebsites.net"],
+                "httpsOnly": True,
+                "defaultHostName": f"{name}.azurewebsites.net",
+            },
+        }
+
+    def _storage(self, path, query, subscription, rg, name):
+        return {
+            "id": path, "name": name, "location": "eastus", "kind": "StorageV2",
+            "type": "Microsoft.Storage/storageAccounts",
+            "sku": {"name": "Standard_LRS", "tier": "Standard"},
+            "properties": {
+                "provisioningState": "Succeeded",
+                "primaryEndpoints": {"blob": f"https://{name}.blob.core.windows.net/"},
+            },
+        }
+
+    def _resources(self, path, query, subscription, rg):
+        # Paged like ARM: each page links to the next with an absolute nextLink
+        start = int(query.get("$skiptoken", ["0"])[0])
+        end = min(start + RESOURCES_PAGE_SIZE, self.resources)
+        page = {"value": [
+            {
+                "id": f"/subscriptions/{subscription}/resourceGroups/{rg}/providers/Microsoft.Web/sites/site-{i}",
+                "name": f"site-{i}", "type": "Microsoft.Web/sites", "location": "eastus",
+            }
+            for i in range(start, end)
+        ]}
+        if end < self.resources:
+            port = self.server.server_port
+            page["nextLink"] = f"http://127.0.0.1:{port}{path}?api-version=2021-04-01&$skiptoken={end}"
+        return page
+
+    def _resource_group(self, path, query, subscription, rg):
+        return {
+            "id": path, "name": rg, "location": "eastus",
+            "properties": {"provisioningState": "Succeeded"},
+            "tags": {"environment": "demo", "owner": "hsps"},
+        }
+
+    def _subscription(self, path, query, subscription):
+        return {"id": path, "subscriptionId": subscription, "displayName": "HSPS Demo", "state": "Enabled"}
+
+    def handle(self):
+        try:
+            super().handle()
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # the app dropped the connection, e.g. when a run ends
+
+    def log_message(self, *args):
+        pass
+
+
+def make_server(kube_url: str, port: int = 0, latency_ms: float = 0, jitter_ms: float = 0,
+                resources: int = 40) -> ThreadingHTTPServer:
+    handler = type("Handler", (FakeArmHandler,), {
+        "kube_url": kube_url,
+        "resources": resources,
+        "latency": latency_ms / 1000,
+        "jitter": jitter_ms / 1000,
+    })
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def serve_in_thread(server: ThreadingHTTPServer) -> threading.Thread:
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return thread
+
+
+class FakeCredential:
+    """Token credential that never calls AAD"""
+
+    def get_token(self, *scopes, **kwargs):
+        from azure.core.credentials import AccessToken
+        return AccessToken("benchmark", int(time.time()) + 3600)
+
+
+def management_client(client_cls, subscription_id: str, base_url: str, **kwargs):
+    """An azure-mgmt client talking to the fake ARM over HTTP, with the production pipeline policies"""
+    from azure.core.pipeline.policies import SansIOHTTPPolicy
+
+    from arm_throttle import arm_client_kwargs
+    return client_cls(
+        FakeCredential(), subscription_id, base_url=base_url,
+        # The bearer token policy refuses plain HTTP; the fake needs no token anyway
+        authentication_policy=SansIOHTTPPolicy(),
+        **{**arm_client_kwargs(), **kwargs}
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--port", type=int, default=0)
+    parser.add_argument("--kube-url", required=True, help="server written into the cluster kubeconfig")
+    parser.add_argument("--resources", type=int, default=40, help="resources in the resource group")
+    parser.add_argument("--latency-ms", type=float, default=0)
+    parser.add_argument("--jitter-ms", type=float, default=0)
+    args = parser.parse_args()
+
+    server = make_server(args.kube_url, args.port, args.latency_ms, args.jitter_ms, args.resources)
+    print(json.dumps({"url": f"http://127.0.0.1:{server.server_port}"}), flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
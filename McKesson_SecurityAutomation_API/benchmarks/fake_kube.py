@@ -0,0 +1,281 @@
+"""
+Stand-in Kubernetes API server for offline benchmarks.
+
+Implements the core/v1 and apps/v1 routes the backend uses (pods, pod logs,
+deployments, services, including `watch=true` for the informers) over plain
+HTTP, with a configurable per-request latency and object count. Objects are
+generated once and their JSON is pre-encoded, so the server itself costs little
+next to the client-side deserialization being measured.
+
+    python benchmarks/fake_kube.py --port 8801 --pods 5000 --latency-ms 5
+"""
+
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+NAMESPACES = ["hsps", "star"]
+PODS_PER_DEPLOYMENT = 25
+LOG_LINES = 200
+
+_ROUTES = [
+    ("pod_log", re.compile(r"^/api/v1/namespaces/([^/]+)/pods/([^/]+)/log$")),
+    ("pod", re.compile(r"^/api/v1/namespaces/([^/]+)/pods/([^/]+)$")),
+    ("pods", re.compile(r"^/api/v1/namespaces/([^/]+)/pods$")),
+    ("services", re.compile(r"^/api/v1/namespaces/([^/]+)/services$")),
+    ("deployment", re.compile(r"^/apis/apps/v1/namespaces/([^/]+)/deployments/([^/]+)$")),
+    ("deployments", re.compile(r"^/apis/apps/v1/namespaces/([^/]+)/deployments$")),
+]
+
+
+def deployment_name(namespace: str, index: int) -> str:
+    return f"{namespace}-app-{index}"
+
+
+def pod_name(namespace: str, index: int, deployments: int) -> str:
+    return f"{deployment_name(namespace, index % deployments)}-{index:05d}"
+
+
+class Cluster:
+    """Generated objects for every namespace, plus their encoded list responses"""
+
+    def __init__(self, pods: int = 5000, deployments: int = 0, services: int = 0,
+                 log_lines: int = LOG_LINES, namespaces=NAMESPACES):
+        self.pods = pods
+        self.deployments_per_ns = deployments or max(1, pods // PODS_PER_DEPLOYMENT)
+        self.services_per_ns = services or self.deployments_per_ns
+        self.log_lines = log_lines
+        self.created = datetime.now(timezone.utc) - timedelta(days=3)
+        self.resource_version = 1000
+        self.lists = {}  # (kind, namespace) -> encoded list body
+        self.items = {}  # (kind, namespace, name) -> encoded object body
+        for ns in namespaces:
+            self._add("pods", ns, [self._pod(ns, i) for i in range(pods)], "PodList", "v1")
+            self._add("deployments", ns, [self._deployment(ns, i) for i in range(self.deployments_per_ns)],
+                      "DeploymentList", "apps/v1")
+            self._add("services", ns, [self._service(ns, i) for i in range(self.services_per_ns)],
+                      "ServiceList", "v1")
+
+    def _add(self, kind, namespace, objects, list_kind, api_version):
+        self.lists[(kind, namespace)] = json.dumps({
+            "kind": list_kind,
+            "apiVersion": api_version,
+            "metadata": {"resourceVersion": str(self.resource_version)},
+            "items": objects,
+        }).encode()
+        for obj in objects:
+            self.items[(kind, namespace, obj["metadata"]["name"])] = json.dumps(obj).encode()
+
+    def _metadata(self, namespace, name, labels, index):
+        return {
+            "name": name,
+            "namespace": namespace,
+            "uid": f"{namespace}-{name}",
+            "resourceVersion": str(self.resource_version - index % 100),
+            "creationTimestamp": (self.created + timedelta(minutes=index)).strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "labels": labels,
+        }
+
+    def _pod(self, namespace, index):
+        deployment = deployment_name(namespace, index % self.deployments_per_ns)
+        name = pod_name(namespace, index, self.deployments_per_ns)
+        image = f"hspsacr.azurecr.io/{deployment}:1.4.{index % 7}"
+        return {
+            "kind": "Pod",
+            "apiVersion": "v1",
+            "metadata": self._metadata(namespace, name, {"app": deployment, "tier": "backend"}, index),
+            "spec": {
+                "nodeName": f"aks-nodepool1-{index % 3}",
+                "containers": [{
+                    "name": "app",
+                    "image": image,
+                    "ports": [{"containerPort": 8080, "protocol": "TCP"}],
+                }],
+            },
+            "status": {
+                "phase": "Running",
+                "podIP": f"10.244.{index // 250 % 256}.{index % 250 + 2}",
+                "conditions": [
+                    {"type": "Ready", "status": "True"},
+                    {"type": "ContainersReady", "status": "True"},
+                ],
+                "containerStatuses": [{
+                    "name": "app",
+                    "image": image,
+                    "imageID": f"{image}@sha256:{index:064x}",
+                    "ready": True,
+                    "restartCount": index % 4,
+                }],
+            },
+        }
+
+    def _deployment(self, namespace, index):
+        name = deployment_name(namespace, index)
+        replicas = len(range(index, self.pods, self.deployments_per_ns))
+        return {
+            "kind": "Deployment",
+            "apiVersion": "apps/v1",
+            "metadata": self._metadata(namespace, name, {"app": name}, index),
+            "spec": {
+                "replicas": replicas,
+                "selector": {"matchLabels": {"app": name}},
+                "template": {
+                    "metadata": {"labels": {"app": name}},
+                    "spec": {"containers": [{"name": "app", "image": f"hspsacr.azurecr.io/{name}:1.4.0"}]},
+                },
+            },
+            "status": {"replicas": replicas, "availableReplicas": replicas,
+                       "readyReplicas": replicas, "updatedReplicas": replicas},
+        }
+
+    def _service(self, namespace, index):
+        name = deployment_name(namespace, index)
+        return {
+            "kind": "Service",
+            "apiVersion": "v1",
+            "metadata": self._metadata(namespace, name, {"app": name}, index),
+            "spec": {
+                "type": "ClusterIP",
+                "clusterIP": f"10.0.{index // 250 % 256}.{index % 250 + 2}",
+                "selector": {"app": name},
+                "ports": [{"port": 80, "targetPort": 8080, "protocol": "TCP"}],
+            },
+        }
+
+    def log(self, namespace, name, tail_lines=None, timestamps=False) -> bytes:
+        count = self.log_lines if tail_lines is None else min(tail_lines, self.log_lines)
+        seed = sum(map(ord, name))
+        start = datetime.now(timezone.utc) - timedelta(seconds=count)
+        lines = []
+        for i in range(self.log_lines - count, self.log_lines):
+            level = "WARNING" if (seed + i) % 17 == 0 else "INFO"
+            line = f"level={level} msg=\"request handled\" path=/api/orders/{(seed + i) % 50} status=200 duration_ms={(seed * i) % 250}"
+            if timestamps:
+                ts = start + timedelta(seconds=i - (self.log_lines - count), microseconds=seed % 1000)
+                line = ts.strftime("%Y-%m-%dT%H:%M:%S.%f") + "000Z " + line
+            lines.append(line)
+        return ("\n".join(lines) + "\n").encode()
+
+
+class FakeKubeHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    cluster: Cluster = None
+    latency = 0.0
+    jitter = 0.0
+
+    def _delay(self):
+        if self.latency or self.jitter:
+            time.sleep(max(0.0, self.latency + random.uniform(-self.jitter, self.jitter)))
+
+    def _send(self, status, body: bytes, content_type="application/json"):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _not_found(self, kind, name):
+        self._send(404, json.dumps({
+            "kind": "Status", "apiVersion": "v1", "status": "Failure",
+            "message": f'{kind} "{name}" not found', "reason": "NotFound", "code": 404,
+        }).encode())
+
+    def _watch(self, query):
+        # Nothing changes in the fake cluster: hold the watch open until its timeout
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+        deadline = time.monotonic() + float(query.get("timeoutSeconds", ["60"])[0])
+        while time.monotonic() < deadline and not getattr(self.server, "stopping", False):
+            time.sleep(0.2)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        for route, pattern in _ROUTES:
+            match = pattern.match(url.path)
+            if match:
+                break
+        else:
+            return self._send(404, b'{"kind":"Status","code":404,"reason":"NotFound"}')
+
+        if query.get("watch") == ["true"]:
+            return self._watch(query)
+        self._delay()
+        namespace, name = match.group(1), match.group(2) if pattern.groups > 1 else None
+        if route in ("pods", "deployments", "services"):
+            return self._send(200, self.cluster.lists.get((route, namespace)) or
+                              b'{"kind":"List","metadata":{"resourceVersion":"1"},"items":[]}')
+        kind = "deployments" if route == "deployment" else "pods"
+        if (kind, namespace, name) not in self.cluster.items:
+            return self._not_found(kind, name)
+        if route == "pod_log":
+            tail = query.get("tailLines")
+            body = self.cluster.log(namespace, name, int(tail[0]) if tail else None,
+                                    query.get("timestamps") == ["true"])
+            return self._send(200, body, "text/plain")
+        return self._send(200, self.cluster.items[(kind, namespace, name)])
+
+    def handle(self):
+        try:
+            super().handle()
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # the app dropped the connection, e.g. when a run ends
+
+    def log_message(self, *args):
+        pass
+
+
+def make_server(port: int = 0, latency_ms: float = 0, jitter_ms: float = 0, **cluster_options) -> ThreadingHTTPServer:
+    handler = type("Handler", (FakeKubeHandler,), {
+        "cluster": Cluster(**cluster_options),
+        "latency": latency_ms / 1000,
+        "jitter": jitter_ms / 1000,
+    })
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def serve_in_thread(server: ThreadingHTTPServer) -> threading.Thread:
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return thread
+
+
+def stop(server: ThreadingHTTPServer):
+    server.stopping = True
+    server.shutdown()
+    server.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--port", type=int, default=0)
+    parser.add_argument("--pods", type=int, default=5000, help="pods per namespace")
+    parser.add_argument("--deployments", type=int, default=0, help=f"default: pods / {PODS_PER_DEPLOYMENT}")
+    parser.add_argument("--services", type=int, default=0, help="default: one per deployment")
+    parser.add_argument("--log-lines", type=int, default=LOG_LINES)
+    parser.add_argument("--latency-ms", type=float, default=0)
+    parser.add_argument("--jitter-ms", type=float, default=0)
+    args = parser.parse_args()
+
+    server = make_server(args.port, args.latency_ms, args.jitter_ms, pods=args.pods,
+                         deployments=args.deployments, services=args.services, log_lines=args.log_lines)
+    print(json.dumps({"url": f"http://127.0.0.1:{server.server_port}"}), flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
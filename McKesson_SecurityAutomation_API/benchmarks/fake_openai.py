@@ -0,0 +1,202 @@
+"""
+Stand-in for the OpenAI `/v1/chat/completions` subset the agent uses.
+
+Replies follow a script: the corpus (agent_corpus.json) lists, per question,
+the rounds of tool calls the model should request and the final answer. The
+stub finds the latest user message, counts the tool-call rounds already in the
+conversation and answers with the next round or the final answer. Unknown
+questions get a direct answer without tools.
+
+Latency is modelled as time to first token plus generation time, with a
+prompt-processing cost per 1k prompt tokens so smaller prompts answer faster.
+Both plain and streamed (SSE, optionally with a usage chunk) responses are
+supported. Token usage is counted with the same tokenizer as the agent.
+
+    python benchmarks/fake_openai.py --corpus benchmarks/agent_corpus.json --ttft-ms 300
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agent_context import count_tokens  # noqa: E402
+
+UNKNOWN_ANSWER = "I can help with the AKS cluster, pods, deployments, services and Azure resources of the HSPS environment."
+
+
+def load_corpus(path: str) -> dict:
+    with open(path) as f:
+        return {entry["question"]: entry for entry in json.load(f)}
+
+
+def next_reply(corpus: dict, messages: list):
+    """(content, tool_calls) the scripted model answers with for this conversation"""
+    last_user = max((i for i, m in enumerate(messages) if m.get("role") == "user"), default=-1)
+    question = messages[last_user]["content"] if last_user >= 0 else ""
+    entry = corpus.get(question)
+    if entry is None:
+        return UNKNOWN_ANSWER, []
+    rounds_done = sum(1 for m in messages[last_user + 1:] if m.get("role") == "assistant" and m.get("tool_calls"))
+    rounds = entry.get("rounds", [])
+    if rounds_done < len(rounds):
+        return None, [
+            {"id": f"call_{rounds_done}_{i}", "type": "function",
+             "function": {"name": call["name"], "arguments": json.dumps(call.get("arguments", {}))}}
+            for i, call in enumerate(rounds[rounds_done])
+        ]
+    return entry["answer"], []
+
+
+class FakeOpenAIHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    corpus: dict = {}
+    ttft = 0.3
+    tokens_per_second = 80.0
+    prompt_seconds_per_1k = 0.0
+    chunk_tokens = 4
+    stats = None
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length") or 0)) or b"{}")
+        if self.path.rstrip("/") != "/v1/chat/completions":
+            return self._send_json(404, {"error": {"message": f"No fake for {self.path}", "type": "invalid_request_error"}})
+
+        messages = body.get("messages", [])
+        content, tool_calls = next_reply(self.corpus, messages)
+        prompt_tokens = count_tokens(json.dumps(messages)) + count_tokens(json.dumps(body.get("tools") or []))
+        completion_tokens = count_tokens(content) + (count_tokens(json.dumps(tool_calls)) if tool_calls else 0)
+        self._record(prompt_tokens, completion_tokens, len(body.get("tools") or []))
+
+        # Time to first token grows with the prompt, like prefill does
+        time.sleep(self.ttft + prompt_tokens / 1000 * self.prompt_seconds_per_1k)
+        usage = {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                 "total_tokens": prompt_tokens + completion_tokens}
+        if body.get("stream"):
+            include_usage = (body.get("stream_options") or {}).get("include_usage", False)
+            return self._stream(body.get("model"), content, tool_calls, usage if include_usage else None)
+
+        time.sleep(completion_tokens / self.tokens_per_second)
+        message = {"role": "assistant", "content": content}
+        if tool_calls:
+            message["tool_calls"] = tool_calls
+        self._send_json(200, {
+            "id": f"chatcmpl-{uuid.uuid4().hex[:12]}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model"),
+            "choices": [{"index": 0, "message": message, "finish_reason": "tool_calls" if tool_calls else "stop"}],
+            "usage": usage,
+        })
+
+    def _record(self, prompt_tokens: int, completion_tokens: int, tools: int):
+        with self.stats["lock"]:
+            self.stats["requests"] += 1
+            self.stats["promptTokens"] += prompt_tokens
+            self.stats["completionTokens"] += completion_tokens
+            self.stats["toolsOffered"] += tools
+
+    def do_GET(self):
+        if self.path.rstrip("/") == "/stats":
+            with self.stats["lock"]:
+                return self._send_json(200, {k: v for k, v in self.stats.items() if k != "lock"})
+        self._send_json(404, {"error": {"message": "not found"}})
+
+    def _send_json(self, status: int, payload: dict):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _stream(self, model, content, tool_calls, usage):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+
+        def send(choices, **extra):
+            chunk = {"id": completion_id, "object": "chat.completion.chunk", "created": int(time.time()),
+                     "model": model, "choices": choices, **extra}
+            self._write_chunk(f"data: {json.dumps(chunk)}\n\n")
+
+        if tool_calls:
+            for i, call in enumerate(tool_calls):
+                send([{"index": 0, "delta": {"role": "assistant", "tool_calls": [{
+                    "index": i, "id": call["id"], "type": "function",
+                    "function": {"name": call["function"]["name"], "arguments": ""}}]}, "finish_reason": None}])
+                time.sleep(count_tokens(json.dumps(call)) / self.tokens_per_second)
+                send([{"index": 0, "delta": {"tool_calls": [{
+                    "index": i, "function": {"arguments": call["function"]["arguments"]}}]}, "finish_reason": None}])
+        else:
+            words = content.split(" ")
+            step = max(1, self.chunk_tokens)
+            for start in range(0, len(words), step):
+                piece = " ".join(words[start:start + step]) + (" " if start + step < len(words) else "")
+                send([{"index": 0, "delta": {"content": piece}, "finish_reason": None}])
+                time.sleep(count_tokens(piece) / self.tokens_per_second)
+        send([{"index": 0, "delta": {}, "finish_reason": "tool_calls" if tool_calls else "stop"}])
+        if usage:
+            send([], usage=usage)
+        self._write_chunk("data: [DONE]\n\n")
+        self.wfile.write(b"0\r\n\r\n")
+
+    def _write_chunk(self, text: str):
+        data = text.encode()
+        self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+        self.wfile.flush()
+
+    def handle(self):
+        try:
+            super().handle()
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # the app dropped the connection, e.g. when a run ends
+
+    def log_message(self, *args):
+        pass
+
+
+def make_server(corpus: dict, port: int = 0, ttft_ms: float = 300, tokens_per_second: float = 80,
+                prompt_ms_per_1k: float = 20, chunk_tokens: int = 4) -> ThreadingHTTPServer:
+    handler = type("Handler", (FakeOpenAIHandler,), {
+        "corpus": corpus,
+        "ttft": ttft_ms / 1000,
+        "tokens_per_second": tokens_per_second,
+        "prompt_seconds_per_1k": prompt_ms_per_1k / 1000,
+        "chunk_tokens": chunk_tokens,
+        "stats": {"lock": threading.Lock(), "requests": 0, "promptTokens": 0, "completionTokens": 0, "toolsOffered": 0},
+    })
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--port", type=int, default=0)
+    parser.add_argument("--corpus", default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "agent_corpus.json"))
+    parser.add_argument("--ttft-ms", type=float, default=300, help="time to first token")
+    parser.add_argument("--tokens-per-second", type=float, default=80, help="generation speed")
+    parser.add_argument("--prompt-ms-per-1k", type=float, default=20, help="extra first-token delay per 1k prompt tokens")
+    parser.add_argument("--chunk-tokens", type=int, default=4, help="words per streamed content chunk")
+    args = parser.parse_args()
+
+    server = make_server(load_corpus(args.corpus), args.port, args.ttft_ms, args.tokens_per_second,
+                         args.prompt_ms_per_1k, args.chunk_tokens)
+    print(json.dumps({"url": f"http://127.0.0.1:{server.server_port}"}), flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
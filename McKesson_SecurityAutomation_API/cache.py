@@ -0,0 +1,202 @@
+"""
+In-process TTL cache for Azure Resource Manager reads.
+
+ARM data (cluster state, node pools, resource inventory, ...) changes on a scale
+of minutes, while the UI polls it every few seconds from several tabs. TTLCache
+serves a cached value while it is fresh, keeps serving it for a grace period
+after it goes stale while one background task refreshes it, and collapses
+concurrent identical misses into a single upstream call (single-flight).
+
+With a SharedStore (multi-worker deployments, see shared_cache.py) a local miss
+or refresh first looks in the store shared by all workers, and only one worker
+per key calls the upstream.
+"""
+
+import asyncio
+import functools
+import logging
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# How long past its TTL a value may still be served while a refresh runs
+CACHE_STALE_SECONDS = float(os.getenv("CACHE_STALE_SECONDS", "300"))
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "1024"))
+
+
+def ttl_from_env(name: str, default: float) -> float:
+    """Per-endpoint TTL, overridable with CACHE_TTL_<NAME> (seconds)"""
+    return float(os.getenv(f"CACHE_TTL_{name.upper()}", default))
+
+
+class _Entry:
+    __slots__ = ("value", "stored_at", "ttl")
+
+    def __init__(self, value: Any, ttl: float, age: float = 0.0):
+        self.value = value
+        self.stored_at = time.monotonic() - age
+        self.ttl = ttl
+
+    def age(self) -> float:
+        return time.monotonic() - self.stored_at
+
+
+class TTLCache:
+    """
+    Async TTL cache with stale-while-revalidate and single-flight loading.
+
+    Keys are tuples whose first element names the endpoint; it is used to
+    group hit/miss counters and for prefix invalidation. `shared` is an
+    optional cross-worker second tier (shared_cache.SharedStore).
+    """
+
+    def __init__(self, stale_seconds: float = CACHE_STALE_SECONDS, max_entries: int = CACHE_MAX_ENTRIES,
+                 shared=None):
+        self.stale_seconds = stale_seconds
+        self.max_entries = max_entries
+        self.shared = shared
+        self._entries: "OrderedDict[Hashable, _Entry]" = OrderedDict()
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        self._stats: Dict[str, Dict[str, int]] = {}
+
+    def _new_counters(self) -> Dict[str, int]:
+        if self.shared is not None:
+            return {"hits": 0, "stale_hits": 0, "shared_hits": 0, "misses": 0, "errors": 0}
+        return {"hits": 0, "stale_hits": 0, "misses": 0, "errors": 0}
+
+    def _count(self, key: Tuple, outcome: str):
+        name = str(key[0]) if isinstance(key, tuple) and key else str(key)
+        counters = self._stats.get(name)
+        if counters is None:
+            counters = self._stats[name] = self._new_counters()
+        counters[outcome] += 1
+
+    def _store(self, key: Hashable, value: Any, ttl: float, age: float = 0.0):
+        self._entries[key] = _Entry(value, ttl, age)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _load(self, key: Hashable, loader: Callable[[], Awaitable[Any]], ttl: float) -> asyncio.Task:
+        """Start (or join) the single in-flight load for a key; the task returns (value, source)"""
+        task = self._inflight.get(key)
+        if task is not None:
+            return task
+
+        async def run():
+            try:
+                if self.shared is not None:
+                    value, age, source = await self.shared.load(key, loader, ttl, self.stale_seconds)
+                else:
+                    value, age, source = await loader(), 0.0, "loaded"
+                self._store(key, value, ttl, age)
+                return value, source
+            except Exception:
+                self._count(key, "errors")
+                raise
+            finally:
+                self._inflight.pop(key, None)
+
+        task = asyncio.ensure_future(run())
+        self._inflight[key] = task
+        return task
+
+    async def get_or_load(self, key: Hashable, loader: Callable[[], Awaitable[Any]], ttl: float) -> Any:
+        """
+        Return the cached value for `key`, calling `loader` on a miss.
+
+        Fresh values are returned directly. Stale values (within the grace period)
+        are returned immediately while a background refresh runs. Errors from a
+        foreground load propagate to every waiter and are not cached.
+        """
+        value, _ = await self.lookup(key, loader, ttl)
+        return value
+
+    async def lookup(self, key: Hashable, loader: Callable[[], Awaitable[Any]], ttl: float) -> Tuple[Any, str]:
+        """
+        Like get_or_load, but also returns the outcome: hit, stale_hit, miss, or
+        shared_hit when another worker had already loaded the value
+        """
+        entry = self._entries.get(key)
+        if entry is not None:
+            age = entry.age()
+            if age < entry.ttl:
+                self._count(key, "hits")
+                return entry.value, "hit"
+            if age < entry.ttl + self.stale_seconds:
+                self._count(key, "stale_hits")
+                if key not in self._inflight:
+                    # Nobody awaits a background refresh: log its failure instead of leaving it unretrieved
+                    self._load(key, loader, ttl).add_done_callback(_log_load_failure)
+                return entry.value, "stale_hit"
+
+        try:
+            # Shield so a disconnecting client does not cancel the shared load
+            value, source = await asyncio.shield(self._load(key, loader, ttl))
+        except Exception:
+            self._count(key, "misses")
+            raise
+        if source == "shared":
+            self._count(key, "shared_hits")
+            return value, "shared_hit"
+        self._count(key, "misses")
+        return value, "miss"
+
+    def invalidate(self, prefix: Optional[str] = None) -> int:
+        """
+        Drop all entries, or those whose endpoint name starts with `prefix`;
+        returns count removed. With a shared store its entries are removed too,
+        but other workers keep their local copies until those expire.
+        """
+        if prefix is None:
+            removed = len(self._entries)
+            self._entries.clear()
+        else:
+            keys = [k for k in self._entries if str(k[0] if isinstance(k, tuple) else k).startswith(prefix)]
+            for k in keys:
+                del self._entries[k]
+            removed = len(keys)
+        if self.shared is not None:
+            removed = max(removed, self.shared.invalidate(prefix))
+        return removed
+
+    def stats(self) -> dict:
+        """Hit/miss counters per endpoint plus totals"""
+        totals = self._new_counters()
+        for counters in self._stats.values():
+            for k, v in counters.items():
+                totals[k] += v
+        hits = totals["hits"] + totals["stale_hits"] + totals.get("shared_hits", 0)
+        lookups = hits + totals["misses"]
+        stats = {
+            "entries": len(self._entries),
+            "inflight": len(self._inflight),
+            "hitRatio": round(hits / lookups, 4) if lookups else None,
+            "totals": totals,
+            "endpoints": {name: dict(c) for name, c in self._stats.items()},
+        }
+        if self.shared is not None:
+            stats["shared"] = self.shared.stats()
+        return stats
+
+    def cached(self, name: str, ttl: float):
+        """
+        Decorator for FastAPI endpoints: caches the response keyed by endpoint
+        name and path/query parameters. The wrapped function keeps its signature
+        so FastAPI still sees the original parameters.
+        """
+        def decorator(fn: Callable[..., Awaitable[Any]]):
+            @functools.wraps(fn)
+            async def wrapper(**kwargs):
+                key = (name,) + tuple(sorted(kwargs.items()))
+                return await self.get_or_load(key, lambda: fn(**kwargs), ttl)
+            return wrapper
+        return decorator
+
+
+def _log_load_failure(task: asyncio.Task):
+    if not task.cancelled() and task.exception() is not None:
+        logger.warning("Cache load failed: %s", task.exception())
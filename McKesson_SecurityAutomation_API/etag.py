@@ -0,0 +1,122 @@
+"""
+ETag / If-None-Match conditional responses for polled GET endpoints.
+
+The dashboard and KubernetesMonitor.vue poll every few seconds and usually get
+back exactly the same JSON. Endpoints decorated with `ETags.conditional` send
+an ETag (a hash of the encoded body) and answer `304 Not Modified` with no body
+when the client already has that version.
+
+The encoded body and its ETag are memoized per result object. Results served
+from TTLCache are the same object on every hit, so for cached endpoints a poll
+that finds nothing changed skips JSON encoding and hashing entirely.
+"""
+
+import functools
+import hashlib
+import inspect
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Optional, Sequence, Tuple
+
+from fastapi import Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, Response
+
+ETAG_MEMO_ENTRIES = 256
+
+_REQUEST_PARAM = "_etag_request"
+
+
+def compute_etag(body: bytes) -> str:
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match check using weak comparison (RFC 9110 13.1.2)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == opaque:
+            return True
+    return False
+
+
+class ETags:
+    """Encodes endpoint results once per result object and answers conditional GETs"""
+
+    def __init__(self, max_entries: int = ETAG_MEMO_ENTRIES):
+        self.max_entries = max_entries
+        # id(result) -> (result, etag, body); the result is kept so its id is not reused
+        self._memo: "OrderedDict[int, Tuple[Any, str, bytes]]" = OrderedDict()
+        self.stats_counters = {"notModified": 0, "encoded": 0, "memoHits": 0, "bytesSaved": 0}
+
+    def encode(self, value: Any, memoize: bool = True) -> Tuple[str, bytes]:
+        """(etag, JSON body) for a result, encoded the same way FastAPI would"""
+        if not memoize:
+            body = JSONResponse(jsonable_encoder(value)).body
+            self.stats_counters["encoded"] += 1
+            return compute_etag(body), body
+        memo = self._memo.get(id(value))
+        if memo is not None and memo[0] is value:
+            self._memo.move_to_end(id(value))
+            self.stats_counters["memoHits"] += 1
+            return memo[1], memo[2]
+
+        body = JSONResponse(jsonable_encoder(value)).body
+        etag = compute_etag(body)
+        self.stats_counters["encoded"] += 1
+        self._memo[id(value)] = (value, etag, body)
+        while len(self._memo) > self.max_entries:
+            self._memo.popitem(last=False)
+        return etag, body
+
+    def respond(self, request: Request, value: Any, volatile: Sequence[str] = ()) -> Response:
+        if isinstance(value, Response):
+            # Streaming variants and explicit responses pass through untouched
+            return value
+        if volatile and isinstance(value, dict):
+            # Fresh per call (e.g. timings): hash without the volatile keys, memoize nothing
+            etag, _ = self.encode({k: v for k, v in value.items() if k not in volatile}, memoize=False)
+            body = None
+        else:
+            etag, body = self.encode(value)
+        headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            self.stats_counters["notModified"] += 1
+            if body is not None:
+                self.stats_counters["bytesSaved"] += len(body)
+            return Response(status_code=304, headers=headers)
+        if body is None:
+            body = JSONResponse(jsonable_encoder(value)).body
+        return Response(content=body, media_type="application/json", headers=headers)
+
+    def conditional(self, fn: Optional[Callable[..., Awaitable[Any]]] = None, *, volatile: Sequence[str] = ()):
+        """
+        Decorator for GET endpoints returning JSON-able results. The wrapper
+        adds the Request to the signature FastAPI sees, so the endpoint itself
+        is unchanged; called directly (e.g. by the overview fan-out) it returns
+        the plain result. Keys in `volatile` (e.g. `@etags.conditional(volatile=
+        ("totalMs",))`) are sent but left out of the ETag.
+        """
+        if fn is None:
+            return functools.partial(self.conditional, volatile=volatile)
+        signature = inspect.signature(fn)
+        params = list(signature.parameters.values())
+        params.append(inspect.Parameter(_REQUEST_PARAM, inspect.Parameter.KEYWORD_ONLY, annotation=Request))
+
+        @functools.wraps(fn)
+        async def wrapper(**kwargs):
+            request = kwargs.pop(_REQUEST_PARAM, None)
+            result = await fn(**kwargs)
+            return result if request is None else self.respond(request, result, volatile)
+
+        wrapper.__signature__ = signature.replace(parameters=params)
+        return wrapper
+
+    def stats(self) -> dict:
+        return {**self.stats_counters, "memoEntries": len(self._memo)}
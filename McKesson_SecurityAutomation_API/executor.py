@@ -0,0 +1,80 @@
+"""
+Bounded thread pools for blocking SDK calls.
+
+The azure-mgmt and kubernetes clients are synchronous. Calling them directly
+from an `async def` handler blocks the uvicorn event loop, so one slow ARM call
+stalls every other request (including /health). `run_blocking` hands the call
+to a thread pool dedicated to that upstream dependency, so a burst of slow
+calls against one dependency cannot starve the others.
+
+Pool sizes are configurable per dependency via environment variables.
+"""
+
+import asyncio
+import contextvars
+import functools
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict
+
+from metrics import operation_name, track_upstream
+
+# Max concurrent blocking calls per upstream dependency
+POOL_SIZES = {
+    "arm": int(os.getenv("ARM_MAX_CONCURRENCY", "16")),
+    "kubernetes": int(os.getenv("KUBE_MAX_CONCURRENCY", "16")),
+    # One thread per open follow-mode log stream
+    "kube_logs": int(os.getenv("LOG_STREAM_MAX_STREAMS", "32")),
+}
+DEFAULT_POOL_SIZE = int(os.getenv("DEFAULT_MAX_CONCURRENCY", "8"))
+
+_pools: Dict[str, ThreadPoolExecutor] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(dependency: str) -> ThreadPoolExecutor:
+    """Return (creating on first use) the thread pool for an upstream dependency"""
+    pool = _pools.get(dependency)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.get(dependency)
+            if pool is None:
+                pool = ThreadPoolExecutor(
+                    max_workers=POOL_SIZES.get(dependency, DEFAULT_POOL_SIZE),
+                    thread_name_prefix=f"{dependency}-io",
+                )
+                _pools[dependency] = pool
+    return pool
+
+
+def drain(fn: Callable[..., Any], *args, **kwargs) -> list:
+    """Call a paged SDK list operation and consume every page (inside the worker thread)"""
+    return list(fn(*args, **kwargs))
+
+
+def _tracked(dependency: str, operation: str, fn: Callable[..., Any], *args, **kwargs) -> Any:
+    with track_upstream(dependency, operation):
+        return fn(*args, **kwargs)
+
+
+async def run_blocking(dependency: str, fn: Callable[..., Any], *args, **kwargs) -> Any:
+    """
+    Run a blocking call on the dependency's thread pool without blocking the event
+    loop. The call is timed as an upstream operation of `dependency`.
+    """
+    loop = asyncio.get_running_loop()
+    operation = operation_name(args[0] if fn is drain and args else fn)
+    # Carry context variables (request-scoped state) into the worker thread
+    ctx = contextvars.copy_context()
+    call = functools.partial(ctx.run, _tracked, dependency, operation, fn, *args, **kwargs)
+    return await loop.run_in_executor(get_pool(dependency), call)
+
+
+def shutdown_pools(wait: bool = False):
+    """Shut down all dependency pools (called on application shutdown)"""
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.shutdown(wait=wait, cancel_futures=True)
@@ -0,0 +1,38 @@
+"""
+Gunicorn configuration for the multi-worker deployment mode.
+
+    gunicorn -c gunicorn.conf.py app:app
+
+Runs WEB_CONCURRENCY uvicorn workers (default 4). The workers share their ARM
+and tool caches through a SQLite file in WAL mode (SHARED_CACHE_PATH, default
+under /dev/shm), so adding workers adds throughput without multiplying calls
+to Azure and the Kubernetes API server. Agent sessions are kept in a second
+SQLite file (SESSION_DB_PATH) for the same reason.
+"""
+
+import os
+import tempfile
+
+# Set before the workers fork (and before they import the app) so they all open the same database
+os.environ.setdefault("SHARED_CACHE_PATH", os.path.join(
+    "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir(), "azure-api-cache.sqlite"
+))
+# Agent sessions too, so a conversation can continue on any worker
+os.environ.setdefault("SESSION_DB_PATH", os.path.join(
+    "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir(), "azure-api-sessions.sqlite"
+))
+
+bind = os.getenv("GUNICORN_BIND", f"0.0.0.0:{os.getenv('PORT', '8000')}")
+workers = int(os.getenv("WEB_CONCURRENCY", "4"))
+# Per-instance limits (e.g. ARM_RATE_LIMIT_PER_SECOND) are split across the workers
+os.environ["WEB_CONCURRENCY"] = str(workers)
+worker_class = "uvicorn.workers.UvicornWorker"
+# Log streams and agent SSE responses are long-lived; give them time to finish on restart
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", "30"))
+keepalive = 5
+accesslog = "-"
+
+
+def on_starting(server):
+    server.log.info("Shared cache: %s", os.environ["SHARED_CACHE_PATH"])
+    server.log.info("Agent sessions: %s", os.environ["SESSION_DB_PATH"])
@@ -0,0 +1,230 @@
+"""
+Watch-based informer cache for Kubernetes objects.
+
+Instead of a full LIST against the API server on every request, each informer
+does one LIST followed by a long-running WATCH for one resource type in one
+namespace, and applies the events to an in-memory store keyed by
+namespace/name. Reads then come from memory and API-server load no longer
+grows with the number of polling clients. A `410 Gone` (resource version too
+old) triggers a fresh LIST; other errors mark the store unsynced (reads fall
+back to a direct LIST until the next successful one), back off and relist. A
+`401` also calls `on_unauthorized` so expired cluster credentials are refetched.
+"""
+
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from kube_client import api_status
+
+logger = logging.getLogger(__name__)
+
+INFORMERS_ENABLED = os.getenv("INFORMERS_ENABLED", "true").lower() == "true"
+INFORMER_NAMESPACES = [ns.strip() for ns in os.getenv("INFORMER_NAMESPACES", "hsps,star").split(",") if ns.strip()]
+
+# Server-side watch timeout; the watch is re-established (with a fresh client) after it
+INFORMER_WATCH_TIMEOUT_SECONDS = int(os.getenv("INFORMER_WATCH_TIMEOUT_SECONDS", "300"))
+INFORMER_MAX_BACKOFF_SECONDS = float(os.getenv("INFORMER_MAX_BACKOFF_SECONDS", "60"))
+
+
+class InformerStore:
+    """Thread-safe store of the latest object per namespace/name"""
+
+    def __init__(self):
+        self._items: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+        self.resource_version: Optional[str] = None
+        self.synced = False
+        self.last_sync: Optional[float] = None
+        self.version = 0  # bumped on every change
+        self._derived: Dict[tuple, Tuple[int, Any]] = {}
+
+    @staticmethod
+    def key_for(obj: Any) -> str:
+        return f"{obj.metadata.namespace}/{obj.metadata.name}"
+
+    def replace(self, objects: List[Any], resource_version: Optional[str]):
+        with self._lock:
+            self._items = {self.key_for(o): o for o in objects}
+            self.resource_version = resource_version
+            self.synced = True
+            self.last_sync = time.time()
+            self.version += 1
+
+    def upsert(self, obj: Any):
+        with self._lock:
+            self._items[self.key_for(obj)] = obj
+            self.resource_version = obj.metadata.resource_version
+            self.version += 1
+
+    def delete(self, obj: Any):
+        with self._lock:
+            self._items.pop(self.key_for(obj), None)
+            self.resource_version = obj.metadata.resource_version
+            self.version += 1
+
+    def get(self, namespace: str, name: str) -> Optional[Any]:
+        return self._items.get(f"{namespace}/{name}")
+
+    def list(self) -> List[Any]:
+        """Snapshot of all objects, sorted by name for stable output"""
+        with self._lock:
+            items = list(self._items.values())
+        return sorted(items, key=lambda o: o.metadata.name)
+
+    def derive(self, build: Callable[..., Any], *args) -> Any:
+        """
+        `build(*args, objects)` over a snapshot, reused until the store changes.
+        Endpoints return the same result object for unchanged data, so a poll
+        hits the ETag memo instead of encoding and hashing it again.
+        """
+        key = (build, args)
+        version = self.version  # read first: a change during the build only costs a rebuild
+        memo = self._derived.get(key)
+        if memo is not None and memo[0] == version:
+            return memo[1]
+        result = build(*args, self.list())
+        self._derived[key] = (version, result)
+        return result
+
+    def __len__(self):
+        return len(self._items)
+
+
+class Informer(threading.Thread):
+    """
+    LIST + WATCH loop for one resource type in one namespace.
+
+    `get_list_fn()` returns the bound `list_namespaced_*` method to use; it is
+    called again before every LIST/WATCH so refreshed cluster credentials are
+    picked up. `on_unauthorized()` is called when the API server answers 401.
+    """
+
+    def __init__(self, kind: str, namespace: str, get_list_fn: Callable[[], Callable], store: InformerStore,
+                 on_unauthorized: Optional[Callable[[], None]] = None):
+        super().__init__(name=f"informer-{kind}-{namespace}", daemon=True)
+        self.kind = kind
+        self.namespace = namespace
+        self.get_list_fn = get_list_fn
+        self.store = store
+        self.on_unauthorized = on_unauthorized
+        self.relists = 0
+        self.last_error: Optional[str] = None
+        self._stop_event = threading.Event()
+        self._watch = None
+
+    def stop(self):
+        self._stop_event.set()
+        if self._watch is not None:
+            self._watch.stop()
+
+    def _list(self):
+        result = self.get_list_fn()(self.namespace)
+        self.store.replace(result.items, result.metadata.resource_version)
+        self.relists += 1
+
+    def _watch_once(self):
+        # Imported here so that importing this module does not load the kubernetes package
+        from kubernetes import watch
+        self._watch = watch.Watch()
+        stream = self._watch.stream(
+            self.get_list_fn(),
+            self.namespace,
+            resource_version=self.store.resource_version,
+            timeout_seconds=INFORMER_WATCH_TIMEOUT_SECONDS,
+            allow_watch_bookmarks=True,
+        )
+        for event in stream:
+            event_type = event["type"]
+            if event_type in ("ADDED", "MODIFIED"):
+                self.store.upsert(event["object"])
+            elif event_type == "DELETED":
+                self.store.delete(event["object"])
+            elif event_type == "BOOKMARK":
+                self.store.resource_version = event["raw_object"]["metadata"]["resourceVersion"]
+            if self._stop_event.is_set():
+                return
+
+    def run(self):
+        backoff = 1.0
+        need_list = True
+        while not self._stop_event.is_set():
+            try:
+                if need_list:
+                    self._list()
+                    need_list = False
+                self._watch_once()
+                backoff = 1.0
+            except Exception as e:
+                if api_status(e) == 410:
+                    # Our resource version is too old; start over from a fresh LIST
+                    logger.info("Informer %s/%s: resource version expired, relisting", self.kind, self.namespace)
+                    need_list = True
+                    continue
+                self._fail(e)
+                need_list = True
+                self._stop_event.wait(backoff)
+                backoff = min(backoff * 2, INFORMER_MAX_BACKOFF_SECONDS)
+
+    def _fail(self, e: Exception):
+        self.last_error = str(e)
+        # Stop serving the store until a LIST succeeds again; it goes stale while we retry
+        self.store.synced = False
+        logger.warning("Informer %s/%s failed: %s", self.kind, self.namespace, e)
+        if api_status(e) == 401 and self.on_unauthorized is not None:
+            try:
+                self.on_unauthorized()
+            except Exception:
+                logger.exception("Informer %s/%s: credential invalidation failed", self.kind, self.namespace)
+
+
+class InformerManager:
+    """
+    Starts one informer per (kind, namespace) and serves reads from their stores.
+
+    `listers` maps a kind (e.g. "pods") to a zero-argument callable returning the
+    bound `list_namespaced_*` method for that kind; `on_unauthorized` is passed
+    to every informer.
+    """
+
+    def __init__(self, listers: Dict[str, Callable[[], Callable]], namespaces: List[str] = INFORMER_NAMESPACES,
+                 on_unauthorized: Optional[Callable[[], None]] = None):
+        self.listers = listers
+        self.namespaces = namespaces
+        self.on_unauthorized = on_unauthorized
+        self._informers: Dict[Tuple[str, str], Informer] = {}
+
+    def start(self):
+        for kind, get_list_fn in self.listers.items():
+            for ns in self.namespaces:
+                if (kind, ns) in self._informers:
+                    continue
+                informer = Informer(kind, ns, get_list_fn, InformerStore(), self.on_unauthorized)
+                self._informers[(kind, ns)] = informer
+                informer.start()
+
+    def stop(self):
+        for informer in self._informers.values():
+            informer.stop()
+        self._informers.clear()
+
+    def store(self, kind: str, namespace: str) -> Optional[InformerStore]:
+        """The synced store for kind/namespace, or None if not watched (or not synced yet)"""
+        informer = self._informers.get((kind, namespace))
+        if informer is None or not informer.store.synced:
+            return None
+        return informer.store
+
+    def status(self) -> dict:
+        return {
+            f"{kind}/{ns}": {
+                "synced": inf.store.synced,
+                "objects": len(inf.store),
+                "resourceVersion": inf.store.resource_version,
+                "relists": inf.relists,
+                "lastError": inf.last_error,
+            }
+            for (kind, ns), inf in self._informers.items()
+        }
@@ -0,0 +1,231 @@
+"""
+Deterministic fast path for the agent.
+
+Questions like "list pods in star", "is the AKS cluster running" or "show node
+pools" map to a single tool, yet cost two model round trips (one to pick the
+tool, one to format its result). The IntentRouter recognizes them locally and
+the caller answers with the intent's template instead; everything else falls
+through to the model.
+
+Matching is deliberately strict. A message is routed only when:
+
+- an intent's trigger matches and no blocking word appears (why, logs,
+  should, and, ...: anything asking for reasoning, more than one thing or a
+  write);
+- a namespaced intent names exactly one known namespace;
+- at least AGENT_ROUTER_MIN_CONFIDENCE of the message's words belong to the
+  intent's vocabulary (plus common filler words).
+
+Renderers follow the system prompt's answer style: a one-line summary, a
+markdown table, and rows that look unhealthy listed first.
+"""
+
+import os
+import re
+from typing import Callable, Dict, List, Optional, Sequence
+
+from agent_context import is_unhealthy
+from metrics import AGENT_ROUTED
+
+AGENT_ROUTER_ENABLED = os.getenv("AGENT_ROUTER_ENABLED", "true").lower() == "true"
+AGENT_ROUTER_MIN_CONFIDENCE = float(os.getenv("AGENT_ROUTER_MIN_CONFIDENCE", "0.85"))
+# Rows shown in a templated table before "... and N more"
+AGENT_ROUTER_MAX_ROWS = int(os.getenv("AGENT_ROUTER_MAX_ROWS", "20"))
+
+_WORDS = re.compile(r"[a-z0-9][a-z0-9'-]*")
+_BLOCKERS = re.compile(
+    r"\b(why|should|would|could|recommend|suggest|explain|compare|fix|troubleshoot|debug|logs?|events?"
+    r"|scale|delete|restart|stop|start|cost|costs|and|or|but|except|only|without|sort|sorted|if|not|no)\b|n't\b"
+)
+COMMON_WORDS = frozenset(
+    "a an the all any me my our please show list get display give tell what which whats is are there "
+    "in for of on at can you how many do does we have current currently right now namespace status "
+    "state".split()
+)
+
+
+def _plural(count: int, noun: str) -> str:
+    return f"{count} {noun}{'' if count == 1 else 's'}"
+
+
+def _table(rows: List[dict], columns: Sequence[str]) -> str:
+    lines = ["| " + " | ".join(columns) + " |", "|" + "---|" * len(columns)]
+    lines += ["| " + " | ".join(str(row.get(c, "")) for c in columns) + " |" for row in rows]
+    return "\n".join(lines)
+
+
+def _bounded_table(rows: List[dict], columns: Sequence[str]) -> str:
+    shown = rows[:AGENT_ROUTER_MAX_ROWS]
+    text = _table(shown, columns)
+    if len(rows) > len(shown):
+        text += f"\n\n… and {len(rows) - len(shown)} more."
+    return text
+
+
+def render_pods(result: dict) -> str:
+    pods, namespace = result["pods"], result["namespace"]
+    if not pods:
+        return f"There are no pods in the **{namespace}** namespace."
+    running = sum(1 for p in pods if p["status"] == "Running")
+    ready = sum(1 for p in pods if p["ready"])
+    summary = f"**{namespace}** has {_plural(len(pods), 'pod')}: {running} running, {ready} ready."
+    attention = sorted((p for p in pods if is_unhealthy(p)), key=lambda p: (p["ready"], -p["restarts"]))
+    columns = ("name", "status", "ready", "restarts", "age")
+    if attention:
+        return (f"{summary}\n\n**Needs attention** ({_plural(len(attention), 'pod')} not ready, "
+                f"not running or restarted):\n\n{_bounded_table(attention, columns)}")
+    return f"{summary}\n\n{_bounded_table(pods, columns)}"
+
+
+def render_deployments(result: dict) -> str:
+    deployments, namespace = result["deployments"], result["namespace"]
+    if not deployments:
+        return f"There are no deployments in the **{namespace}** namespace."
+    degraded = [d for d in deployments if is_unhealthy(d)]
+    summary = (f"**{namespace}** has {_plural(len(deployments), 'deployment')}; "
+               f"{len(deployments) - len(degraded)} fully available.")
+    columns = ("name", "replicas", "availableReplicas", "readyReplicas", "updatedReplicas")
+    if degraded:
+        return f"{summary}\n\n**Not fully available:**\n\n{_bounded_table(degraded, columns)}"
+    return f"{summary}\n\n{_bounded_table(deployments, columns)}"
+
+
+def render_services(result: dict) -> str:
+    services, namespace = result["services"], result["namespace"]
+    if not services:
+        return f"There are no services in the **{namespace}** namespace."
+    rows = [
+        {**s, "ports": ", ".join(f"{p['port']}→{p['targetPort']}/{p['protocol']}" for p in s["ports"]) or "-"}
+        for s in services
+    ]
+    exposed = sum(1 for s in services if s["type"] in ("LoadBalancer", "NodePort"))
+    summary = f"**{namespace}** has {_plural(len(services), 'service')}, {exposed} exposed outside the cluster."
+    return f"{summary}\n\n{_bounded_table(rows, ('name', 'type', 'clusterIP', 'ports'))}"
+
+
+def render_aks_status(result: dict) -> str:
+    text = (f"The AKS cluster **{result['name']}** ({result['location']}) is **{result['powerState']}**, "
+            f"provisioning state {result['provisioningState']}, Kubernetes {result['kubernetesVersion']}.")
+    if result["provisioningState"] != "Succeeded" or result["powerState"] != "Running":
+        text += "\n\n**Needs attention:** the cluster is not running normally."
+    if result["agentPoolProfiles"]:
+        text += "\n\n" + _table(result["agentPoolProfiles"], ("name", "count", "vmSize", "osType"))
+    return text
+
+
+def render_node_pools(result: dict) -> str:
+    pools = result["nodePools"]
+    if not pools:
+        return "The AKS cluster has no node pools."
+    nodes = sum(p["count"] or 0 for p in pools)
+    text = f"The AKS cluster has {_plural(len(pools), 'node pool')} with {_plural(nodes, 'node')} in total."
+    attention = [p["name"] for p in pools if p["provisioningState"] != "Succeeded" or p["powerState"] != "Running"]
+    if attention:
+        text += f"\n\n**Needs attention:** {', '.join(attention)} not running normally."
+    columns = ("name", "count", "vmSize", "osType", "provisioningState", "powerState")
+    return f"{text}\n\n{_table(pools, columns)}"
+
+
+class Intent:
+    """A question shape answered by one tool call and a template"""
+
+    def __init__(self, name: str, tool: str, trigger: str, vocabulary: str,
+                 render: Callable[[dict], str], namespaced: bool = False):
+        self.name = name
+        self.tool = tool
+        self.trigger = re.compile(trigger)
+        self.vocabulary = frozenset(vocabulary.split())
+        self.render = render
+        self.namespaced = namespaced
+
+
+class RouteMatch:
+    def __init__(self, intent: Intent, arguments: dict, confidence: float):
+        self.intent = intent
+        self.arguments = arguments
+        self.confidence = confidence
+
+
+INTENTS = [
+    Intent("pods", "list_pods", r"\bpods?\b",
+           "pods pod running up healthy health doing look looking ready", render_pods, namespaced=True),
+    Intent("deployments", "get_deployments", r"\bdeployments?\b",
+           "deployments deployment fully available availability ready healthy health up replicas",
+           render_deployments, namespaced=True),
+    Intent("services", "get_services", r"\bservices?\b",
+           "services service exposed expose ports port endpoints running", render_services, namespaced=True),
+    Intent("aks_status", "get_aks_cluster_status", r"\b(aks|cluster)\b",
+           "aks cluster kubernetes k8s running up healthy health power version check", render_aks_status),
+    Intent("node_pools", "get_aks_node_pools", r"\b(node ?pools?|nodepools?|agent ?pools?)\b",
+           "node nodes pool pools nodepool nodepools agent aks cluster sizes size vm count", render_node_pools),
+]
+
+
+class IntentRouter:
+    """
+    Matches questions against intents and keeps hit-rate counts. The caller
+    runs the matched tool and passes its result to render(); a tool error
+    sends the question on to the model.
+    """
+
+    def __init__(self, intents: Sequence[Intent] = INTENTS, namespaces: Sequence[str] = (),
+                 enabled: bool = AGENT_ROUTER_ENABLED, min_confidence: float = AGENT_ROUTER_MIN_CONFIDENCE):
+        self.intents = list(intents)
+        self.namespaces = list(namespaces)
+        self.enabled = enabled
+        self.min_confidence = min_confidence
+        self.counts = {"questions": 0, "answered": 0, "toolErrors": 0}
+        self.by_intent: Dict[str, int] = {intent.name: 0 for intent in self.intents}
+
+    def _match(self, intent: Intent, text: str, words: List[str]) -> Optional[RouteMatch]:
+        if not intent.trigger.search(text):
+            return None
+        arguments = {}
+        if intent.namespaced:
+            named = {w for w in words if w in self.namespaces}
+            if len(named) != 1:
+                return None
+            arguments["namespace"] = named.pop()
+        known = intent.vocabulary | COMMON_WORDS | set(self.namespaces)
+        confidence = sum(1 for w in words if w in known) / len(words)
+        return RouteMatch(intent, arguments, confidence) if confidence >= self.min_confidence else None
+
+    def match(self, message: str) -> Optional[RouteMatch]:
+        """The intent that answers `message`, or None to use the model"""
+        text = message.lower()
+        words = _WORDS.findall(text)
+        if not words or _BLOCKERS.search(text):
+            return None
+        matches = [m for m in (self._match(intent, text, words) for intent in self.intents) if m]
+        return max(matches, key=lambda m: m.confidence, default=None)
+
+    def route(self, message: str) -> Optional[RouteMatch]:
+        """match(), counted towards the hit rate; None when disabled"""
+        if not self.enabled:
+            return None
+        self.counts["questions"] += 1
+        match = self.match(message)
+        if match is None:
+            AGENT_ROUTED.labels("none", "model").inc()
+        return match
+
+    def render(self, match: RouteMatch, result) -> Optional[str]:
+        """Templated answer from the tool result; None if the tool failed"""
+        if not isinstance(result, dict) or "error" in result:
+            self.counts["toolErrors"] += 1
+            AGENT_ROUTED.labels(match.intent.name, "tool_error").inc()
+            return None
+        self.counts["answered"] += 1
+        self.by_intent[match.intent.name] += 1
+        AGENT_ROUTED.labels(match.intent.name, "answered").inc()
+        return match.intent.render(result)
+
+    def stats(self) -> dict:
+        questions = self.counts["questions"]
+        return {
+            "enabled": self.enabled,
+            "minConfidence": self.min_confidence,
+            **self.counts,
+            "hitRate": round(self.counts["answered"] / questions, 3) if questions else None,
+            "byIntent": dict(self.by_intent),
+        }
@@ -0,0 +1,181 @@
+"""
+Shared Kubernetes API clients for the AKS cluster.
+
+Fetching the cluster user kubeconfig from Azure Resource Manager and loading it
+into the global kubernetes configuration on every request costs an extra ARM
+round trip and throws away the connection pool each time. KubeClientManager
+builds one ApiClient per cluster, keeps it (and its urllib3 pool) for as long as
+the kubeconfig credential is valid, and rebuilds it shortly before it expires.
+"""
+
+import base64
+import json
+import os
+import sys
+import threading
+import time
+from datetime import timezone
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import yaml
+
+# Fallback lifetime for kubeconfigs whose credential carries no expiry
+# (e.g. static tokens or exec plugins)
+KUBE_CLIENT_MAX_AGE_SECONDS = int(os.getenv("KUBE_CLIENT_MAX_AGE_SECONDS", "3600"))
+
+# Rebuild the client this long before the credential actually expires
+KUBE_CLIENT_REFRESH_SKEW_SECONDS = int(os.getenv("KUBE_CLIENT_REFRESH_SKEW_SECONDS", "300"))
+
+
+def api_status(e: BaseException) -> Optional[int]:
+    """
+    HTTP status of a kubernetes ApiException, None for any other error. Checked
+    without importing the kubernetes package, which is only loaded once a client
+    is first built (it is one of the slowest imports at startup).
+    """
+    exceptions = sys.modules.get("kubernetes.client.exceptions")
+    if exceptions is not None and isinstance(e, exceptions.ApiException):
+        return e.status
+    return None
+
+
+def _jwt_expiry(token: str) -> Optional[float]:
+    """Return the `exp` claim of a JWT bearer token, or None if it is not a JWT"""
+    parts = token.split(".")
+    if len(parts) != 3:
+        return None
+    try:
+        payload = parts[1] + "=" * (-len(parts[1]) % 4)
+        claims = json.loads(base64.urlsafe_b64decode(payload))
+        return float(claims["exp"])
+    except (ValueError, KeyError, TypeError):
+        return None
+
+
+def _certificate_expiry(cert_data: str) -> Optional[float]:
+    """Return the notAfter time of a base64-encoded PEM client certificate"""
+    try:
+        from cryptography import x509
+        cert = x509.load_pem_x509_certificate(base64.b64decode(cert_data))
+    except Exception:
+        return None
+    not_after = getattr(cert, "not_valid_after_utc", None) or cert.not_valid_after.replace(tzinfo=timezone.utc)
+    return not_after.timestamp()
+
+
+def credential_expiry(kubeconfig: dict) -> Optional[float]:
+    """Earliest expiry (epoch seconds) of the credentials in the current kubeconfig context"""
+    current = kubeconfig.get("current-context")
+    contexts = {c["name"]: c.get("context", {}) for c in kubeconfig.get("contexts") or []}
+    user_name = contexts.get(current, {}).get("user")
+    users = {u["name"]: u.get("user") or {} for u in kubeconfig.get("users") or []}
+    user = users.get(user_name) or next(iter(users.values()), {})
+
+    expiries = []
+    if user.get("token"):
+        expiries.append(_jwt_expiry(user["token"]))
+    if user.get("client-certificate-data"):
+        expiries.append(_certificate_expiry(user["client-certificate-data"]))
+    expiries = [e for e in expiries if e is not None]
+    return min(expiries) if expiries else None
+
+
+class KubeClientManager:
+    """
+    Process-wide cache of kubernetes ApiClients, one per (resource group, cluster).
+
+    `load_kubeconfig(resource_group, cluster_name)` must return the raw kubeconfig
+    bytes, normally from `managed_clusters.list_cluster_user_credentials`. It is
+    only called when no client exists yet or the cached one is about to expire.
+    Safe to call from many threads; concurrent callers for the same cluster
+    wait for a single refresh instead of each fetching credentials.
+    """
+
+    def __init__(
+        self,
+        load_kubeconfig: Callable[[str, str], bytes],
+        max_age: int = KUBE_CLIENT_MAX_AGE_SECONDS,
+        refresh_skew: int = KUBE_CLIENT_REFRESH_SKEW_SECONDS,
+    ):
+        self._load_kubeconfig = load_kubeconfig
+        self._max_age = max_age
+        self._refresh_skew = refresh_skew
+        self._clients: Dict[Tuple[str, str], Tuple[Any, float]] = {}
+        self._locks: Dict[Tuple[str, str], threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+
+    def _lock_for(self, key: Tuple[str, str]) -> threading.Lock:
+        with self._locks_guard:
+            return self._locks.setdefault(key, threading.Lock())
+
+    @staticmethod
+    def _close(entry: Optional[Tuple[Any, float]]):
+        """
+        Release a replaced client's connections. ApiClient.close() only stops its
+        async_req threadpool, and urllib3 2's PoolManager.clear() only forgets its
+        host pools, so each pool is closed here: idle connections close now, and
+        connections held by in-flight requests, watches or log streams close when
+        those finish and return them to the closed pool.
+        """
+        if entry is None:
+            return
+        api_client = entry[0]
+        try:
+            pool_manager = api_client.rest_client.pool_manager
+            pools = [pool_manager.pools[key] for key in pool_manager.pools.keys()]
+            pool_manager.clear()
+            for pool in pools:
+                pool.close()
+            api_client.close()
+        except Exception:
+            pass
+
+    def _is_fresh(self, entry: Optional[Tuple[Any, float]]) -> bool:
+        return entry is not None and time.time() < entry[1] - self._refresh_skew
+
+    def _build(self, resource_group: str, cluster_name: str) -> Tuple[Any, float]:
+        raw = self._load_kubeconfig(resource_group, cluster_name)
+        if isinstance(raw, (bytes, bytearray)):  # the SDK returns a bytearray
+            raw = raw.decode("utf-8")
+        kubeconfig = yaml.safe_load(raw)
+
+        from kubernetes import config
+        api_client = config.new_client_from_config_dict(kubeconfig, persist_config=False)
+        max_expiry = time.time() + self._max_age
+        expiry = credential_expiry(kubeconfig)
+        return api_client, min(expiry, max_expiry) if expiry else max_expiry
+
+    def get_api_client(self, resource_group: str, cluster_name: str):
+        """Return a cached ApiClient for the cluster, rebuilding it if near expiry"""
+        key = (resource_group, cluster_name)
+        entry = self._clients.get(key)
+        if self._is_fresh(entry):
+            return entry[0]
+
+        with self._lock_for(key):
+            # Another thread may have refreshed while we waited for the lock
+            entry = self._clients.get(key)
+            if self._is_fresh(entry):
+                return entry[0]
+            old, entry = entry, self._build(resource_group, cluster_name)
+            self._clients[key] = entry
+            self._close(old)
+            return entry[0]
+
+    def core_v1(self, resource_group: str, cluster_name: str):
+        from kubernetes import client
+        return client.CoreV1Api(self.get_api_client(resource_group, cluster_name))
+
+    def apps_v1(self, resource_group: str, cluster_name: str):
+        from kubernetes import client
+        return client.AppsV1Api(self.get_api_client(resource_group, cluster_name))
+
+    def invalidate(self, resource_group: Optional[str] = None, cluster_name: Optional[str] = None):
+        """Drop cached clients (all of them, or one cluster) so the next call refetches credentials"""
+        if resource_group is None:
+            dropped = list(self._clients.values())
+            self._clients.clear()
+        else:
+            dropped = [self._clients.pop((resource_group, cluster_name), None)]
+        for entry in dropped:
+            self._close(entry)
@@ -0,0 +1,60 @@
+"""
+Lazily constructed module-level objects.
+
+App Service restarts the container on deploys, scale-out and idle recycling,
+and every request queued behind a restart waits for `import main`. Most of that
+time used to go into importing the Azure management SDKs, the kubernetes client
+and openai/httpx just to build clients at module level, before /health could
+answer. LazyObject defers both the import and the construction to the first
+attribute access, so the clients are still plain module globals (and can still
+be patched as such in tests) but are built by the first request that needs them.
+"""
+
+import threading
+from typing import Any, Callable
+
+_UNSET = object()
+
+
+class LazyObject:
+    """Proxy that calls `factory()` once, on first use, and delegates to the result"""
+
+    def __init__(self, factory: Callable[[], Any]):
+        object.__setattr__(self, "_factory", factory)
+        object.__setattr__(self, "_value", _UNSET)
+        object.__setattr__(self, "_lock", threading.Lock())
+
+    def _resolve(self) -> Any:
+        value = self._value
+        if value is _UNSET:
+            # Clients are first touched from executor threads; build exactly one
+            with self._lock:
+                value = self._value
+                if value is _UNSET:
+                    value = self._factory()
+                    object.__setattr__(self, "_value", value)
+        return value
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._resolve(), name)
+
+    def __setattr__(self, name: str, value: Any):
+        setattr(self._resolve(), name, value)
+
+    def __bool__(self) -> bool:
+        return bool(self._resolve())
+
+    def __repr__(self) -> str:
+        if self._value is _UNSET:
+            return f"<LazyObject {getattr(self._factory, '__name__', 'factory')} (not loaded)>"
+        return repr(self._value)
+
+
+def load(obj: Any) -> Any:
+    """The underlying object, constructing it now if `obj` is a LazyObject"""
+    return obj._resolve() if isinstance(obj, LazyObject) else obj
+
+
+def is_loaded(obj: Any) -> bool:
+    """False only for a LazyObject whose factory has not run yet"""
+    return not isinstance(obj, LazyObject) or obj._value is not _UNSET
@@ -0,0 +1,143 @@
+"""
+Async OpenAI client for the agent.
+
+The synchronous client blocked the event loop for the full model latency. This
+module builds one AsyncOpenAI client on a shared, tuned httpx connection pool
+with explicit connect/read timeouts, and wraps `chat.completions.create` with
+retries that honor `Retry-After` and stay within a per-request RetryBudget.
+
+OPENAI_API_KEY, OPENAI_BASE_URL and OPENAI_MODEL are configurable so the agent
+can point at a local OpenAI-compatible stand-in.
+"""
+
+import asyncio
+import email.utils
+import os
+import random
+import sys
+import time
+from typing import Optional, Tuple
+
+from metrics import track_upstream
+
+OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", "")
+OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL") or None
+OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
+# Ask for token usage on streamed completions (stream_options.include_usage)
+OPENAI_STREAM_USAGE = os.getenv("OPENAI_STREAM_USAGE", "true").lower() == "true"
+
+OPENAI_CONNECT_TIMEOUT = float(os.getenv("OPENAI_CONNECT_TIMEOUT_SECONDS", "5"))
+OPENAI_READ_TIMEOUT = float(os.getenv("OPENAI_READ_TIMEOUT_SECONDS", "60"))
+OPENAI_MAX_CONNECTIONS = int(os.getenv("OPENAI_MAX_CONNECTIONS", "100"))
+OPENAI_MAX_KEEPALIVE = int(os.getenv("OPENAI_MAX_KEEPALIVE_CONNECTIONS", "20"))
+
+# Retry budget per agent request (shared by all model calls in that request)
+OPENAI_MAX_RETRIES = int(os.getenv("OPENAI_MAX_RETRIES", "3"))
+OPENAI_RETRY_BUDGET_SECONDS = float(os.getenv("OPENAI_RETRY_BUDGET_SECONDS", "20"))
+OPENAI_BACKOFF_BASE_SECONDS = 0.5
+
+
+def create_openai_client():
+    """Build the shared async client, or None when no API key is configured"""
+    if not OPENAI_API_KEY:
+        return None
+    # openai and httpx are imported on first use to keep them out of startup
+    import httpx
+    from openai import AsyncOpenAI
+
+    timeout = httpx.Timeout(OPENAI_READ_TIMEOUT, connect=OPENAI_CONNECT_TIMEOUT)
+    http_client = httpx.AsyncClient(
+        timeout=timeout,
+        limits=httpx.Limits(
+            max_connections=OPENAI_MAX_CONNECTIONS,
+            max_keepalive_connections=OPENAI_MAX_KEEPALIVE,
+            keepalive_expiry=30,
+        ),
+    )
+    # Retries are handled by create_chat_completion so they count against the request budget
+    return AsyncOpenAI(
+        api_key=OPENAI_API_KEY,
+        base_url=OPENAI_BASE_URL,
+        timeout=timeout,
+        max_retries=0,
+        http_client=http_client,
+    )
+
+
+class RetryBudget:
+    """Bounds the retries (count and total wait) spent on one agent request"""
+
+    def __init__(self, max_retries: int = OPENAI_MAX_RETRIES, max_wait_seconds: float = OPENAI_RETRY_BUDGET_SECONDS):
+        self.retries_left = max_retries
+        self.deadline = time.monotonic() + max_wait_seconds
+
+    def allow(self, delay: float) -> bool:
+        return self.retries_left > 0 and time.monotonic() + delay <= self.deadline
+
+    def spend(self):
+        self.retries_left -= 1
+
+
+def retry_after_seconds(response) -> Optional[float]:
+    """Parse `retry-after-ms` / `Retry-After` (seconds or HTTP date) from a response"""
+    if response is None:
+        return None
+    headers = response.headers
+    if headers.get("retry-after-ms"):
+        try:
+            return float(headers["retry-after-ms"]) / 1000
+        except ValueError:
+            pass
+    value = headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        parsed = email.utils.parsedate_to_datetime(value)
+        return max(parsed.timestamp() - time.time(), 0.0) if parsed else None
+
+
+def usage_tokens(usage) -> Optional[Tuple[int, int]]:
+    """(prompt_tokens, completion_tokens) from a response's usage (model object or raw dict)"""
+    if not usage:
+        return None
+    get = usage.get if isinstance(usage, dict) else lambda name: getattr(usage, name, None)
+    prompt, completion = get("prompt_tokens"), get("completion_tokens")
+    if not isinstance(prompt, int) or not isinstance(completion, int):
+        return None
+    return prompt, completion
+
+
+def _is_retryable(e: Exception) -> bool:
+    if "openai" not in sys.modules:
+        return False
+    from openai import APIConnectionError, APIStatusError, InternalServerError, RateLimitError
+    return isinstance(e, (RateLimitError, APIConnectionError, InternalServerError)) or (
+        isinstance(e, APIStatusError) and e.status_code in (408, 409)
+    )
+
+
+async def create_chat_completion(client, budget: Optional[RetryBudget] = None, **params):
+    """
+    `client.chat.completions.create(**params)` with jittered exponential backoff.
+    A server-provided Retry-After takes precedence over the computed delay.
+    Gives up (re-raising the last error) once the budget cannot cover the wait.
+    """
+    budget = budget or RetryBudget()
+    attempt = 0
+    while True:
+        try:
+            with track_upstream("openai", "chat.completions.create"):
+                return await client.chat.completions.create(**params)
+        except Exception as e:
+            if not _is_retryable(e):
+                raise
+            delay = retry_after_seconds(getattr(e, "response", None))
+            if delay is None:
+                delay = OPENAI_BACKOFF_BASE_SECONDS * (2 ** attempt) * random.uniform(0.5, 1.5)
+            if not budget.allow(delay):
+                raise
+            budget.spend()
+            attempt += 1
+            await asyncio.sleep(delay)
@@ -0,0 +1,222 @@
+"""
+Follow-mode pod log streaming.
+
+The log endpoint used to download the last 50 lines on every refresh. Here one
+`read_namespaced_pod_log(follow=True, _preload_content=False)` response is kept
+open and its lines are pumped by a worker thread into a bounded asyncio queue
+that the HTTP response drains:
+
+- Backpressure: when the client reads slowly the queue fills, the pump thread
+  blocks and stops reading from the API server socket.
+- Disconnects: when the client goes away (or the stream is closed for any
+  other reason) the upstream response is closed, which unblocks and ends the
+  pump thread.
+
+For logs across the replicas of a deployment, each pod's log is fetched with
+`timestamps=True` and the per-pod line lists are k-way merged by timestamp
+(`merge_pod_logs`), applying the line filters before anything is serialized.
+"""
+
+import asyncio
+import concurrent.futures
+import heapq
+import json
+import os
+import re
+import threading
+from typing import AsyncIterator, Callable, Dict, Iterator, List, Optional, Tuple
+
+from executor import POOL_SIZES, run_blocking
+
+LOG_STREAM_QUEUE_LINES = int(os.getenv("LOG_STREAM_QUEUE_LINES", "1000"))
+LOG_STREAM_HEARTBEAT_SECONDS = float(os.getenv("LOG_STREAM_HEARTBEAT_SECONDS", "15"))
+
+# Follow streams are long-lived, so they get their own thread pool; its size
+# (LOG_STREAM_MAX_STREAMS) caps the number of concurrently open streams
+LOG_STREAM_POOL = "kube_logs"
+LOG_STREAM_MAX_STREAMS = POOL_SIZES[LOG_STREAM_POOL]
+
+_EOF = object()
+
+
+def compile_line_filter(pattern: Optional[str]) -> Callable[[str], bool]:
+    """Predicate for the `filter` query parameter (regex search); raises ValueError if invalid"""
+    if not pattern:
+        return lambda line: True
+    try:
+        regex = re.compile(pattern)
+    except re.error as e:
+        raise ValueError(f"Invalid filter pattern: {e}")
+    return lambda line: regex.search(line) is not None
+
+
+def compile_field_filter(expression: Optional[str]) -> Callable[[str], bool]:
+    """
+    Predicate for `field=value` filters (comma-separated, all must match, case-insensitive).
+    JSON log lines are matched on their fields; other lines on logfmt `field=value` tokens.
+    """
+    if not expression:
+        return lambda line: True
+    conditions = []
+    for part in expression.split(","):
+        field, sep, value = part.partition("=")
+        if not sep or not field.strip():
+            raise ValueError(f"Invalid field filter: {part!r} (expected field=value)")
+        field, value = field.strip(), value.strip()
+        token = re.compile(rf"(?:^|\s){re.escape(field)}=\"?{re.escape(value)}\"?(?:\s|$)", re.IGNORECASE)
+        conditions.append((field, value.lower(), token))
+
+    def matches(line: str) -> bool:
+        record = None
+        if line.startswith("{"):
+            try:
+                record = json.loads(line)
+            except ValueError:
+                pass
+        for field, value, token in conditions:
+            if isinstance(record, dict):
+                if str(record.get(field, "")).lower() != value:
+                    return False
+            elif not token.search(line):
+                return False
+        return True
+
+    return matches
+
+
+def split_timestamp(line: str) -> Tuple[Optional[str], str]:
+    """Split the RFC3339 prefix added by `timestamps=True`; (None, line) if there is none"""
+    ts, sep, rest = line.partition(" ")
+    if sep and len(ts) >= 20 and ts[4] == "-" and ts[10] == "T":
+        return ts, rest
+    return None, line
+
+
+def _sort_key(ts: str) -> str:
+    """Sortable form of an RFC3339Nano UTC timestamp (fraction padded to 9 digits)"""
+    base, _, frac = ts.rstrip("Z").partition(".")
+    return f"{base}.{frac.ljust(9, '0')}"
+
+
+def _timestamped_lines(pod: str, text: str) -> Iterator[Tuple[str, str, Optional[str], str]]:
+    """(sort key, pod, timestamp, line) per line; untimestamped lines inherit the previous key"""
+    key = ""
+    for raw in text.splitlines():
+        ts, line = split_timestamp(raw)
+        if ts is not None:
+            key = _sort_key(ts)
+        yield key, pod, ts, line
+
+
+def merge_pod_logs(logs: Dict[str, str], line_filter: Callable[[str], bool] = lambda line: True
+                   ) -> Iterator[Tuple[str, Optional[str], str]]:
+    """
+    Lazily k-way merge per-pod logs (each already in time order) by timestamp.
+    Yields (pod, timestamp, line) for lines passing `line_filter`.
+    """
+    merged = heapq.merge(*(_timestamped_lines(pod, text) for pod, text in sorted(logs.items())))
+    for _, pod, ts, line in merged:
+        if line_filter(line):
+            yield pod, ts, line
+
+
+def parse_label_selector(selector: str) -> List[Tuple[str, str, str]]:
+    """Equality-based selector `a=b,c!=d` as (key, op, value) tuples; raises ValueError otherwise"""
+    requirements = []
+    for part in filter(None, (p.strip() for p in selector.split(","))):
+        match = re.fullmatch(r"([\w./-]+)\s*(==|=|!=)\s*([\w.-]*)", part)
+        if not match:
+            raise ValueError(f"Unsupported label selector: {part!r}")
+        key, op, value = match.groups()
+        requirements.append((key, "!=" if op == "!=" else "=", value))
+    if not requirements:
+        raise ValueError("Empty label selector")
+    return requirements
+
+
+def labels_match(labels: Optional[dict], requirements: List[Tuple[str, str, str]]) -> bool:
+    labels = labels or {}
+    return all((labels.get(k) == v) == (op == "=") for k, op, v in requirements)
+
+
+def _pump(response, line_filter: Callable[[str], bool], queue: asyncio.Queue,
+          loop: asyncio.AbstractEventLoop, stop: threading.Event):
+    """Worker thread: read lines from the upstream response into the queue"""
+    def put(item) -> bool:
+        future = asyncio.run_coroutine_threadsafe(queue.put(item), loop)
+        while True:
+            try:
+                future.result(timeout=1)
+                return True
+            except concurrent.futures.TimeoutError:
+                # Queue full (slow client): keep waiting unless the stream was closed
+                if stop.is_set():
+                    future.cancel()
+                    return False
+
+    try:
+        for raw in response:
+            if stop.is_set():
+                return
+            line = raw.decode("utf-8", errors="replace").rstrip("\r\n")
+            if line_filter(line) and not put(("line", line)):
+                return
+        put(("end", None))
+    except Exception as e:
+        if not stop.is_set():
+            put(("error", str(e)))
+    finally:
+        if not stop.is_set():
+            put(_EOF)
+
+
+async def follow_lines(response, line_filter: Callable[[str], bool] = lambda line: True,
+                       is_disconnected: Optional[Callable] = None,
+                       heartbeat: float = LOG_STREAM_HEARTBEAT_SECONDS,
+                       queue_size: int = LOG_STREAM_QUEUE_LINES) -> AsyncIterator[Tuple[str, Optional[str]]]:
+    """
+    Yield ("line", text), ("heartbeat", None) when idle for `heartbeat` seconds,
+    and finally ("end", None) or ("error", detail). Closes `response` when done.
+    """
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+    stop = threading.Event()
+    pump = asyncio.ensure_future(run_blocking(LOG_STREAM_POOL, _pump, response, line_filter, queue, loop, stop))
+    try:
+        while True:
+            try:
+                item = await asyncio.wait_for(queue.get(), heartbeat)
+            except asyncio.TimeoutError:
+                if is_disconnected is not None and await is_disconnected():
+                    return
+                yield "heartbeat", None
+                continue
+            if item is _EOF:
+                return
+            yield item
+    finally:
+        stop.set()
+        # Closing the upstream socket unblocks a pump thread waiting for the next line
+        response.close()
+        pump.cancel()
+
+
+def format_ndjson(kind: str, payload: Optional[str], meta: dict) -> str:
+    if kind == "line":
+        return json.dumps({"type": "line", "line": payload, **meta}) + "\n"
+    if kind == "error":
+        return json.dumps({"type": "error", "detail": payload, **meta}) + "\n"
+    return json.dumps({"type": kind, **meta}) + "\n"
+
+
+def format_sse(kind: str, payload: Optional[str], meta: dict) -> str:
+    if kind == "heartbeat":
+        return ": keepalive\n\n"
+    data = {"line": payload} if kind == "line" else {"detail": payload} if kind == "error" else {}
+    return f"event: {kind}\ndata: {json.dumps({**data, **meta})}\n\n"
+
+
+STREAM_FORMATS = {
+    "ndjson": (format_ndjson, "application/x-ndjson"),
+    "sse": (format_sse, "text/event-stream"),
+}
@@ -7,25 +7,44 @@ Uses the read-only service principal to ensure no write operations are possible.
 
 from fastapi import FastAPI, HTTPException, Depends, Header, Request
 from fastapi.middleware.cors import CORSMiddleware
-from azure.identity import ClientSecretCredential
-from azure.mgmt.resource import ResourceManagementClient
-from azure.mgmt.containerservice import ContainerServiceClient
-from azure.mgmt.web import WebSiteManagementClient
-from azure.mgmt.storage import StorageManagementClient
-from kubernetes import client, config
+from fastapi.responses import Response, StreamingResponse
+from starlette.background import BackgroundTask
 from typing import Optional, List
 from pydantic import BaseModel
 import os
+import importlib
 import json
-import yaml
-import base64
+import logging
+import math
+import time
+import asyncio
 from datetime import datetime
 from dotenv import load_dotenv
-from openai import OpenAI
+from kube_client import KubeClientManager, api_status
+from lazy import LazyObject, is_loaded, load
+from executor import drain, run_blocking, shutdown_pools
+from cache import TTLCache, ttl_from_env
+from shared_cache import shared_store
+from etag import ETags
+from informers import InformerManager, INFORMERS_ENABLED
+from tools import ToolRegistry
+from prefetch import PrefetchCandidate, Prefetcher, PrefetchTurn
+from intents import IntentRouter
+from tool_selection import ToolGroup, ToolSelector
+from sessions import SessionStore
+from agent_context import compact_tool_result, count_tokens, fit_to_budget
+from logstream import (
+    compile_field_filter, compile_line_filter, follow_lines, labels_match, merge_pod_logs,
+    parse_label_selector, LOG_STREAM_MAX_STREAMS, STREAM_FORMATS
+)
+from metrics import AGENT_ITERATIONS, AGENT_TOOL_CALLS, MetricsMiddleware, StatsCollector, register_stats_collector, render_latest
+from llm import create_openai_client, create_chat_completion, usage_tokens, RetryBudget, OPENAI_MODEL, OPENAI_STREAM_USAGE
 
 # Load environment variables
 load_dotenv('.env.production')
 
+logger = logging.getLogger(__name__)
+
 app = FastAPI(title="Azure API Backend", version="1.0.0")
 
 # CORS Configuration
@@ -37,24 +56,128 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Prometheus request metrics (per route template)
+app.add_middleware(MetricsMiddleware)
+
 # Azure Configuration
 SUBSCRIPTION_ID = os.getenv("AZURE_SUBSCRIPTION_ID", "3306e559-a033-43dd-bf98-fc59174d563f")
 RESOURCE_GROUP = "hsps-demo-rg"
 AKS_CLUSTER_NAME = "hsps-aks-cluster"
 BEARER_TOKEN = os.getenv("VITE_BEARER_TOKEN", "your-secret-token-123")
 
-# Initialize Azure credentials
-credential = ClientSecretCredential(
-    tenant_id=os.getenv("VITE_AZURE_TENANT_ID"),
-    client_id=os.getenv("VITE_AZURE_CLIENT_ID"),
-    client_secret=os.getenv("VITE_AZURE_CLIENT_SECRET")
+# Azure credentials and clients are built on first use (see lazy.py): importing the
+# SDKs dominated cold start, and /health does not need them. ARM calls are paced by a
+# token bucket and retried with jittered backoff honoring Retry-After (arm_throttle.py).
+def create_credential():
+    from azure.identity import ClientSecretCredential
+    return ClientSecretCredential(
+        tenant_id=os.getenv("VITE_AZURE_TENANT_ID"),
+        client_id=os.getenv("VITE_AZURE_CLIENT_ID"),
+        client_secret=os.getenv("VITE_AZURE_CLIENT_SECRET")
+    )
+
+def create_resource_client():
+    from arm_throttle import arm_client_kwargs
+    from azure.mgmt.resource import ResourceManagementClient
+    return ResourceManagementClient(credential, SUBSCRIPTION_ID, **arm_client_kwargs())
+
+def create_aks_client():
+    from arm_throttle import arm_client_kwargs
+    from azure.mgmt.containerservice import ContainerServiceClient
+    return ContainerServiceClient(credential, SUBSCRIPTION_ID, **arm_client_kwargs())
+
+def create_web_client():
+    from arm_throttle import arm_client_kwargs
+    from azure.mgmt.web import WebSiteManagementClient
+    return WebSiteManagementClient(credential, SUBSCRIPTION_ID, **arm_client_kwargs())
+
+def create_storage_client():
+    from arm_throttle import arm_client_kwargs
+    from azure.mgmt.storage import StorageManagementClient
+    return StorageManagementClient(credential, SUBSCRIPTION_ID, **arm_client_kwargs())
+
+credential = LazyObject(create_credential)
+resource_client = LazyObject(create_resource_client)
+aks_client = LazyObject(create_aks_client)
+web_client = LazyObject(create_web_client)
+storage_client = LazyObject(create_storage_client)
+
+# Shared Kubernetes clients (kubeconfig fetched once and refreshed near expiry)
+kube_clients = KubeClientManager(
+    lambda rg, name: aks_client.managed_clusters.list_cluster_user_credentials(rg, name).kubeconfigs[0].value
 )
 
-# Initialize Azure clients
-resource_client = ResourceManagementClient(credential, SUBSCRIPTION_ID)
-aks_client = ContainerServiceClient(credential, SUBSCRIPTION_ID)
-web_client = WebSiteManagementClient(credential, SUBSCRIPTION_ID)
-storage_client = StorageManagementClient(credential, SUBSCRIPTION_ID)
+def check_kube_auth(e: Exception):
+    """Drop the cached kube client if the API server rejected its credentials"""
+    if api_status(e) == 401:
+        kube_clients.invalidate(RESOURCE_GROUP, AKS_CLUSTER_NAME)
+
+def upstream_http_exception(e: Exception) -> HTTPException:
+    """HTTP error for a failed upstream call: 429 with Retry-After when ARM throttled us, else 500"""
+    if getattr(e, "status_code", None) == 429:
+        retry_after = getattr(e, "retry_after", None)
+        response = getattr(e, "response", None)
+        if retry_after is None and response is not None:
+            retry_after = response.headers.get("Retry-After")
+        if isinstance(retry_after, (int, float)):
+            retry_after = str(math.ceil(retry_after))
+        return HTTPException(status_code=429, detail=str(e), headers={"Retry-After": retry_after} if retry_after else None)
+    return HTTPException(status_code=500, detail=str(e))
+
+async def get_core_v1():
+    # May fetch cluster credentials from ARM when the cached client is missing or expiring
+    return await run_blocking("arm", kube_clients.core_v1, RESOURCE_GROUP, AKS_CLUSTER_NAME)
+
+# Informer cache (LIST + WATCH) for pods, deployments and services in the watched namespaces
+informers = InformerManager({
+    "pods": lambda: kube_clients.core_v1(RESOURCE_GROUP, AKS_CLUSTER_NAME).list_namespaced_pod,
+    "deployments": lambda: kube_clients.apps_v1(RESOURCE_GROUP, AKS_CLUSTER_NAME).list_namespaced_deployment,
+    "services": lambda: kube_clients.core_v1(RESOURCE_GROUP, AKS_CLUSTER_NAME).list_namespaced_service,
+}, on_unauthorized=lambda: kube_clients.invalidate(RESOURCE_GROUP, AKS_CLUSTER_NAME))
+
+async def list_kube_objects(kind: str, namespace: str) -> list:
+    """Objects of a kind in a namespace: from the informer store when synced, else a direct LIST"""
+    store = informers.store(kind, namespace)
+    if store is not None:
+        return store.list()
+    list_fn = await run_blocking("arm", informers.listers[kind])
+    return (await run_blocking("kubernetes", list_fn, namespace)).items
+
+async def derive_from_kube_objects(kind: str, namespace: str, build):
+    """build(namespace, objects); from a synced informer store it is reused until the store changes"""
+    store = informers.store(kind, namespace)
+    if store is not None:
+        return store.derive(build, namespace)
+    return build(namespace, await list_kube_objects(kind, namespace))
+
+async def read_pod(namespace: str, pod_name: str):
+    store = informers.store("pods", namespace)
+    pod = store.get(namespace, pod_name) if store is not None else None
+    if pod is None:
+        v1 = await get_core_v1()
+        pod = await run_blocking("kubernetes", v1.read_namespaced_pod, pod_name, namespace)
+    return pod
+
+# Cache for ARM read endpoints (per-endpoint TTL, overridable via CACHE_TTL_<NAME>),
+# shared across gunicorn workers when SHARED_CACHE_PATH is set
+arm_cache = TTLCache(shared=shared_store("arm"))
+CACHE_TTLS = {
+    "aks_status": ttl_from_env("aks_status", 30),
+    "resource_group": ttl_from_env("resource_group", 300),
+    "resources": ttl_from_env("resources", 120),
+    "app_service": ttl_from_env("app_service", 60),
+    "function_app": ttl_from_env("function_app", 60),
+    "storage_account": ttl_from_env("storage_account", 300),
+    "node_pools": ttl_from_env("node_pools", 60),
+    "subscription": ttl_from_env("subscription", 3600),
+}
+
+# ETag / 304 Not Modified for the polled /api/azure GET endpoints
+etags = ETags()
+
+# Agent tools: name -> shared fetch function plus deadline, in-flight limit and cache TTL
+# (tool results are shared across workers like arm_cache)
+tool_registry = ToolRegistry(cache=TTLCache(stale_seconds=0, shared=shared_store("tools")), on_error=check_kube_auth)
 
 # Bearer token authentication
 async def verify_token(authorization: Optional[str] = Header(None)):
@@ -85,311 +208,402 @@ def calculate_age(timestamp_str: str) -> str:
     days = hours / 24
     return f"{int(days)}d"
 
+# Build the lazily created clients in the background once the server is up, so the
+# first API request does not pay for the SDK imports either
+CLIENT_WARMUP_ENABLED = os.getenv("CLIENT_WARMUP_ENABLED", "true").lower() == "true"
+
+def warm_clients():
+    warmups = {
+        "resource_client": lambda: load(resource_client),
+        "aks_client": lambda: load(aks_client),
+        "web_client": lambda: load(web_client),
+        "storage_client": lambda: load(storage_client),
+        "openai_client": lambda: load(openai_client),
+        "kubernetes": lambda: importlib.import_module("kubernetes.client"),
+    }
+    for name, warm in warmups.items():
+        try:
+            warm()
+        except Exception as e:
+            # e.g. credentials not configured; the first request that needs the client reports it
+            logger.warning("Warming %s failed: %s", name, e)
+
+@app.on_event("startup")
+async def start_informers():
+    if INFORMERS_ENABLED:
+        informers.start()
+    if CLIENT_WARMUP_ENABLED:
+        # Not awaited: /health answers while the clients are being built
+        app.state.client_warmup = asyncio.ensure_future(run_blocking("arm", warm_clients))
+
+@app.on_event("shutdown")
+async def shutdown_executors():
+    informers.stop()
+    shutdown_pools()
+    if is_loaded(openai_client) and openai_client:
+        await openai_client.close()
+
 # Health check endpoint (no auth required)
 @app.get("/health")
 async def health_check():
     return {"status": "healthy", "timestamp": datetime.utcnow().isoformat()}
 
+# Prometheus metrics (no auth required, like /health)
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    body, content_type = render_latest()
+    return Response(content=body, media_type=content_type)
+
+# Each data fetch below is shared by its REST endpoint and the agent tool of the same
+# data (registered with tool_registry along with the tool's deadline, in-flight limit
+# and cache TTL). Fetch functions raise on failure; the callers decide how to report it.
+
 # 1. Get AKS Cluster Status
+@tool_registry.tool("get_aks_cluster_status", cache_ttl=30)
+async def fetch_aks_status():
+    cluster = await run_blocking("arm", aks_client.managed_clusters.get, RESOURCE_GROUP, AKS_CLUSTER_NAME)
+    return {
+        "name": cluster.name,
+        "location": cluster.location,
+        "powerState": cluster.power_state.code if cluster.power_state else "Unknown",
+        "provisioningState": cluster.provisioning_state,
+        "kubernetesVersion": cluster.kubernetes_version,
+        "nodeResourceGroup": cluster.node_resource_group,
+        "fqdn": cluster.fqdn,
+        "agentPoolProfiles": [
+            {
+                "name": pool.name,
+                "count": pool.count,
+                "vmSize": pool.vm_size,
+                "osType": pool.os_type
+            }
+            for pool in (cluster.agent_pool_profiles or [])
+        ]
+    }
+
 @app.get("/api/azure/aks/status", dependencies=[Depends(verify_token)])
+@etags.conditional
+@arm_cache.cached("aks_status", CACHE_TTLS["aks_status"])
 async def get_aks_status():
     try:
-        cluster = aks_client.managed_clusters.get(RESOURCE_GROUP, AKS_CLUSTER_NAME)
-        return {
-            "name": cluster.name,
-            "location": cluster.location,
-            "powerState": cluster.power_state.code if cluster.power_state else "Unknown",
-            "provisioningState": cluster.provisioning_state,
-            "kubernetesVersion": cluster.kubernetes_version,
-            "nodeResourceGroup": cluster.node_resource_group,
-            "fqdn": cluster.fqdn,
-            "agentPoolProfiles": [
-                {
-                    "name": pool.name,
-                    "count": pool.count,
-                    "vmSize": pool.vm_size,
-                    "osType": pool.os_type
-                }
-                for pool in (cluster.agent_pool_profiles or [])
-            ]
-        }
+        return await fetch_aks_status()
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise upstream_http_exception(e)
 
 # 2 & 3. List Pods in Namespace
+@tool_registry.tool("list_pods", cache_ttl=10, defaults={"namespace": "hsps"})
+async def fetch_pods(namespace: str):
+    pods = []
+    for pod in await list_kube_objects("pods", namespace):
+        ready = all(c.ready for c in (pod.status.container_statuses or []))
+        restarts = sum(c.restart_count for c in (pod.status.container_statuses or []))
+
+        pods.append({
+            "name": pod.metadata.name,
+            "status": pod.status.phase,
+            "ready": ready,
+            "restarts": restarts,
+            "age": calculate_age(pod.metadata.creation_timestamp.isoformat()),
+            "ip": pod.status.pod_ip
+        })
+
+    return {"namespace": namespace, "pods": pods, "count": len(pods)}
+
 @app.get("/api/azure/pods/{namespace}", dependencies=[Depends(verify_token)])
+@etags.conditional
 async def list_pods(namespace: str):
     try:
-        # Get AKS credentials
-        credentials = aks_client.managed_clusters.list_cluster_user_credentials(
-            RESOURCE_GROUP, AKS_CLUSTER_NAME
-        )
-        
-        # Load kubeconfig
-        kubeconfig_data = credentials.kubeconfigs[0].value.decode('utf-8')
-        config.load_kube_config_from_dict(yaml.safe_load(kubeconfig_data))
-        
-        # List pods
-        v1 = client.CoreV1Api()
-        pods_list = v1.list_namespaced_pod(namespace)
-        
-        pods = []
-        for pod in pods_list.items:
-            ready = all(c.ready for c in (pod.status.container_statuses or []))
-            restarts = sum(c.restart_count for c in (pod.status.container_statuses or []))
-            
-            pods.append({
-                "name": pod.metadata.name,
-                "status": pod.status.phase,
-                "ready": ready,
-                "restarts": restarts,
-                "age": calculate_age(pod.metadata.creation_timestamp.isoformat()),
-                "ip": pod.status.pod_ip
-            })
-        
-        return {"namespace": namespace, "pods": pods, "count": len(pods)}
+        return await fetch_pods(namespace)
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        check_kube_auth(e)
+        raise upstream_http_exception(e)
 
 # 4. Get Pod Details
+@tool_registry.tool("get_pod_details", cache_ttl=10, defaults={"namespace": "hsps"})
+async def fetch_pod_details(namespace: str, pod_name: str):
+    pod = await read_pod(namespace, pod_name)
+
+    return {
+        "name": pod.metadata.name,
+        "namespace": pod.metadata.namespace,
+        "status": pod.status.phase,
+        "ip": pod.status.pod_ip,
+        "node": pod.spec.node_name,
+        "creationTimestamp": pod.metadata.creation_timestamp.isoformat(),
+        "labels": pod.metadata.labels,
+        "containers": [
+            {
+                "name": c.name,
+                "image": c.image,
+                "ports": [{"containerPort": p.container_port, "protocol": p.protocol} for p in (c.ports or [])]
+            }
+            for c in pod.spec.containers
+        ],
+        "conditions": [
+            {"type": c.type, "status": c.status}
+            for c in (pod.status.conditions or [])
+        ]
+    }
+
 @app.get("/api/azure/pods/{namespace}/{pod_name}", dependencies=[Depends(verify_token)])
+@etags.conditional
 async def get_pod_details(namespace: str, pod_name: str):
     try:
-        credentials = aks_client.managed_clusters.list_cluster_user_credentials(
-            RESOURCE_GROUP, AKS_CLUSTER_NAME
-        )
-        
-        kubeconfig_data = credentials.kubeconfigs[0].value.decode('utf-8')
-        config.load_kube_config_from_dict(yaml.safe_load(kubeconfig_data))
-        
-        v1 = client.CoreV1Api()
-        pod = v1.read_namespaced_pod(pod_name, namespace)
-        
-        return {
-            "name": pod.metadata.name,
-            "namespace": pod.metadata.namespace,
-            "status": pod.status.phase,
-            "ip": pod.status.pod_ip,
-            "node": pod.spec.node_name,
-            "creationTimestamp": pod.metadata.creation_timestamp.isoformat(),
-            "labels": pod.metadata.labels,
-            "containers": [
-                {
-                    "name": c.name,
-                    "image": c.image,
-                    "ports": [{"containerPort": p.container_port, "protocol": p.protocol} for p in (c.ports or [])]
-                }
-                for c in pod.spec.containers
-            ],
-            "conditions": [
-                {"type": c.type, "status": c.status}
-                for c in (pod.status.conditions or [])
-            ]
-        }
+        return await fetch_pod_details(namespace, pod_name)
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        check_kube_auth(e)
+        raise upstream_http_exception(e)
 
 # 5. Get Resource Group Information
+@tool_registry.tool("get_resource_group_info", cache_ttl=300, defaults={"rg_name": RESOURCE_GROUP})
+async def fetch_resource_group(rg_name: str):
+    rg = await run_blocking("arm", resource_client.resource_groups.get, rg_name)
+    return {
+        "name": rg.name,
+        "location": rg.location,
+        "provisioningState": rg.properties.provisioning_state,
+        "tags": rg.tags
+    }
+
 @app.get("/api/azure/resourcegroup/{rg_name}", dependencies=[Depends(verify_token)])
+@etags.conditional
+@arm_cache.cached("resource_group", CACHE_TTLS["resource_group"])
 async def get_resource_group(rg_name: str):
     try:
-        rg = resource_client.resource_groups.get(rg_name)
-        return {
-            "name": rg.name,
-            "location": rg.location,
-            "provisioningState": rg.properties.provisioning_state,
-            "tags": rg.tags
-        }
+        return await fetch_resource_group(rg_name)
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise upstream_http_exception(e)
 
 # 6. List All Resources
+@tool_registry.tool("list_all_resources", cache_ttl=120)
+async def fetch_resources():
+    resources = []
+    listed = await run_blocking("arm", drain, resource_client.resources.list_by_resource_group, RESOURCE_GROUP)
+    for resource in listed:
+        resources.append({
+            "name": resource.name,
+            "type": resource.type,
+            "location": resource.location,
+            "id": resource.id
+        })
+
+    return {"resourceGroup": RESOURCE_GROUP, "resources": resources, "count": len(resources)}
+
 @app.get("/api/azure/resources/list", dependencies=[Depends(verify_token)])
+@etags.conditional
+@arm_cache.cached("resources", CACHE_TTLS["resources"])
 async def list_resources():
     try:
-        resources = []
-        for resource in resource_client.resources.list_by_resource_group(RESOURCE_GROUP):
-            resources.append({
-                "name": resource.name,
-                "type": resource.type,
-                "location": resource.location,
-                "id": resource.id
-            })
-        
-        return {"resourceGroup": RESOURCE_GROUP, "resources": resources, "count": len(resources)}
+        return await fetch_resources()
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise upstream_http_exception(e)
 
 # 7. Get App Service Status
+@tool_registry.tool("get_app_service_status", cache_ttl=60, defaults={"app_name": "mckessondemo-csutherland"})
+async def fetch_app_service_status(app_name: str):
+    app = await run_blocking("arm", web_client.web_apps.get, RESOURCE_GROUP, app_name)
+    return {
+        "name": app.name,
+        "state": app.state,
+        "hostNames": app.host_names,
+        "location": app.location,
+        "kind": app.kind,
+        "httpsOnly": app.https_only,
+        "defaultHostName": app.default_host_name
+    }
+
 @app.get("/api/azure/appservice/{app_name}/status", dependencies=[Depends(verify_token)])
+@etags.conditional
+@arm_cache.cached("app_service", CACHE_TTLS["app_service"])
 async def get_app_service_status(app_name: str):
     try:
-        app = web_client.web_apps.get(RESOURCE_GROUP, app_name)
-        return {
-            "name": app.name,
-            "state": app.state,
-            "hostNames": app.host_names,
-            "location": app.location,
-            "kind": app.kind,
-            "httpsOnly": app.https_only,
-            "defaultHostName": app.default_host_name
-        }
+        return await fetch_app_service_status(app_name)
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise upstream_http_exception(e)
 
 # 8. Get Function App Status
+@tool_registry.tool("get_function_app_status", cache_ttl=60, defaults={"function_name": "hsps-pod-shutdown"})
+async def fetch_function_app_status(function_name: str):
+    function_app = await run_blocking("arm", web_client.web_apps.get, RESOURCE_GROUP, function_name)
+    return {
+        "name": function_app.name,
+        "state": function_app.state,
+        "hostNames": function_app.host_names,
+        "location": function_app.location,
+        "kind": function_app.kind,
+        "defaultHostName": function_app.default_host_name
+    }
+
 @app.get("/api/azure/functionapp/{function_name}/status", dependencies=[Depends(verify_token)])
+@etags.conditional
+@arm_cache.cached("function_app", CACHE_TTLS["function_app"])
 async def get_function_app_status(function_name: str):
     try:
-        function_app = web_client.web_apps.get(RESOURCE_GROUP, function_name)
-        return {
-            "name": function_app.name,
-            "state": function_app.state,
-            "hostNames": function_app.host_names,
-            "location": function_app.location,
-            "kind": function_app.kind,
-            "defaultHostName": function_app.default_host_name
-        }
+        return await fetch_function_app_status(function_name)
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise upstream_http_exception(e)
 
 # 9. Get Storage Account Information
+@tool_registry.tool("get_storage_account_info", cache_ttl=300, defaults={"account_name": "hspspodshutdown"})
+async def fetch_storage_account_info(account_name: str):
+    account = await run_blocking("arm", storage_client.storage_accounts.get_properties, RESOURCE_GROUP, account_name)
+    return {
+        "name": account.name,
+        "location": account.location,
+        "sku": {"name": account.sku.name, "tier": account.sku.tier.value} if account.sku else None,
+        "kind": account.kind.value if account.kind else None,
+        "provisioningState": account.provisioning_state.value if account.provisioning_state else None,
+        "primaryEndpoints": {
+            "blob": account.primary_endpoints.blob if account.primary_endpoints else None
+        }
+    }
+
 @app.get("/api/azure/storage/{account_name}/info", dependencies=[Depends(verify_token)])
+@etags.conditional
+@arm_cache.cached("storage_account", CACHE_TTLS["storage_account"])
 async def get_storage_account_info(account_name: str):
     try:
-        account = storage_client.storage_accounts.get_properties(RESOURCE_GROUP, account_name)
-        return {
-            "name": account.name,
-            "location": account.location,
-            "sku": {"name": account.sku.name, "tier": account.sku.tier.value} if account.sku else None,
-            "kind": account.kind.value if account.kind else None,
-            "provisioningState": account.provisioning_state.value if account.provisioning_state else None,
-            "primaryEndpoints": {
-                "blob": account.primary_endpoints.blob if account.primary_endpoints else None
-            }
-        }
+        return await fetch_storage_account_info(account_name)
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise upstream_http_exception(e)
 
 # 10. Get AKS Node Pools
+@tool_registry.tool("get_aks_node_pools", cache_ttl=60)
+async def fetch_node_pools():
+    node_pools = []
+    listed = await run_blocking("arm", drain, aks_client.agent_pools.list, RESOURCE_GROUP, AKS_CLUSTER_NAME)
+    for pool in listed:
+        node_pools.append({
+            "name": pool.name,
+            "count": pool.count,
+            "vmSize": pool.vm_size,
+            "osType": pool.os_type,
+            "provisioningState": pool.provisioning_state,
+            "powerState": pool.power_state.code if pool.power_state else None
+        })
+
+    return {"nodePools": node_pools, "count": len(node_pools)}
+
 @app.get("/api/azure/aks/nodepools", dependencies=[Depends(verify_token)])
+@etags.conditional
+@arm_cache.cached("node_pools", CACHE_TTLS["node_pools"])
 async def get_node_pools():
     try:
-        node_pools = []
-        for pool in aks_client.agent_pools.list(RESOURCE_GROUP, AKS_CLUSTER_NAME):
-            node_pools.append({
-                "name": pool.name,
-                "count": pool.count,
-                "vmSize": pool.vm_size,
-                "osType": pool.os_type,
-                "provisioningState": pool.provisioning_state,
-                "powerState": pool.power_state.code if pool.power_state else None
-            })
-        
-        return {"nodePools": node_pools, "count": len(node_pools)}
+        return await fetch_node_pools()
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise upstream_http_exception(e)
 
 # 11. Get Deployment Status
+def deployments_result(namespace: str, objects: list) -> dict:
+    deployments = []
+    for dep in objects:
+        deployments.append({
+            "name": dep.metadata.name,
+            "replicas": dep.spec.replicas,
+            "availableReplicas": dep.status.available_replicas or 0,
+            "readyReplicas": dep.status.ready_replicas or 0,
+            "updatedReplicas": dep.status.updated_replicas or 0
+        })
+
+    return {"namespace": namespace, "deployments": deployments, "count": len(deployments)}
+
+@tool_registry.tool("get_deployments", cache_ttl=15, defaults={"namespace": "hsps"})
+async def fetch_deployments(namespace: str):
+    return await derive_from_kube_objects("deployments", namespace, deployments_result)
+
 @app.get("/api/azure/deployments/{namespace}", dependencies=[Depends(verify_token)])
+@etags.conditional
 async def get_deployments(namespace: str):
     try:
-        credentials = aks_client.managed_clusters.list_cluster_user_credentials(
-            RESOURCE_GROUP, AKS_CLUSTER_NAME
-        )
-        
-        kubeconfig_data = credentials.kubeconfigs[0].value.decode('utf-8')
-        config.load_kube_config_from_dict(yaml.safe_load(kubeconfig_data))
-        
-        apps_v1 = client.AppsV1Api()
-        deployments_list = apps_v1.list_namespaced_deployment(namespace)
-        
-        deployments = []
-        for dep in deployments_list.items:
-            deployments.append({
-                "name": dep.metadata.name,
-                "replicas": dep.spec.replicas,
-                "availableReplicas": dep.status.available_replicas or 0,
-                "readyReplicas": dep.status.ready_replicas or 0,
-                "updatedReplicas": dep.status.updated_replicas or 0
-            })
-        
-        return {"namespace": namespace, "deployments": deployments, "count": len(deployments)}
+        return await fetch_deployments(namespace)
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        check_kube_auth(e)
+        raise upstream_http_exception(e)
 
 # 12. Get Service Status
+def services_result(namespace: str, objects: list) -> dict:
+    services = []
+    for svc in objects:
+        services.append({
+            "name": svc.metadata.name,
+            "type": svc.spec.type,
+            "clusterIP": svc.spec.cluster_ip,
+            "ports": [
+                {"port": p.port, "targetPort": str(p.target_port), "protocol": p.protocol}
+                for p in (svc.spec.ports or [])
+            ]
+        })
+
+    return {"namespace": namespace, "services": services, "count": len(services)}
+
+@tool_registry.tool("get_services", cache_ttl=30, defaults={"namespace": "hsps"})
+async def fetch_services(namespace: str):
+    return await derive_from_kube_objects("services", namespace, services_result)
+
 @app.get("/api/azure/services/{namespace}", dependencies=[Depends(verify_token)])
+@etags.conditional
 async def get_services(namespace: str):
     try:
-        credentials = aks_client.managed_clusters.list_cluster_user_credentials(
-            RESOURCE_GROUP, AKS_CLUSTER_NAME
-        )
-        
-        kubeconfig_data = credentials.kubeconfigs[0].value.decode('utf-8')
-        config.load_kube_config_from_dict(yaml.safe_load(kubeconfig_data))
-        
-        v1 = client.CoreV1Api()
-        services_list = v1.list_namespaced_service(namespace)
-        
-        services = []
-        for svc in services_list.items:
-            services.append({
-                "name": svc.metadata.name,
-                "type": svc.spec.type,
-                "clusterIP": svc.spec.cluster_ip,
-                "ports": [
-                    {"port": p.port, "targetPort": str(p.target_port), "protocol": p.protocol}
-                    for p in (svc.spec.ports or [])
-                ]
-            })
-        
-        return {"namespace": namespace, "services": services, "count": len(services)}
+        return await fetch_services(namespace)
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        check_kube_auth(e)
+        raise upstream_http_exception(e)
 
 # 13. Get Pod Logs
+# Log reads can hang on an unresponsive kubelet: short deadline and few in flight.
+# The deadline is also the HTTP timeout of the read, so the pool thread is freed too.
+LOG_READ_TIMEOUT_SECONDS = float(os.getenv("LOG_READ_TIMEOUT_SECONDS", "10"))
+
+@tool_registry.tool("get_pod_logs", timeout=LOG_READ_TIMEOUT_SECONDS, max_in_flight=2, cache_ttl=5,
+                    defaults={"namespace": "hsps"})
+async def fetch_pod_logs(namespace: str, pod_name: str):
+    v1 = await get_core_v1()
+    logs = await run_blocking(
+        "kubernetes",
+        v1.read_namespaced_pod_log,
+        pod_name,
+        namespace,
+        tail_lines=50,
+        _request_timeout=LOG_READ_TIMEOUT_SECONDS
+    )
+
+    return {
+        "podName": pod_name,
+        "namespace": namespace,
+        "logs": logs.split('\n')[-50:]
+    }
+
 @app.get("/api/azure/pods/{namespace}/{pod_name}/logs", dependencies=[Depends(verify_token)])
+@etags.conditional
 async def get_pod_logs(namespace: str, pod_name: str):
     try:
-        credentials = aks_client.managed_clusters.list_cluster_user_credentials(
-            RESOURCE_GROUP, AKS_CLUSTER_NAME
-        )
-        
-        kubeconfig_data = credentials.kubeconfigs[0].value.decode('utf-8')
-        config.load_kube_config_from_dict(yaml.safe_load(kubeconfig_data))
-        
-        v1 = client.CoreV1Api()
-        logs = v1.read_namespaced_pod_log(
-            pod_name,
-            namespace,
-            tail_lines=50
-        )
-        
-        return {
-            "podName": pod_name,
-            "namespace": namespace,
-            "logs": logs.split('\n')[-50:]
-        }
+        return await fetch_pod_logs(namespace, pod_name)
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        check_kube_auth(e)
+        raise upstream_http_exception(e)
 
 # 14. Get Subscription Information (Non-Sensitive)
+@tool_registry.tool("get_subscription_info", cache_ttl=3600)
+async def fetch_subscription_info():
+    subscription = await run_blocking("arm", resource_client.subscriptions.get, SUBSCRIPTION_ID)
+    return {
+        "displayName": subscription.display_name,
+        "state": subscription.state.value if subscription.state else None,
+        "subscriptionId": f"{SUBSCRIPTION_ID[:5]}***********************************"
+    }
+
 @app.get("/api/azure/subscription/info", dependencies=[Depends(verify_token)])
+@etags.conditional
+@arm_cache.cached("subscription", CACHE_TTLS["subscription"])
 async def get_subscription_info():
     try:
-        subscription = resource_client.subscriptions.get(SUBSCRIPTION_ID)
-        return {
-            "displayName": subscription.display_name,
-            "state": subscription.state.value if subscription.state else None,
-            "subscriptionId": f"{SUBSCRIPTION_ID[:5]}***********************************"
-        }
+        return await fetch_subscription_info()
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise upstream_http_exception(e)
 
 # 15. Get Cost Analysis (Simulated)
-@app.get("/api/azure/costs/summary", dependencies=[Depends(verify_token)])
-async def get_cost_analysis():
+@tool_registry.tool("get_cost_analysis", cache_ttl=3600)
+async def fetch_cost_analysis():
     return {
         "period": "Last 30 days",
         "totalCost": "$127.45",
@@ -403,12 +617,326 @@ async def get_cost_analysis():
         "note": "Cost data is simulated. Enable Cost Management API for real data."
     }
 
+@app.get("/api/azure/costs/summary", dependencies=[Depends(verify_token)])
+@etags.conditional
+async def get_cost_analysis():
+    return await fetch_cost_analysis()
+
+# 16. Cluster Overview (fan-out of the dashboard endpoints in one request)
+OVERVIEW_NAMESPACES = ["hsps", "star"]
+OVERVIEW_SECTION_TIMEOUT = float(os.getenv("OVERVIEW_SECTION_TIMEOUT_SECONDS", "10"))
+
+# Section name -> (fetch function, namespaced?)
+OVERVIEW_SECTIONS = {
+    "aks": (get_aks_status, False),
+    "nodePools": (get_node_pools, False),
+    "resources": (list_resources, False),
+    "pods": (lambda ns: list_pods(namespace=ns), True),
+    "deployments": (lambda ns: get_deployments(namespace=ns), True),
+    "services": (lambda ns: get_services(namespace=ns), True),
+}
+
+async def _overview_section(fetch, timeout: float):
+    """Run one section with a deadline; returns (data, error, elapsed_ms)"""
+    started = time.perf_counter()
+    try:
+        data = await asyncio.wait_for(fetch(), timeout)
+        return data, None, round((time.perf_counter() - started) * 1000, 1)
+    except asyncio.TimeoutError:
+        return None, f"Timed out after {timeout}s", round((time.perf_counter() - started) * 1000, 1)
+    except HTTPException as e:
+        return None, e.detail, round((time.perf_counter() - started) * 1000, 1)
+    except Exception as e:
+        return None, str(e), round((time.perf_counter() - started) * 1000, 1)
+
+@app.get("/api/azure/overview", dependencies=[Depends(verify_token)])
+@etags.conditional(volatile=("timingsMs", "totalMs"))
+async def get_cluster_overview(sections: Optional[str] = None, timeout: Optional[float] = None):
+    """
+    Fetch the dashboard sections concurrently, each with its own timeout.
+    Failed or slow sections are reported in `errors` instead of failing the request.
+    """
+    requested = [s.strip() for s in sections.split(",") if s.strip()] if sections else list(OVERVIEW_SECTIONS)
+    unknown = [s for s in requested if s not in OVERVIEW_SECTIONS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown sections: {', '.join(unknown)}")
+    section_timeout = min(timeout or OVERVIEW_SECTION_TIMEOUT, OVERVIEW_SECTION_TIMEOUT)
+
+    jobs = []  # (section, namespace or None, coroutine)
+    for name in requested:
+        fetch, namespaced = OVERVIEW_SECTIONS[name]
+        if namespaced:
+            for ns in OVERVIEW_NAMESPACES:
+                jobs.append((name, ns, _overview_section(lambda f=fetch, n=ns: f(n), section_timeout)))
+        else:
+            jobs.append((name, None, _overview_section(fetch, section_timeout)))
+
+    started = time.perf_counter()
+    results = await asyncio.gather(*(job[2] for job in jobs))
+
+    data, errors, timings = {}, {}, {}
+    for (name, ns, _), (result, error, elapsed_ms) in zip(jobs, results):
+        label = f"{name}/{ns}" if ns else name
+        timings[label] = elapsed_ms
+        if error is not None:
+            errors[label] = error
+        elif ns:
+            data.setdefault(name, {})[ns] = result
+        else:
+            data[name] = result
+
+    return {
+        "sections": data,
+        "errors": errors,
+        "timingsMs": timings,
+        "totalMs": round((time.perf_counter() - started) * 1000, 1)
+    }
+
+# 17. Stream Pod Logs (follow mode)
+log_stream_slots = asyncio.Semaphore(LOG_STREAM_MAX_STREAMS)
+
+@app.get("/api/azure/pods/{namespace}/{pod_name}/logs/stream", dependencies=[Depends(verify_token)])
+async def stream_pod_logs(
+    request: Request,
+    namespace: str,
+    pod_name: str,
+    container: Optional[str] = None,
+    since_seconds: Optional[int] = None,
+    tail_lines: Optional[int] = None,
+    limit_bytes: Optional[int] = None,
+    filter: Optional[str] = None,
+    follow: bool = True,
+    format: str = "ndjson"
+):
+    """
+    Stream a pod's log as NDJSON (default) or SSE (`format=sse`), following new
+    lines until the client disconnects. `filter` is a regex applied server-side.
+    Without `since_seconds` or `tail_lines` the stream starts from the last 50 lines.
+    """
+    if format not in STREAM_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unknown format: {format}")
+    try:
+        line_filter = compile_line_filter(filter)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if since_seconds is None and tail_lines is None:
+        tail_lines = 50
+    kwargs = {k: v for k, v in {
+        "container": container,
+        "since_seconds": since_seconds,
+        "tail_lines": tail_lines,
+        "limit_bytes": limit_bytes,
+    }.items() if v is not None}
+
+    # Take the slot before opening the upstream; no await between the check and the acquire
+    if log_stream_slots.locked():
+        raise HTTPException(status_code=429, detail="Too many open log streams")
+    await log_stream_slots.acquire()
+    stream = {"upstream": None, "open": True}
+
+    def release():
+        """Close the upstream and free the slot, once, whether or not the body ever ran"""
+        if stream["open"]:
+            stream["open"] = False
+            if stream["upstream"] is not None:
+                stream["upstream"].close()
+            log_stream_slots.release()
+
+    try:
+        v1 = await get_core_v1()
+        stream["upstream"] = await run_blocking(
+            "kubernetes",
+            v1.read_namespaced_pod_log,
+            pod_name,
+            namespace,
+            follow=follow,
+            _preload_content=False,
+            # Connect timeout only: a followed log may legitimately stay quiet
+            _request_timeout=(LOG_READ_TIMEOUT_SECONDS, None),
+            **kwargs
+        )
+    except Exception as e:
+        release()
+        check_kube_auth(e)
+        status = api_status(e)
+        if status is None:
+            raise upstream_http_exception(e)
+        raise HTTPException(status_code=status if status in (400, 404) else 500, detail=str(e.reason))
+    except BaseException:
+        release()
+        raise
+
+    formatter, media_type = STREAM_FORMATS[format]
+
+    async def body():
+        try:
+            async for kind, payload in follow_lines(stream["upstream"], line_filter, request.is_disconnected):
+                yield formatter(kind, payload, {})
+        finally:
+            release()
+
+    # The background task covers a response whose body is never iterated
+    return StreamingResponse(
+        body(),
+        media_type=media_type,
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        background=BackgroundTask(release)
+    )
+
+# 18. Aggregated Logs Across Pods (deployment or label selector)
+LOG_AGGREGATE_CONCURRENCY = int(os.getenv("LOG_AGGREGATE_CONCURRENCY", "8"))
+LOG_AGGREGATE_MAX_PODS = int(os.getenv("LOG_AGGREGATE_MAX_PODS", "50"))
+
+async def fetch_selector_pods(namespace: str, requirements: list) -> list:
+    return [
+        pod for pod in await list_kube_objects("pods", namespace)
+        if labels_match(pod.metadata.labels, requirements)
+    ]
+
+async def aggregate_logs(namespace: str, requirements: list, selector: str, container: Optional[str],
+                         since_seconds: Optional[int], tail_lines: int, filter: Optional[str],
+                         match: Optional[str], format: str):
+    """Fetch the selected pods' logs concurrently and merge them by timestamp"""
+    if format != "json" and format not in STREAM_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unknown format: {format}")
+    try:
+        regex_filter = compile_line_filter(filter)
+        field_filter = compile_field_filter(match)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    try:
+        pods = await fetch_selector_pods(namespace, requirements)
+        v1 = await get_core_v1()
+    except Exception as e:
+        check_kube_auth(e)
+        raise upstream_http_exception(e)
+    if len(pods) > LOG_AGGREGATE_MAX_PODS:
+        raise HTTPException(status_code=400, detail=f"Selector matches {len(pods)} pods (max {LOG_AGGREGATE_MAX_PODS})")
+
+    kwargs = {k: v for k, v in {
+        "container": container, "since_seconds": since_seconds, "tail_lines": tail_lines
+    }.items() if v is not None}
+    semaphore = asyncio.Semaphore(LOG_AGGREGATE_CONCURRENCY)
+
+    async def fetch(name: str):
+        async with semaphore:
+            try:
+                text = await run_blocking(
+                    "kubernetes", v1.read_namespaced_pod_log, name, namespace, timestamps=True,
+                    _request_timeout=LOG_READ_TIMEOUT_SECONDS, **kwargs
+                )
+                return name, text, None
+            except Exception as e:
+                check_kube_auth(e)
+                return name, None, str(e.reason if api_status(e) is not None else e)
+
+    results = await asyncio.gather(*(fetch(p.metadata.name) for p in pods))
+    logs = {name: text for name, text, error in results if error is None}
+    errors = {name: error for name, _, error in results if error is not None}
+    merged = merge_pod_logs(logs, lambda line: regex_filter(line) and field_filter(line))
+
+    if format == "json":
+        lines = [{"timestamp": ts, "pod": pod, "line": line} for pod, ts, line in merged]
+        return {
+            "namespace": namespace,
+            "selector": selector,
+            "pods": sorted(logs) + sorted(errors),
+            "lines": lines,
+            "count": len(lines),
+            "errors": errors
+        }
+
+    formatter, media_type = STREAM_FORMATS[format]
+
+    def body():
+        for pod, error in errors.items():
+            yield formatter("error", error, {"pod": pod})
+        for pod, ts, line in merged:
+            yield formatter("line", line, {"pod": pod, "timestamp": ts})
+        yield formatter("end", None, {"pods": len(pods)})
+
+    return StreamingResponse(body(), media_type=media_type, headers={"Cache-Control": "no-cache"})
+
+@app.get("/api/azure/deployments/{namespace}/{deployment}/logs", dependencies=[Depends(verify_token)])
+@etags.conditional
+async def get_deployment_logs(
+    namespace: str,
+    deployment: str,
+    container: Optional[str] = None,
+    since_seconds: Optional[int] = None,
+    tail_lines: int = 100,
+    filter: Optional[str] = None,
+    match: Optional[str] = None,
+    format: str = "json"
+):
+    """
+    Logs of every pod of a deployment merged by timestamp. `filter` is a regex,
+    `match` a field filter such as `level=WARNING` (JSON fields or logfmt tokens).
+    `format=ndjson` or `sse` streams the merged lines instead of returning JSON.
+    """
+    try:
+        store = informers.store("deployments", namespace)
+        dep = store.get(namespace, deployment) if store is not None else None
+        if dep is None:
+            apps_v1 = await run_blocking("arm", kube_clients.apps_v1, RESOURCE_GROUP, AKS_CLUSTER_NAME)
+            dep = await run_blocking("kubernetes", apps_v1.read_namespaced_deployment, deployment, namespace)
+    except Exception as e:
+        check_kube_auth(e)
+        status = api_status(e)
+        if status is None:
+            raise upstream_http_exception(e)
+        raise HTTPException(status_code=404 if status == 404 else 500, detail=str(e.reason))
+
+    match_labels = (dep.spec.selector.match_labels or {}) if dep.spec.selector else {}
+    if not match_labels:
+        raise HTTPException(status_code=400, detail=f"Deployment {deployment} has no matchLabels selector")
+    requirements = [(k, "=", v) for k, v in sorted(match_labels.items())]
+    selector = ",".join(f"{k}={v}" for k, _, v in requirements)
+    return await aggregate_logs(namespace, requirements, selector, container, since_seconds, tail_lines, filter, match, format)
+
+@app.get("/api/azure/logs/{namespace}", dependencies=[Depends(verify_token)])
+@etags.conditional
+async def get_selector_logs(
+    namespace: str,
+    selector: str,
+    container: Optional[str] = None,
+    since_seconds: Optional[int] = None,
+    tail_lines: int = 100,
+    filter: Optional[str] = None,
+    match: Optional[str] = None,
+    format: str = "json"
+):
+    """Like the deployment logs endpoint, for pods matching an equality label selector (e.g. app=x,component=y)"""
+    try:
+        requirements = parse_label_selector(selector)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return await aggregate_logs(namespace, requirements, selector, container, since_seconds, tail_lines, filter, match, format)
+
+# Cache statistics
+@app.get("/api/cache/stats", dependencies=[Depends(verify_token)])
+async def get_cache_stats():
+    return {
+        "arm": arm_cache.stats(),
+        "ttls": CACHE_TTLS,
+        "tools": tool_registry.cache.stats(),
+        "informers": informers.status(),
+        "etags": etags.stats()
+    }
+
+# Explicit cache invalidation (optionally limited to one endpoint or tool, e.g. ?endpoint=aks_status)
+@app.post("/api/cache/invalidate", dependencies=[Depends(verify_token)])
+async def invalidate_cache(endpoint: Optional[str] = None):
+    return {"invalidated": arm_cache.invalidate(endpoint) + tool_registry.cache.invalidate(endpoint)}
+
 # ============================================================
 # OpenAI Agent with Function Calling
 # ============================================================
 
-OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", "")
-openai_client = OpenAI(api_key=OPENAI_API_KEY) if OPENAI_API_KEY else None
+# Async client on a shared connection pool (OPENAI_API_KEY / OPENAI_BASE_URL / OPENAI_MODEL),
+# built on the first agent request; falsy when no API key is configured
+openai_client = LazyObject(create_openai_client)
 
 AGENT_SYSTEM_PROMPT = """You are a read-only operations assistant for the McKesson Security Automation Platform. You support operations engineers who manage Azure infrastructure and Kubernetes workloads.
 
@@ -607,137 +1135,94 @@ AGENT_TOOLS = [
     }
 ]
 
-# Map tool names to actual handler functions
-async def execute_tool(tool_name: str, arguments: dict) -> dict:
-    """Execute a tool call and return the result"""
+# Every tool the model can call must have a fetch function in the registry
+assert {t["function"]["name"] for t in AGENT_TOOLS} == set(tool_registry.names()), "AGENT_TOOLS and tool_registry disagree"
+
+# Tool schemas offered per question (tool_selection.py): only the groups the question
+# is about; broad questions, and questions matching no group, get every tool
+tool_selector = ToolSelector(AGENT_TOOLS, [
+    ToolGroup("kubernetes", ["list_pods", "get_pod_details", "get_deployments", "get_services", "get_pod_logs"],
+              r"\bpods?\b|deploy|replica|service|\blogs?\b|namespace|\bhsps\b|\bstar\b|container|restart|crash"
+              r"|workload|image|endpoint|\bports?\b|\bk8s\b|kubectl"),
+    ToolGroup("cluster", ["get_aks_cluster_status", "get_aks_node_pools"],
+              r"\baks\b|cluster|\bnodes?\b|node ?pool|kubernetes|upgrade|\bvms?\b"),
+    ToolGroup("resources", ["get_resource_group_info", "list_all_resources", "get_storage_account_info",
+                            "get_subscription_info"],
+              r"resource|storage|subscription|\bblob|\btags?\b|region|location|azure"),
+    ToolGroup("apps", ["get_app_service_status", "get_function_app_status"],
+              r"app ?service|web ?app|function|\bsites?\b|shutdown|azurewebsites"),
+    ToolGroup("costs", ["get_cost_analysis"], r"\bcost|spend|\bbill|budget|price|charge"),
+    ToolGroup("overview", [t["function"]["name"] for t in AGENT_TOOLS],
+              r"health|overall|everything|environment|summary|overview|status of all"),
+])
+assert {name for g in tool_selector.groups for name in g.tools} == set(tool_registry.names()), "tool without a group"
+
+
+# Tool calls requested in one assistant turn run concurrently (each under its own
+# deadline and in-flight limit from the registry), within a process-wide limit so a
+# burst of chats cannot flood ARM / the API server
+AGENT_TOOL_CONCURRENCY = int(os.getenv("AGENT_TOOL_CONCURRENCY", "8"))
+agent_tool_semaphore = asyncio.Semaphore(AGENT_TOOL_CONCURRENCY)
+
+async def run_tool_call(tool_call: dict, prefetch: Optional[PrefetchTurn] = None):
+    """Execute one model tool call through the tool registry. Returns (result, cached)."""
+    fn_name = tool_call["function"]["name"]
     try:
-        if tool_name == "get_aks_cluster_status":
-            cluster = aks_client.managed_clusters.get(RESOURCE_GROUP, AKS_CLUSTER_NAME)
-            return {
-                "name": cluster.name, "location": cluster.location,
-                "powerState": cluster.power_state.code if cluster.power_state else "Unknown",
-                "provisioningState": cluster.provisioning_state,
-                "kubernetesVersion": cluster.kubernetes_version,
-                "fqdn": cluster.fqdn,
-                "agentPoolProfiles": [
-                    {"name": p.name, "count": p.count, "vmSize": p.vm_size, "osType": p.os_type}
-                    for p in (cluster.agent_pool_profiles or [])
-                ]
-            }
-
-        elif tool_name == "list_pods":
-            ns = arguments.get("namespace", "hsps")
-            credentials = aks_client.managed_clusters.list_cluster_user_credentials(RESOURCE_GROUP, AKS_CLUSTER_NAME)
-            kubeconfig_data = credentials.kubeconfigs[0].value.decode('utf-8')
-            config.load_kube_config_from_dict(yaml.safe_load(kubeconfig_data))
-            v1 = client.CoreV1Api()
-            pods_list = v1.list_namespaced_pod(ns)
-            pods = []
-            for pod in pods_list.items:
-                ready = all(c.ready for c in (pod.status.container_statuses or []))
-                restarts = sum(c.restart_count for c in (pod.status.container_statuses or []))
-                pods.append({
-                    "name": pod.metadata.name, "status": pod.status.phase,
-                    "ready": ready, "restarts": restarts, "ip": pod.status.pod_ip
-                })
-            return {"namespace": ns, "pods": pods, "count": len(pods)}
-
-        elif tool_name == "get_pod_details":
-            ns = arguments.get("namespace", "hsps")
-            pod_name = arguments.get("pod_name")
-            credentials = aks_client.managed_clusters.list_cluster_user_credentials(RESOURCE_GROUP, AKS_CLUSTER_NAME)
-            kubeconfig_data = credentials.kubeconfigs[0].value.decode('utf-8')
-            config.load_kube_config_from_dict(yaml.safe_load(kubeconfig_data))
-            v1 = client.CoreV1Api()
-            pod = v1.read_namespaced_pod(pod_name, ns)
-            return {
-                "name": pod.metadata.name, "namespace": pod.metadata.namespace,
-                "status": pod.status.phase, "ip": pod.status.pod_ip, "node": pod.spec.node_name,
-                "containers": [{"name": c.name, "image": c.image} for c in pod.spec.containers]
-            }
-
-        elif tool_name == "get_resource_group_info":
-            rg_name = arguments.get("rg_name", RESOURCE_GROUP)
-            rg = resource_client.resource_groups.get(rg_name)
-            return {"name": rg.name, "location": rg.location, "provisioningState": rg.properties.provisioning_state, "tags": rg.tags}
-
-        elif tool_name == "list_all_resources":
-            resources = []
-            for r in resource_client.resources.list_by_resource_group(RESOURCE_GROUP):
-                resources.append({"name": r.name, "type": r.type, "location": r.location})
-            return {"resourceGroup": RESOURCE_GROUP, "resources": resources, "count": len(resources)}
-
-        elif tool_name == "get_app_service_status":
-            app_name = arguments.get("app_name", "mckessondemo-csutherland")
-            a = web_client.web_apps.get(RESOURCE_GROUP, app_name)
-            return {"name": a.name, "state": a.state, "hostNames": a.host_names, "defaultHostName": a.default_host_name}
-
-        elif tool_name == "get_function_app_status":
-            fn = arguments.get("function_name", "hsps-pod-shutdown")
-            fa = web_client.web_apps.get(RESOURCE_GROUP, fn)
-            return {"name": fa.name, "state": fa.state, "hostNames": fa.host_names, "defaultHostName": fa.default_host_name}
-
-        elif tool_name == "get_storage_account_info":
-            acct = arguments.get("account_name", "hspspodshutdown")
-            account = storage_client.storage_accounts.get_properties(RESOURCE_GROUP, acct)
-            return {"name": account.name, "location": account.location, "kind": str(account.kind) if account.kind else None}
-
-        elif tool_name == "get_aks_node_pools":
-            pools = []
-            for pool in aks_client.agent_pools.list(RESOURCE_GROUP, AKS_CLUSTER_NAME):
-                pools.append({"name": pool.name, "count": pool.count, "vmSize": pool.vm_size, "provisioningState": pool.provisioning_state})
-            return {"nodePools": pools, "count": len(pools)}
-
-        elif tool_name == "get_deployments":
-            ns = arguments.get("namespace", "hsps")
-            credentials = aks_client.managed_clusters.list_cluster_user_credentials(RESOURCE_GROUP, AKS_CLUSTER_NAME)
-            kubeconfig_data = credentials.kubeconfigs[0].value.decode('utf-8')
-            config.load_kube_config_from_dict(yaml.safe_load(kubeconfig_data))
-            apps_v1 = client.AppsV1Api()
-            deps = apps_v1.list_namespaced_deployment(ns)
-            return {"namespace": ns, "deployments": [{"name": d.metadata.name, "replicas": d.spec.replicas, "available": d.status.available_replicas or 0} for d in deps.items], "count": len(deps.items)}
-
-        elif tool_name == "get_services":
-            ns = arguments.get("namespace", "hsps")
-            credentials = aks_client.managed_clusters.list_cluster_user_credentials(RESOURCE_GROUP, AKS_CLUSTER_NAME)
-            kubeconfig_data = credentials.kubeconfigs[0].value.decode('utf-8')
-            config.load_kube_config_from_dict(yaml.safe_load(kubeconfig_data))
-            v1 = client.CoreV1Api()
-            svcs = v1.list_namespaced_service(ns)
-            return {"namespace": ns, "services": [{"name": s.metadata.name, "type": s.spec.type, "clusterIP": s.spec.cluster_ip} for s in svcs.items], "count": len(svcs.items)}
-
-        elif tool_name == "get_pod_logs":
-            ns = arguments.get("namespace", "hsps")
-            pod_name = arguments.get("pod_name")
-            credentials = aks_client.managed_clusters.list_cluster_user_credentials(RESOURCE_GROUP, AKS_CLUSTER_NAME)
-            kubeconfig_data = credentials.kubeconfigs[0].value.decode('utf-8')
-            config.load_kube_config_from_dict(yaml.safe_load(kubeconfig_data))
-            v1 = client.CoreV1Api()
-            logs = v1.read_namespaced_pod_log(pod_name, ns, tail_lines=50)
-            return {"podName": pod_name, "namespace": ns, "logs": logs.split('\n')[-50:]}
-
-        elif tool_name == "get_subscription_info":
-            sub = resource_client.subscriptions.get(SUBSCRIPTION_ID)
-            return {"displayName": sub.display_name, "state": sub.state.value if sub.state else None}
-
-        elif tool_name == "get_cost_analysis":
-            return {
-                "period": "Last 30 days", "totalCost": "$127.45",
-                "breakdown": [
-                    {"service": "Azure Kubernetes Service", "cost": "$45.20"},
-                    {"service": "App Service", "cost": "$32.10"},
-                    {"service": "Function App", "cost": "$15.80"},
-                    {"service": "Storage Account", "cost": "$12.35"},
-                    {"service": "Other", "cost": "$22.00"}
-                ],
-                "note": "Cost data is simulated."
-            }
-
-        else:
-            return {"error": f"Unknown tool: {tool_name}"}
-
-    except Exception as e:
-        return {"error": str(e)}
+        fn_args = json.loads(tool_call["function"]["arguments"] or "{}")
+    except json.JSONDecodeError:
+        return {"error": f"Invalid arguments for {fn_name}"}, False
+    if prefetch is not None:
+        prefetch.requested(fn_name, fn_args)
+
+    async with agent_tool_semaphore:
+        started = time.perf_counter()
+        result, cached = await tool_registry.execute(fn_name, fn_args)
+
+    outcome = "cached" if cached else "error" if isinstance(result, dict) and "error" in result else "ok"
+    AGENT_TOOL_CALLS.labels(fn_name if fn_name in tool_registry else "unknown", outcome).observe(
+        time.perf_counter() - started
+    )
+    return result, cached
+
+# Speculative prefetch: the reads most questions start with are started alongside the
+# first model call, so they are usually cached by the time the model asks for them
+prefetcher = Prefetcher(tool_registry, [
+    *(PrefetchCandidate("list_pods", {"namespace": ns}, r"\bpods?\b|restart|crash|not ready|unhealthy|health")
+      for ns in OVERVIEW_NAMESPACES),
+    *(PrefetchCandidate("get_deployments", {"namespace": ns}, r"deploy|replica|rollout|scal|health")
+      for ns in OVERVIEW_NAMESPACES),
+    PrefetchCandidate("get_aks_cluster_status", keywords=r"\baks\b|cluster|kubernetes version|health"),
+], namespaces=OVERVIEW_NAMESPACES, semaphore=agent_tool_semaphore)
+
+# Fast path: questions that map to one tool are answered from a template (intents.py)
+intent_router = IntentRouter(namespaces=OVERVIEW_NAMESPACES)
+assert all(intent.tool in tool_registry for intent in intent_router.intents), "intent for an unregistered tool"
+
+# Cache and informer state for /metrics, read at scrape time
+register_stats_collector(StatsCollector(
+    lambda: {"arm": arm_cache, "tools": tool_registry.cache},
+    informers.status
+))
+
+# Per-tool policy, error/timeout counts and latency histograms
+@app.get("/api/agent/tools/stats", dependencies=[Depends(verify_token)])
+async def get_tool_stats():
+    return tool_registry.stats()
+
+# Prefetch candidates with how often they were prefetched, used and requested
+@app.get("/api/agent/prefetch/stats", dependencies=[Depends(verify_token)])
+async def get_prefetch_stats():
+    return prefetcher.stats()
+
+# Tool selection: turns offered a subset or the full set, and schema sizes in tokens
+@app.get("/api/agent/tools/selection", dependencies=[Depends(verify_token)])
+async def get_tool_selection_stats():
+    return tool_selector.stats()
+
+# Fast-path hit rate: questions seen, answered from a template, and per intent
+@app.get("/api/agent/router/stats", dependencies=[Depends(verify_token)])
+async def get_router_stats():
+    return intent_router.stats()
 
 
 # Pydantic models for agent chat
@@ -748,10 +1233,276 @@ class ChatMessage(BaseModel):
 class AgentChatRequest(BaseModel):
     message: str
     history: List[ChatMessage] = []
+    # From an earlier response; the server then supplies the history (sessions.py)
+    session_id: Optional[str] = None
+    # Start a session if there is none yet (or session_id has expired)
+    start_session: bool = False
 
 class AgentChatResponse(BaseModel):
     response: str
     tool_calls_made: List[str] = []
+    session_id: Optional[str] = None
+
+
+AGENT_MODEL = OPENAI_MODEL
+AGENT_MAX_ITERATIONS = 5  # Prevent infinite tool-calling loops
+AGENT_FALLBACK_RESPONSE = "I wasn't able to generate a response. Please try again."
+
+# Conversations kept server-side, so clients send only the new message
+agent_sessions = SessionStore()
+
+async def open_session(request: AgentChatRequest):
+    """
+    The request's session: resumed from session_id, or a new one when the client
+    asks for it (start_session or an expired session_id). None for a stateless
+    request, including one that sends its own history: it leaves nothing behind.
+    """
+    create = request.start_session or bool(request.session_id)
+    return await agent_sessions.open(request.session_id, create=create)
+
+def session_history(request: AgentChatRequest, session) -> list:
+    """A resumed session's history; otherwise the client's last 20 messages"""
+    if session is not None and session.turns:
+        return session.messages
+    return [{"role": msg.role, "content": msg.content} for msg in request.history[-20:]]
+
+async def save_turn(session, turn: list):
+    if session is not None:
+        session.record_turn(turn)
+        await agent_sessions.save(session)
+
+def build_agent_messages(message: str, history: list) -> list:
+    messages = [{"role": "system", "content": AGENT_SYSTEM_PROMPT}]
+
+    # Add conversation history
+    messages.extend(history)
+
+    # Add current user message
+    messages.append({"role": "user", "content": message})
+    return messages
+
+async def model_turn(messages: list, stream: bool, budget: RetryBudget, tools: Optional[list] = None):
+    """
+    One chat completion round trip, offering `tools` (default: all of AGENT_TOOLS).
+
+    Yields ("token", text) for each streamed content delta (stream=True only),
+    ("usage", (prompt_tokens, completion_tokens)) when the API reports usage,
+    then ("message", (content, tool_calls)) with tool calls in OpenAI message format.
+    Retries on throttling/transient errors draw from the request's `budget`.
+    """
+    params = dict(
+        model=AGENT_MODEL,
+        messages=messages,
+        tools=tools or AGENT_TOOLS,
+        tool_choice="auto",
+        max_tokens=1000,
+        temperature=0.3
+    )
+
+    if not stream:
+        response = await create_chat_completion(openai_client, budget, **params)
+        usage = usage_tokens(getattr(response, "usage", None))
+        if usage:
+            yield "usage", usage
+        message = response.choices[0].message
+        tool_calls = [
+            {"id": tc.id, "type": "function", "function": {"name": tc.function.name, "arguments": tc.function.arguments}}
+            for tc in (message.tool_calls or [])
+        ]
+        yield "message", (message.content, tool_calls)
+        return
+
+    if OPENAI_STREAM_USAGE:
+        # Token usage arrives in a last chunk without choices
+        params["extra_body"] = {"stream_options": {"include_usage": True}}
+    chunks = await create_chat_completion(openai_client, budget, stream=True, **params)
+    content_parts = []
+    tool_calls = {}  # index -> tool call being assembled from deltas
+    async for chunk in chunks:
+        usage = usage_tokens(getattr(chunk, "usage", None))
+        if usage:
+            yield "usage", usage
+        if not chunk.choices:
+            continue
+        delta = chunk.choices[0].delta
+        if delta.content:
+            content_parts.append(delta.content)
+            yield "token", delta.content
+        for tc in delta.tool_calls or []:
+            call = tool_calls.setdefault(tc.index, {"id": None, "type": "function", "function": {"name": "", "arguments": ""}})
+            if tc.id:
+                call["id"] = tc.id
+            if tc.function and tc.function.name:
+                call["function"]["name"] += tc.function.name
+            if tc.function and tc.function.arguments:
+                call["function"]["arguments"] += tc.function.arguments
+
+    content = "".join(content_parts) or None
+    yield "message", (content, [tool_calls[i] for i in sorted(tool_calls)])
+
+def require_model(request: Optional[AgentChatRequest] = None):
+    """
+    500 unless OpenAI is configured. With `request`, a question the intent router
+    would answer is let through: it may not need the model at all.
+    """
+    if openai_client:
+        return
+    if request is not None and intent_router.enabled and intent_router.match(request.message) is not None:
+        return
+    raise HTTPException(status_code=500, detail="OpenAI API key not configured. Set OPENAI_API_KEY in environment.")
+
+async def agent_events(request: AgentChatRequest, stream: bool = False):
+    """
+    Run the agent loop, yielding progress events:
+      tool_start / tool_end  - around each tool call
+      token                  - final-answer text deltas (stream=True only)
+      done                   - final response, tool calls made, usage, timings and session ID
+    A question the intent router answers never reaches the model.
+    """
+    session = await open_session(request)
+    history = session_history(request, session)
+    if session is not None:
+        session.messages = history
+    user_message = {"role": "user", "content": request.message}
+
+    # Fast path: a simple question is answered from its tool's result without the model
+    match = intent_router.route(request.message)
+    if match is not None:
+        tc = {"id": "route_0", "type": "function",
+              "function": {"name": match.intent.tool, "arguments": json.dumps(match.arguments)}}
+        started = time.perf_counter()
+        result, cached = await run_tool_call(tc)
+        elapsed = time.perf_counter() - started
+        answer = intent_router.render(match, result)
+        # Tool events only for a final answer: after a failed tool the model takes over with its own calls
+        if answer is not None:
+            yield {"event": "tool_start", "data": {"id": tc["id"], "name": match.intent.tool, "arguments": tc["function"]["arguments"]}}
+            yield {"event": "tool_end", "data": {
+                "id": tc["id"], "name": match.intent.tool, "durationMs": round(elapsed * 1000, 1), "cached": cached,
+                "error": None, "tokens": count_tokens(answer), "rawTokens": count_tokens(json.dumps(result))
+            }}
+            if stream:
+                yield {"event": "token", "data": {"content": answer}}
+            await save_turn(session, [user_message, {"role": "assistant", "content": answer}])
+            yield {"event": "done", "data": {
+                "response": answer,
+                "tool_calls_made": [match.intent.tool + (" (cached)" if cached else "")],
+                "iterations": 0,
+                "promptTokens": [],
+                "toolsOffered": [],
+                "usage": {"promptTokens": 0, "completionTokens": 0, "estimated": False},
+                "timingsMs": {"model": 0.0, "tools": round(elapsed * 1000, 1)},
+                "prefetch": {"started": 0, "used": 0},
+                "routed": match.intent.name,
+                "sessionId": session.id if session is not None else None
+            }}
+            return
+        # The tool failed: let the model explain it
+
+    require_model()
+    messages = build_agent_messages(request.message, history)
+    recent_questions = [m["content"] for m in history if m["role"] == "user"]
+    # This turn's messages, kept in the session: tool calls and compacted results included
+    turn = [user_message]
+    # Likely tool data starts loading now, overlapping the first model call
+    prefetch = prefetcher.start(request.message, recent_questions)
+    # Only the tool schemas relevant to the question go into the prompt
+    selection = tool_selector.select(request.message, recent_questions)
+    tool_calls_made = []
+    prompt_tokens = []
+    tools_offered = []
+    usage = {"promptTokens": 0, "completionTokens": 0, "estimated": False}
+    timings = {"model": 0.0, "tools": 0.0}
+    iteration = 0
+    budget = RetryBudget()
+
+    while True:
+        # Keep the prompt within the context token budget, then send it to OpenAI
+        messages, tokens = fit_to_budget(messages)
+        prompt_tokens.append(tokens)
+        offered = selection.tools
+        tools_offered.append(len(offered))
+        content, tool_calls, turn_usage = None, [], None
+        started = time.perf_counter()
+        async for kind, payload in model_turn(messages, stream, budget, offered):
+            if kind == "token":
+                yield {"event": "token", "data": {"content": payload}}
+            elif kind == "usage":
+                turn_usage = payload
+            else:
+                content, tool_calls = payload
+        timings["model"] += time.perf_counter() - started
+        if turn_usage is None:
+            # Not reported (e.g. a server without stream usage): fall back to local counts
+            turn_usage = (tokens, count_tokens(content) + (count_tokens(json.dumps(tool_calls)) if tool_calls else 0))
+            usage["estimated"] = True
+        usage["promptTokens"] += turn_usage[0]
+        usage["completionTokens"] += turn_usage[1]
+
+        if not tool_calls or iteration >= AGENT_MAX_ITERATIONS:
+            break
+        iteration += 1
+        # A tool that was left out is still run; later iterations offer every tool
+        selection.expand_for([tc["function"]["name"] for tc in tool_calls])
+
+        # Add assistant message with tool calls to conversation
+        messages.append({"role": "assistant", "content": content, "tool_calls": tool_calls})
+        turn.append(messages[-1])
+
+        # Execute all tool calls of this turn concurrently, reporting each as it finishes
+        for tc in tool_calls:
+            yield {"event": "tool_start", "data": {"id": tc["id"], "name": tc["function"]["name"], "arguments": tc["function"]["arguments"]}}
+
+        async def timed_call(index: int, tc: dict):
+            started = time.perf_counter()
+            result, cached = await run_tool_call(tc, prefetch)
+            return index, result, cached, round((time.perf_counter() - started) * 1000, 1)
+
+        # Results go to the model as compact tables projected to the question's columns
+        started = time.perf_counter()
+        contents = [None] * len(tool_calls)
+        cached_flags = [False] * len(tool_calls)
+        for finished in asyncio.as_completed([timed_call(i, tc) for i, tc in enumerate(tool_calls)]):
+            index, result, cached, elapsed_ms = await finished
+            contents[index] = compact_tool_result(result, question=request.message)
+            cached_flags[index] = cached
+            tc = tool_calls[index]
+            yield {"event": "tool_end", "data": {
+                "id": tc["id"], "name": tc["function"]["name"], "durationMs": elapsed_ms, "cached": cached,
+                "error": result.get("error") if isinstance(result, dict) else None,
+                "tokens": count_tokens(contents[index]),
+                "rawTokens": count_tokens(json.dumps(result))
+            }}
+
+        timings["tools"] += time.perf_counter() - started
+
+        # Cache hits are marked so they are visible in tool_calls_made
+        for tc, cached in zip(tool_calls, cached_flags):
+            tool_calls_made.append(tc["function"]["name"] + (" (cached)" if cached else ""))
+
+        # Add tool results to conversation, in the order the model requested them
+        for tc, content_json in zip(tool_calls, contents):
+            messages.append({
+                "role": "tool",
+                "tool_call_id": tc["id"],
+                "content": content_json
+            })
+            turn.append(messages[-1])
+
+    AGENT_ITERATIONS.observe(iteration)
+    await save_turn(session, turn + [{"role": "assistant", "content": content or AGENT_FALLBACK_RESPONSE}])
+    yield {"event": "done", "data": {
+        "response": content or AGENT_FALLBACK_RESPONSE,
+        "tool_calls_made": tool_calls_made,
+        "iterations": iteration,
+        "promptTokens": prompt_tokens,
+        "toolsOffered": tools_offered,
+        "usage": usage,
+        "timingsMs": {k: round(v * 1000, 1) for k, v in timings.items()},
+        "prefetch": prefetch.finish(),
+        "routed": None,
+        "sessionId": session.id if session is not None else None
+    }}
 
 
 @app.post("/api/agent/chat", dependencies=[Depends(verify_token)])
@@ -764,85 +1515,74 @@ async def agent_chat(request: AgentChatRequest):
     2. OpenAI decides which tool(s) to call
     3. Backend executes tool calls against Azure/K8s
     4. Results sent back to OpenAI for formatting
-    5. Formatted response returned to user
+    5. Formatted response returned to user, with a session_id when one was
+       requested (start_session): send it with the next message instead of
+       the history
     """
-    if not openai_client:
-        raise HTTPException(status_code=500, detail="OpenAI API key not configured. Set OPENAI_API_KEY in environment.")
-
-    # Build conversation messages
-    messages = [{"role": "system", "content": AGENT_SYSTEM_PROMPT}]
-    
-    # Add conversation history (last 20 messages)
-    for msg in request.history[-20:]:
-        messages.append({"role": msg.role, "content": msg.content})
-    
-    # Add current user message
-    messages.append({"role": "user", "content": request.message})
-
-    tool_calls_made = []
+    require_model(request)
 
     try:
-        # Step 1: Send to OpenAI with tools
-        response = openai_client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=messages,
-            tools=AGENT_TOOLS,
-            tool_choice="auto",
-            max_tokens=1000,
-            temperature=0.3
-        )
-
-        assistant_message = response.choices[0].message
-
-        # Step 2: If OpenAI wants to call tools, execute them
-        max_iterations = 5  # Prevent infinite loops
-        iteration = 0
-
-        while assistant_message.tool_calls and iteration < max_iterations:
-            iteration += 1
-            
-            # Add assistant message with tool calls to conversation
-            messages.append(assistant_message)
-
-            # Execute each tool call
-            for tool_call in assistant_message.tool_calls:
-                fn_name = tool_call.function.name
-                fn_args = json.loads(tool_call.function.arguments)
-                
-                tool_calls_made.append(fn_name)
-                
-                # Execute the tool
-                result = await execute_tool(fn_name, fn_args)
-                
-                # Add tool result to conversation
-                messages.append({
-                    "role": "tool",
-                    "tool_call_id": tool_call.id,
-                    "content": json.dumps(result)
-                })
-
-            # Step 3: Send results back to OpenAI for formatting
-            response = openai_client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=messages,
-                tools=AGENT_TOOLS,
-                tool_choice="auto",
-                max_tokens=1000,
-                temperature=0.3
-            )
-
-            assistant_message = response.choices[0].message
+        async for event in agent_events(request):
+            if event["event"] == "done":
+                final = event["data"]
 
         # Return the final formatted response
         return AgentChatResponse(
-            response=assistant_message.content or "I wasn't able to generate a response. Please try again.",
-            tool_calls_made=tool_calls_made
+            response=final["response"],
+            tool_calls_made=final["tool_calls_made"],
+            session_id=final["sessionId"]
         )
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Agent error: {str(e)}")
 
 
+@app.get("/api/agent/sessions/stats", dependencies=[Depends(verify_token)])
+async def get_session_stats():
+    return agent_sessions.stats()
+
+@app.delete("/api/agent/sessions/{session_id}", dependencies=[Depends(verify_token)])
+async def delete_session(session_id: str):
+    """End a conversation: its history and tool results are discarded"""
+    return {"deleted": await agent_sessions.delete(session_id)}
+
+
+def sse_event(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@app.post("/api/agent/chat/stream", dependencies=[Depends(verify_token)])
+async def agent_chat_stream(request: AgentChatRequest):
+    """
+    Streaming variant of /api/agent/chat using Server-Sent Events.
+
+    Emits `start` immediately, `tool_start`/`tool_end` around each tool call,
+    `token` for each piece of the final answer as the model produces it, and
+    `done` with the full response. Failures are reported as an `error` event.
+    """
+    require_model(request)
+
+    async def event_stream():
+        started = time.perf_counter()
+        yield sse_event("start", {"message": request.message})
+        try:
+            async for event in agent_events(request, stream=True):
+                if event["event"] == "done":
+                    event["data"]["durationMs"] = round((time.perf_counter() - started) * 1000, 1)
+                yield sse_event(event["event"], event["data"])
+        except HTTPException as e:
+            yield sse_event("error", {"detail": e.detail})
+        except Exception as e:
+            yield sse_event("error", {"detail": f"Agent error: {str(e)}"})
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
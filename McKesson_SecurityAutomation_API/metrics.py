@@ -0,0 +1,195 @@
+"""
+Prometheus metrics for the backend.
+
+- Per-route request histograms and an in-flight gauge (MetricsMiddleware)
+- Per-upstream call histograms labelled by operation, e.g.
+  arm/managed_clusters.get, kubernetes/core_v1.list_namespaced_pod,
+  openai/chat.completions.create (track_upstream)
+- ARM remaining quota (x-ms-ratelimit-remaining-*), throttled responses and
+  client-side rate limiting (arm_throttle.py)
+- Cache hit ratios, informer state and agent iteration / tool / prefetch /
+  fast-path / tool selection counts
+
+Label values come from fixed sets only: route templates (never raw paths),
+operation names of the SDK methods called in code, tool names from the tool
+registry, status classes (2xx, 4xx, ...). Anything else collapses to "other".
+"""
+
+import re
+import time
+import types
+from contextlib import contextmanager
+from typing import Callable, Iterable, Optional
+
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, REGISTRY, generate_latest
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+REQUEST_LATENCY = Histogram(
+    "azure_api_request_duration_seconds", "HTTP request duration by route template",
+    ["method", "route", "status"], buckets=LATENCY_BUCKETS
+)
+REQUESTS_IN_FLIGHT = Gauge("azure_api_requests_in_flight", "HTTP requests being served")
+
+UPSTREAM_LATENCY = Histogram(
+    "azure_api_upstream_duration_seconds", "Upstream call duration by dependency and operation",
+    ["upstream", "operation", "outcome"], buckets=LATENCY_BUCKETS
+)
+UPSTREAM_IN_FLIGHT = Gauge("azure_api_upstream_in_flight", "Upstream calls in progress", ["upstream"])
+
+ARM_RATELIMIT_REMAINING = Gauge(
+    "azure_api_arm_ratelimit_remaining", "Last remaining quota reported by ARM (x-ms-ratelimit-remaining-<scope>)", ["scope"]
+)
+ARM_THROTTLED = Counter("azure_api_arm_throttled", "ARM responses with status 429")
+ARM_RATE_LIMIT = Gauge("azure_api_arm_rate_limit_per_second", "Current client-side ARM request rate")
+ARM_RATE_LIMIT_WAIT = Histogram(
+    "azure_api_arm_rate_limit_wait_seconds", "Time ARM calls waited for a client-side rate limit token",
+    buckets=(0, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+)
+
+AGENT_ITERATIONS = Histogram(
+    "azure_api_agent_iterations", "Tool-calling iterations per agent request", buckets=(0, 1, 2, 3, 4, 5)
+)
+AGENT_TOOL_CALLS = Histogram(
+    "azure_api_agent_tool_duration_seconds", "Agent tool call duration",
+    ["tool", "outcome"], buckets=LATENCY_BUCKETS
+)
+
+AGENT_PREFETCHES = Counter(
+    "azure_api_agent_prefetches", "Speculative tool prefetches by whether the model then called the tool",
+    ["tool", "outcome"]
+)
+
+AGENT_ROUTED = Counter(
+    "azure_api_agent_routed", "Agent questions by fast-path intent and outcome (answered, tool_error, model)",
+    ["intent", "outcome"]
+)
+
+AGENT_TOOL_SELECTION = Counter(
+    "azure_api_agent_tool_selection", "Agent turns by tools offered to the model (subset, full, expanded)",
+    ["outcome"]
+)
+
+_CAMEL = re.compile(r"(?<!^)(?=[A-Z])")
+_CLASS_SUFFIXES = ("Operations", "Api")
+
+
+def operation_name(fn: Callable) -> str:
+    """
+    Stable label for an SDK call: `managed_clusters.get` for a bound method of
+    ManagedClustersOperations, `core_v1.list_namespaced_pod` for CoreV1Api.
+    Lambdas and other anonymous callables become "other".
+    """
+    name = getattr(fn, "__name__", None)
+    if not name or name == "<lambda>":
+        return "other"
+    owner = getattr(fn, "__self__", None)
+    if owner is None or isinstance(owner, types.ModuleType):
+        return name
+    cls = type(owner).__name__
+    for suffix in _CLASS_SUFFIXES:
+        if cls.endswith(suffix) and cls != suffix:
+            cls = cls[: -len(suffix)]
+            break
+    return f"{_CAMEL.sub('_', cls).lower()}.{name}"
+
+
+@contextmanager
+def track_upstream(upstream: str, operation: str):
+    """Time one upstream call; outcome is "ok" or "error" """
+    UPSTREAM_IN_FLIGHT.labels(upstream).inc()
+    started = time.perf_counter()
+    outcome = "error"
+    try:
+        yield
+        outcome = "ok"
+    finally:
+        UPSTREAM_IN_FLIGHT.labels(upstream).dec()
+        UPSTREAM_LATENCY.labels(upstream, operation, outcome).observe(time.perf_counter() - started)
+
+
+def status_class(status: int) -> str:
+    return f"{status // 100}xx"
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording request duration per route template and requests in flight"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        REQUESTS_IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            REQUESTS_IN_FLIGHT.dec()
+            route = scope.get("route")
+            template = getattr(route, "path", None) or "unmatched"
+            REQUEST_LATENCY.labels(scope["method"], template, status_class(status["code"])).observe(
+                time.perf_counter() - started
+            )
+
+
+class StatsCollector:
+    """
+    Exposes stats the app already keeps (TTLCache.stats(), InformerManager.status())
+    at scrape time instead of double-counting them in Prometheus objects.
+    """
+
+    def __init__(self, caches: Callable[[], dict], informers: Optional[Callable[[], dict]] = None):
+        self.caches = caches
+        self.informers = informers
+
+    def collect(self) -> Iterable:
+        lookups = CounterMetricFamily(
+            "azure_api_cache_lookups", "Cache lookups by cache, endpoint and outcome",
+            labels=["cache", "endpoint", "outcome"]
+        )
+        hit_ratio = GaugeMetricFamily("azure_api_cache_hit_ratio", "Cache hit ratio (fresh + stale hits)", labels=["cache"])
+        entries = GaugeMetricFamily("azure_api_cache_entries", "Cached entries", labels=["cache"])
+        for cache_name, cache in self.caches().items():
+            stats = cache.stats()
+            for endpoint, counters in stats["endpoints"].items():
+                for outcome, value in counters.items():
+                    lookups.add_metric([cache_name, endpoint, outcome], value)
+            hit_ratio.add_metric([cache_name], stats["hitRatio"] or 0.0)
+            entries.add_metric([cache_name], stats["entries"])
+        yield lookups
+        yield hit_ratio
+        yield entries
+
+        if self.informers is None:
+            return
+        synced = GaugeMetricFamily("azure_api_informer_synced", "Informer store synced (1) or not (0)", labels=["informer"])
+        objects = GaugeMetricFamily("azure_api_informer_objects", "Objects in the informer store", labels=["informer"])
+        relists = CounterMetricFamily("azure_api_informer_relists", "Informer LIST calls", labels=["informer"])
+        for name, status in self.informers().items():
+            synced.add_metric([name], 1 if status["synced"] else 0)
+            objects.add_metric([name], status["objects"])
+            relists.add_metric([name], status["relists"])
+        yield synced
+        yield objects
+        yield relists
+
+
+def register_stats_collector(collector: StatsCollector):
+    REGISTRY.register(collector)
+
+
+def render_latest():
+    """(body, content type) for the /metrics endpoint"""
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
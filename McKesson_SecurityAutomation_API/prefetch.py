@@ -0,0 +1,193 @@
+"""
+Speculative prefetch of agent tool data.
+
+Most questions start with the same few reads (pods, deployments, cluster
+status), yet nothing is fetched until the first model round trip has decided
+which tools to call. At the start of a turn the Prefetcher scores each
+candidate call and starts the likely ones through ToolRegistry.prefetch, so
+their results are in the tool cache by the time the model asks for them and
+tool latency overlaps model latency.
+
+A candidate's score is its relevance times its learned precision:
+
+- relevance: 1.0 when the message matches the candidate's keywords and, for a
+  namespaced call, names its namespace (PREFETCH_UNSCOPED_RELEVANCE when it
+  names none); half that when only recent history matches; and at least the
+  share of past turns in which the model called it
+- precision: the share of the candidate's past prefetches that the model
+  actually used in that turn, starting from an optimistic prior
+
+Candidates scoring AGENT_PREFETCH_MIN_SCORE or more are started, at most
+AGENT_PREFETCH_MAX_CALLS per turn.
+"""
+
+import asyncio
+import os
+import re
+from typing import Dict, List, Optional, Sequence
+
+from metrics import AGENT_PREFETCHES
+from tools import ToolRegistry
+
+AGENT_PREFETCH_ENABLED = os.getenv("AGENT_PREFETCH_ENABLED", "true").lower() == "true"
+AGENT_PREFETCH_MAX_CALLS = int(os.getenv("AGENT_PREFETCH_MAX_CALLS", "3"))
+AGENT_PREFETCH_MIN_SCORE = float(os.getenv("AGENT_PREFETCH_MIN_SCORE", "0.5"))
+
+# Relevance of a namespaced candidate when the text names no namespace at all
+PREFETCH_UNSCOPED_RELEVANCE = 0.75
+# Weight of a keyword match found only in recent history
+PREFETCH_HISTORY_WEIGHT = 0.5
+# Recent user messages considered as history
+PREFETCH_HISTORY_MESSAGES = 2
+# Precision prior: as if 3 of 4 earlier prefetches had been used
+PREFETCH_PRIOR_USED = 3
+PREFETCH_PRIOR_ISSUED = 4
+# Popularity is shrunk towards 0 until this many turns have been seen
+PREFETCH_PRIOR_TURNS = 5
+
+
+class PrefetchCandidate:
+    """A tool call worth starting early, with the keywords that suggest it"""
+
+    def __init__(self, tool: str, arguments: Optional[dict] = None, keywords: str = ""):
+        self.tool = tool
+        self.arguments = arguments or {}
+        self.pattern = re.compile(keywords, re.IGNORECASE)
+        self.issued = 0     # turns it was prefetched in
+        self.used = 0       # ... and the model then called it
+        self.requested = 0  # turns the model called it, prefetched or not
+
+    @property
+    def label(self) -> str:
+        args = ",".join(f"{k}={v}" for k, v in sorted(self.arguments.items()))
+        return f"{self.tool}({args})"
+
+    @property
+    def precision(self) -> float:
+        return (self.used + PREFETCH_PRIOR_USED) / (self.issued + PREFETCH_PRIOR_ISSUED)
+
+
+class Prefetcher:
+    """
+    Scores the candidates for each agent turn, starts the likely ones and learns
+    from which of them the model actually called. `namespaces` are the names
+    recognized in questions; `semaphore` bounds prefetches together with the
+    agent's own tool calls.
+    """
+
+    def __init__(self, registry: ToolRegistry, candidates: Sequence[PrefetchCandidate],
+                 namespaces: Sequence[str] = (), semaphore: Optional[asyncio.Semaphore] = None,
+                 enabled: bool = AGENT_PREFETCH_ENABLED, max_calls: int = AGENT_PREFETCH_MAX_CALLS,
+                 min_score: float = AGENT_PREFETCH_MIN_SCORE):
+        self.registry = registry
+        self.candidates = list(candidates)
+        self.semaphore = semaphore
+        self.enabled = enabled
+        self.max_calls = max_calls
+        self.min_score = min_score
+        self.turns = 0
+        self._namespaces = {ns: re.compile(rf"\b{re.escape(ns)}\b", re.IGNORECASE) for ns in namespaces}
+        self._by_key = {registry.call_key(c.tool, c.arguments): c for c in self.candidates}
+        self._tasks = set()
+
+    def _cacheable(self, candidate: PrefetchCandidate) -> bool:
+        # Without a cache TTL nothing would keep the prefetched result
+        spec = self.registry.get(candidate.tool)
+        return spec is not None and spec.cache_ttl > 0
+
+    def _relevance(self, candidate: PrefetchCandidate, text: str) -> float:
+        if not text or not candidate.pattern.search(text):
+            return 0.0
+        namespace = candidate.arguments.get("namespace")
+        if namespace is None:
+            return 1.0
+        named = {ns for ns, pattern in self._namespaces.items() if pattern.search(text)}
+        if not named:
+            return PREFETCH_UNSCOPED_RELEVANCE
+        return 1.0 if namespace in named else 0.0
+
+    def score(self, candidate: PrefetchCandidate, message: str, history: Sequence[str] = ()) -> float:
+        recent = " ".join(history[-PREFETCH_HISTORY_MESSAGES:])
+        popularity = candidate.requested / (self.turns + PREFETCH_PRIOR_TURNS)
+        relevance = max(
+            self._relevance(candidate, message),
+            PREFETCH_HISTORY_WEIGHT * self._relevance(candidate, recent),
+            popularity,
+        )
+        return relevance * candidate.precision
+
+    def plan(self, message: str, history: Sequence[str] = ()) -> List[PrefetchCandidate]:
+        """Candidates to prefetch for this turn, most likely first"""
+        scored = [(self.score(c, message, history), c) for c in self.candidates if self._cacheable(c)]
+        ranked = sorted((item for item in scored if item[0] >= self.min_score), key=lambda item: -item[0])
+        return [c for _, c in ranked[:self.max_calls]]
+
+    def start(self, message: str, history: Sequence[str] = ()) -> "PrefetchTurn":
+        """Start this turn's prefetches in the background; call finish() on the result when the turn ends"""
+        planned = self.plan(message, history) if self.enabled else []
+        for candidate in planned:
+            task = asyncio.ensure_future(self._prefetch(candidate))
+            self._tasks.add(task)  # keep a reference until it is done
+            task.add_done_callback(self._tasks.discard)
+        return PrefetchTurn(self, planned)
+
+    async def _prefetch(self, candidate: PrefetchCandidate) -> bool:
+        try:
+            if self.semaphore is None:
+                return await self.registry.prefetch(candidate.tool, candidate.arguments)
+            async with self.semaphore:
+                return await self.registry.prefetch(candidate.tool, candidate.arguments)
+        except Exception:
+            return False  # speculative: the model's own call reports the failure
+
+    def _learn(self, started: List[PrefetchCandidate], requested: set):
+        self.turns += 1
+        for candidate in self.candidates:
+            called = candidate in requested
+            candidate.requested += called
+            if candidate in started:
+                candidate.issued += 1
+                candidate.used += called
+                AGENT_PREFETCHES.labels(candidate.tool, "used" if called else "unused").inc()
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "turns": self.turns,
+            "maxCalls": self.max_calls,
+            "minScore": self.min_score,
+            "candidates": {
+                c.label: {
+                    "prefetched": c.issued,
+                    "used": c.used,
+                    "requested": c.requested,
+                    "precision": round(c.precision, 3),
+                }
+                for c in self.candidates
+            },
+        }
+
+
+class PrefetchTurn:
+    """The prefetches of one agent turn, and which tools the model went on to call"""
+
+    def __init__(self, prefetcher: Prefetcher, started: List[PrefetchCandidate]):
+        self.prefetcher = prefetcher
+        self.started = started
+        self._requested = set()
+        self._finished = False
+
+    def requested(self, name: str, arguments: dict) -> bool:
+        """Record a tool call made by the model; returns whether it had been prefetched"""
+        candidate = self.prefetcher._by_key.get(self.prefetcher.registry.call_key(name, arguments))
+        if candidate is None:
+            return False
+        self._requested.add(candidate)
+        return candidate in self.started
+
+    def finish(self) -> Dict[str, int]:
+        """Update hit rates once per turn; returns the counts of prefetched and used calls"""
+        if not self._finished:
+            self._finished = True
+            self.prefetcher._learn(self.started, self._requested)
+        return {"started": len(self.started), "used": sum(1 for c in self.started if c in self._requested)}
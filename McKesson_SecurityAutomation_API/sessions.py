@@ -0,0 +1,204 @@
+"""
+Server-side agent conversation sessions.
+
+Without them the client resends up to 20 prior messages on every turn, and
+tool results from earlier turns are lost, so the model fetches the same data
+again. A session keeps the conversation on the server, including each turn's
+tool calls and their (compacted) results, and the client sends only the new
+message with its session_id. Sessions are only created when a client asks for
+one, so stateless clients do not leave one behind on every request.
+
+- State is bounded: tool results of earlier turns are shrunk to
+  SESSION_TOOL_RESULT_TOKEN_LIMIT, and whole turns (never a tool call without
+  its result) are dropped once the history exceeds SESSION_MAX_TOKENS or
+  SESSION_MAX_TURNS.
+- Sessions live in an in-memory LRU (SESSION_MAX_SESSIONS) and expire after
+  SESSION_IDLE_SECONDS without a turn.
+- With SESSION_DB_PATH set they are also written to SQLite, so they survive a
+  restart and every gunicorn worker sees the same sessions; the in-memory copy
+  is only used while its version matches the database.
+
+Concurrent turns on one session are not serialized: the last to finish wins.
+"""
+
+import json
+import os
+import secrets
+import sqlite3
+import time
+from collections import OrderedDict
+from typing import List, Optional
+
+from agent_context import compact_tool_result, count_tokens, message_tokens
+from executor import run_blocking
+from shared_cache import LocalConnections
+
+SESSION_MAX_SESSIONS = int(os.getenv("SESSION_MAX_SESSIONS", "1000"))
+SESSION_IDLE_SECONDS = float(os.getenv("SESSION_IDLE_SECONDS", "1800"))
+SESSION_MAX_TOKENS = int(os.getenv("SESSION_MAX_TOKENS", "2000"))
+SESSION_MAX_TURNS = int(os.getenv("SESSION_MAX_TURNS", "10"))
+SESSION_TOOL_RESULT_TOKEN_LIMIT = int(os.getenv("SESSION_TOOL_RESULT_TOKEN_LIMIT", "200"))
+SESSION_DB_PATH = os.getenv("SESSION_DB_PATH", "")
+SESSION_POOL = "sessions"
+
+# Expired rows are deleted every PRUNE_EVERY saves
+PRUNE_EVERY = 100
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id TEXT PRIMARY KEY, data TEXT NOT NULL, version INTEGER NOT NULL, updated_at REAL NOT NULL
+);
+"""
+
+
+class Session:
+    """One conversation: its messages (without the system prompt) grouped into turns"""
+
+    def __init__(self, session_id: str, messages: Optional[List[dict]] = None, turns: int = 0,
+                 version: int = 0, updated_at: Optional[float] = None):
+        self.id = session_id
+        self.messages = messages or []
+        self.turns = turns
+        self.version = version
+        self.updated_at = updated_at or time.time()
+
+    def user_messages(self) -> List[str]:
+        return [m["content"] for m in self.messages if m["role"] == "user"]
+
+    def record_turn(self, turn: List[dict]):
+        """Append a turn (user message, tool calls and results, answer) and re-apply the bounds"""
+        for i, m in enumerate(self.messages):
+            if m["role"] == "tool" and count_tokens(m["content"]) > SESSION_TOOL_RESULT_TOKEN_LIMIT:
+                try:
+                    result = json.loads(m["content"])
+                except (TypeError, ValueError):
+                    result = m["content"]
+                self.messages[i] = {**m, "content": compact_tool_result(result, SESSION_TOOL_RESULT_TOKEN_LIMIT)}
+        self.messages.extend(turn)
+        self.turns += 1
+
+        starts = [i for i, m in enumerate(self.messages) if m["role"] == "user"]
+        while len(starts) > 1 and (len(starts) > SESSION_MAX_TURNS or message_tokens(self.messages) > SESSION_MAX_TOKENS):
+            self.messages = self.messages[starts[1]:]
+            starts = [i - starts[1] for i in starts[1:]]
+
+    def to_json(self) -> str:
+        return json.dumps({"messages": self.messages, "turns": self.turns}, separators=(",", ":"))
+
+
+class SessionStore:
+    """LRU of sessions with idle expiry, optionally backed by SQLite at `path` (in the sessions pool)"""
+
+    def __init__(self, path: str = SESSION_DB_PATH, max_sessions: int = SESSION_MAX_SESSIONS,
+                 idle_seconds: float = SESSION_IDLE_SECONDS):
+        self.path = path
+        self.max_sessions = max_sessions
+        self.idle_seconds = idle_seconds
+        self._sessions: "OrderedDict[str, Session]" = OrderedDict()
+        self._connections = LocalConnections(path, _SCHEMA)
+        self._saves = 0
+        self.counts = {"created": 0, "resumed": 0, "expired": 0, "evicted": 0}
+
+    def _conn(self) -> sqlite3.Connection:
+        return self._connections.get()
+
+    # Blocking operations (run in the sessions pool)
+
+    def _read(self, session_id: str, version: Optional[int]) -> Optional[tuple]:
+        """(data, version, updated_at) of a live row; data is None if the row still has `version`"""
+        row = self._conn().execute(
+            "SELECT version, updated_at FROM sessions WHERE id = ? AND updated_at > ?",
+            (session_id, time.time() - self.idle_seconds)
+        ).fetchone()
+        if row is None:
+            return None
+        if row[0] == version:
+            return None, row[0], row[1]
+        data = self._conn().execute("SELECT data FROM sessions WHERE id = ?", (session_id,)).fetchone()
+        return (data[0], row[0], row[1]) if data else None
+
+    def _write(self, session_id: str, data: str, version: int, updated_at: float):
+        self._conn().execute(
+            "INSERT OR REPLACE INTO sessions (id, data, version, updated_at) VALUES (?, ?, ?, ?)",
+            (session_id, data, version, updated_at)
+        )
+        self._saves += 1
+        if self._saves % PRUNE_EVERY == 0:
+            self.prune()
+
+    def _delete(self, session_id: str) -> int:
+        return self._conn().execute("DELETE FROM sessions WHERE id = ?", (session_id,)).rowcount
+
+    def prune(self) -> int:
+        cursor = self._conn().execute(
+            "DELETE FROM sessions WHERE updated_at <= ?", (time.time() - self.idle_seconds,)
+        )
+        return cursor.rowcount
+
+    # Async API
+
+    def _idle(self, session: Session) -> bool:
+        return time.time() - session.updated_at >= self.idle_seconds
+
+    async def get(self, session_id: Optional[str]) -> Optional[Session]:
+        """The live session with this ID, or None if unknown or expired"""
+        if not session_id:
+            return None
+        session = self._sessions.get(session_id)
+        if session is not None and self._idle(session):
+            del self._sessions[session_id]
+            self.counts["expired"] += 1
+            session = None
+        if self.path:
+            row = await run_blocking(SESSION_POOL, self._read, session_id, session and session.version)
+            if row is None:
+                self._sessions.pop(session_id, None)
+                return None
+            if row[0] is not None:
+                data = json.loads(row[0])
+                session = Session(session_id, data["messages"], data["turns"], row[1], row[2])
+        if session is None:
+            return None
+        self._remember(session)
+        return session
+
+    async def open(self, session_id: Optional[str] = None, create: bool = True) -> Optional[Session]:
+        """Resume `session_id` if it is live, else start a new session (with a new ID), or None without `create`"""
+        session = await self.get(session_id)
+        if session is not None:
+            self.counts["resumed"] += 1
+            return session
+        if not create:
+            return None
+        self.counts["created"] += 1
+        return Session(secrets.token_urlsafe(16))
+
+    async def save(self, session: Session):
+        session.version += 1
+        session.updated_at = time.time()
+        self._remember(session)
+        if self.path:
+            await run_blocking(SESSION_POOL, self._write, session.id, session.to_json(), session.version,
+                               session.updated_at)
+
+    async def delete(self, session_id: str) -> bool:
+        removed = self._sessions.pop(session_id, None) is not None
+        if self.path:
+            removed = bool(await run_blocking(SESSION_POOL, self._delete, session_id)) or removed
+        return removed
+
+    def _remember(self, session: Session):
+        self._sessions[session.id] = session
+        self._sessions.move_to_end(session.id)
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+            self.counts["evicted"] += 1
+
+    def stats(self) -> dict:
+        return {
+            "active": len(self._sessions),
+            "maxSessions": self.max_sessions,
+            "idleSeconds": self.idle_seconds,
+            "persisted": bool(self.path),
+            **self.counts,
+        }
@@ -0,0 +1,219 @@
+"""
+Cache tier shared by the gunicorn workers of one instance.
+
+With several workers each process has its own TTLCache, so every worker pays
+for its own ARM and Kubernetes reads and the upstream load grows with the worker
+count. SharedStore keeps cached values in a SQLite database in WAL mode (by
+default under /dev/shm, i.e. in memory), needing no external service:
+
+- TTLCache stays the first tier; SQLite is only consulted on a local miss or
+  when the local value goes stale.
+- Refreshes are coordinated with a per-key lease: one worker loads the value
+  and writes it back while the others wait for it (or keep serving a stale
+  value), so a refresh costs one upstream call per instance, not per worker.
+
+Enabled by setting SHARED_CACHE_PATH (gunicorn.conf.py does this by default).
+Values must be JSON-serializable to be shared; anything else stays local.
+"""
+
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Hashable, Optional, Tuple
+
+from executor import run_blocking
+
+SHARED_CACHE_PATH = os.getenv("SHARED_CACHE_PATH", "")
+# How long a worker may hold a refresh lease before others take over
+SHARED_CACHE_LEASE_SECONDS = float(os.getenv("SHARED_CACHE_LEASE_SECONDS", "30"))
+SHARED_CACHE_POLL_SECONDS = float(os.getenv("SHARED_CACHE_POLL_SECONDS", "0.05"))
+SHARED_CACHE_POOL = "shared_cache"
+
+# Rows past TTL plus this margin are deleted every PRUNE_EVERY writes
+PRUNE_GRACE_SECONDS = 3600
+PRUNE_EVERY = 200
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    cache TEXT NOT NULL, key TEXT NOT NULL, endpoint TEXT NOT NULL,
+    value TEXT NOT NULL, stored_at REAL NOT NULL, ttl REAL NOT NULL,
+    PRIMARY KEY (cache, key)
+);
+CREATE TABLE IF NOT EXISTS leases (
+    cache TEXT NOT NULL, key TEXT NOT NULL, owner TEXT NOT NULL, expires REAL NOT NULL,
+    PRIMARY KEY (cache, key)
+);
+"""
+
+
+class LocalConnections:
+    """
+    One SQLite connection per thread to the database at `path`: autocommit, WAL
+    mode (readers never block the writer, across processes too) and `schema`
+    created on first use. Shared by the cache and the agent session store.
+    """
+
+    def __init__(self, path: str, schema: str):
+        self.path = path
+        self.schema = schema
+        self._local = threading.local()
+
+    def get(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(self.schema)
+            self._local.conn = conn
+        return conn
+
+
+class SharedStore:
+    """
+    One namespace (e.g. "arm", "tools") of the shared SQLite cache. Blocking
+    SQLite calls run in their own small thread pool, one connection per thread.
+    """
+
+    def __init__(self, path: str, namespace: str, lease_seconds: float = SHARED_CACHE_LEASE_SECONDS):
+        self.path = path
+        self.namespace = namespace
+        self.lease_seconds = lease_seconds
+        # Unique per worker process (and per store, so two stores in one process do not share leases)
+        self.owner = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self._connections = LocalConnections(path, _SCHEMA)
+        self._writes = 0
+
+    def _conn(self) -> sqlite3.Connection:
+        return self._connections.get()
+
+    @staticmethod
+    def encode_key(key: Hashable) -> Tuple[str, str]:
+        """(serialized key, endpoint name) for a TTLCache key"""
+        endpoint = str(key[0]) if isinstance(key, tuple) and key else str(key)
+        return json.dumps(key, default=str, separators=(",", ":")), endpoint
+
+    # Blocking operations (run in the shared_cache pool)
+
+    def get(self, key: str) -> Optional[Tuple[Any, float, float]]:
+        """(value, age seconds, ttl) or None"""
+        row = self._conn().execute(
+            "SELECT value, stored_at, ttl FROM entries WHERE cache = ? AND key = ?", (self.namespace, key)
+        ).fetchone()
+        if row is None:
+            return None
+        return json.loads(row[0]), max(time.time() - row[1], 0.0), row[2]
+
+    def try_acquire(self, key: str) -> bool:
+        """Take the refresh lease for `key` unless another worker holds an unexpired one"""
+        now = time.time()
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT owner, expires FROM leases WHERE cache = ? AND key = ?", (self.namespace, key)
+            ).fetchone()
+            if row is not None and row[0] != self.owner and row[1] > now:
+                return False
+            conn.execute(
+                "INSERT OR REPLACE INTO leases (cache, key, owner, expires) VALUES (?, ?, ?, ?)",
+                (self.namespace, key, self.owner, now + self.lease_seconds)
+            )
+            return True
+        finally:
+            conn.execute("COMMIT")
+
+    def release(self, key: str):
+        self._conn().execute(
+            "DELETE FROM leases WHERE cache = ? AND key = ? AND owner = ?", (self.namespace, key, self.owner)
+        )
+
+    def put(self, key: str, endpoint: str, value_json: str, ttl: float):
+        """Store a value and release our lease in one transaction"""
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                "INSERT OR REPLACE INTO entries (cache, key, endpoint, value, stored_at, ttl) VALUES (?, ?, ?, ?, ?, ?)",
+                (self.namespace, key, endpoint, value_json, time.time(), ttl)
+            )
+            conn.execute(
+                "DELETE FROM leases WHERE cache = ? AND key = ? AND owner = ?", (self.namespace, key, self.owner)
+            )
+        finally:
+            conn.execute("COMMIT")
+        self._writes += 1
+        if self._writes % PRUNE_EVERY == 0:
+            self.prune()
+
+    def prune(self) -> int:
+        cursor = self._conn().execute(
+            "DELETE FROM entries WHERE cache = ? AND stored_at + ttl + ? < ?",
+            (self.namespace, PRUNE_GRACE_SECONDS, time.time())
+        )
+        return cursor.rowcount
+
+    def invalidate(self, prefix: Optional[str] = None) -> int:
+        if prefix is None:
+            cursor = self._conn().execute("DELETE FROM entries WHERE cache = ?", (self.namespace,))
+        else:
+            cursor = self._conn().execute(
+                "DELETE FROM entries WHERE cache = ? AND substr(endpoint, 1, ?) = ?",
+                (self.namespace, len(prefix), prefix)
+            )
+        return cursor.rowcount
+
+    def stats(self) -> dict:
+        conn = self._conn()
+        entries = conn.execute("SELECT COUNT(*) FROM entries WHERE cache = ?", (self.namespace,)).fetchone()[0]
+        leases = conn.execute(
+            "SELECT COUNT(*) FROM leases WHERE cache = ? AND expires > ?", (self.namespace, time.time())
+        ).fetchone()[0]
+        return {"path": self.path, "entries": entries, "refreshing": leases, "worker": self.owner}
+
+    # Coordinated load
+
+    async def load(self, key: Hashable, loader: Callable[[], Awaitable[Any]], ttl: float,
+                   stale_seconds: float = 0) -> Tuple[Any, float, str]:
+        """
+        Value for `key` as (value, age, source), where source is "shared" if
+        another worker had already stored it and "loaded" if `loader` ran here.
+
+        A fresh shared value is used as is. Otherwise the worker holding the
+        refresh lease calls `loader`; the rest serve the shared value if it is
+        within `stale_seconds` of its TTL, else wait for the holder to store it.
+        """
+        skey, endpoint = self.encode_key(key)
+        while True:
+            row = await run_blocking(SHARED_CACHE_POOL, self.get, skey)
+            if row is not None and row[1] < row[2]:
+                return row[0], row[1], "shared"
+            if await run_blocking(SHARED_CACHE_POOL, self.try_acquire, skey):
+                break
+            if row is not None and row[1] < row[2] + stale_seconds:
+                return row[0], row[1], "shared"
+            # Another worker is loading it; its lease expiry bounds the wait
+            await asyncio.sleep(SHARED_CACHE_POLL_SECONDS)
+
+        try:
+            value = await loader()
+        except BaseException:
+            await run_blocking(SHARED_CACHE_POOL, self.release, skey)
+            raise
+        try:
+            value_json = json.dumps(value, separators=(",", ":"))
+        except (TypeError, ValueError):
+            await run_blocking(SHARED_CACHE_POOL, self.release, skey)
+        else:
+            await run_blocking(SHARED_CACHE_POOL, self.put, skey, endpoint, value_json, ttl)
+        return value, 0.0, "loaded"
+
+
+def shared_store(namespace: str) -> Optional[SharedStore]:
+    """SharedStore for `namespace` when SHARED_CACHE_PATH is set, else None (process-local caching)"""
+    return SharedStore(SHARED_CACHE_PATH, namespace) if SHARED_CACHE_PATH else None
@@ -4,5 +4,10 @@
 # Load environment variables
 export $(cat .env.production | xargs)
 
+if [ "${WEB_CONCURRENCY:-1}" -gt 1 ]; then
+    # Multi-worker mode: uvicorn workers under gunicorn sharing one cache (see gunicorn.conf.py)
+    exec gunicorn -c gunicorn.conf.py app:app
+fi
+
 # Start FastAPI with uvicorn
 python -m uvicorn main:app --host 0.0.0.0 --port 8000
@@ -0,0 +1,398 @@
+"""
+Unit tests for the OpenAI agent endpoint (tool execution and orchestration)
+"""
+
+import asyncio
+import json
+import os
+import time
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, Mock, patch
+
+import pytest
+
+BEARER_TOKEN = "your-secret-token-123"
+HEADERS = {"Authorization": f"Bearer {BEARER_TOKEN}"}
+
+
+@pytest.fixture
+def main_module():
+    """Import the backend with dummy Azure credentials"""
+    with patch.dict(os.environ, {
+        'VITE_AZURE_TENANT_ID': '33b0dd0d-0cdb-43e3-885b-68259cb8efef',
+        'VITE_AZURE_CLIENT_ID': '85336049-1660-4b67-8ddf-0ba4e50e914b',
+        'VITE_AZURE_CLIENT_SECRET': 'test-secret',
+        'VITE_BEARER_TOKEN': BEARER_TOKEN
+    }):
+        import main
+        from cache import TTLCache
+        # Fresh tool cache per test so memoized results do not leak between tests;
+        # no speculative fetches or templated answers unless a test turns them on
+        with patch.object(main.tool_registry, "cache", TTLCache(stale_seconds=0)), \
+             patch.object(main.prefetcher, "enabled", False), \
+             patch.object(main.intent_router, "enabled", False):
+            yield main
+
+
+def tool_call(call_id: str, name: str, arguments: str = "{}"):
+    return SimpleNamespace(id=call_id, type="function", function=SimpleNamespace(name=name, arguments=arguments))
+
+
+def completion(content=None, tool_calls=None):
+    message = SimpleNamespace(role="assistant", content=content, tool_calls=tool_calls)
+    return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+
+def test_parallel_tool_calls_run_concurrently(main_module):
+    """Test 1: Tool calls from one turn overlap and results keep tool_call_id order"""
+    from starlette.testclient import TestClient
+
+    calls = [
+        tool_call("call_1", "list_pods", '{"namespace": "hsps"}'),
+        tool_call("call_2", "list_pods", '{"namespace": "star"}'),
+        tool_call("call_3", "get_deployments", '{"namespace": "hsps"}'),
+    ]
+    fake_openai = Mock()
+    fake_openai.chat.completions.create = AsyncMock(side_effect=[
+        completion(tool_calls=calls),
+        completion(content="All pods are healthy."),
+    ])
+
+    # Later calls finish first, so ordering cannot depend on completion order
+    delays = {("list_pods", "hsps"): 0.3, ("list_pods", "star"): 0.2, ("get_deployments", "hsps"): 0.1}
+
+    async def slow_tool(name, args):
+        await asyncio.sleep(delays[(name, args["namespace"])])
+        return {"tool": name, "namespace": args["namespace"]}, False
+
+    with patch.object(main_module, "openai_client", fake_openai), \
+         patch.object(main_module.tool_registry, "execute", side_effect=slow_tool):
+        started = time.perf_counter()
+        response = TestClient(main_module.app).post(
+            "/api/agent/chat", json={"message": "How are my pods?"}, headers=HEADERS
+        )
+        elapsed = time.perf_counter() - started
+
+    assert response.status_code == 200
+    assert response.json()["tool_calls_made"] == ["list_pods", "list_pods", "get_deployments"]
+    assert elapsed < 0.55
+
+    followup_messages = fake_openai.chat.completions.create.call_args_list[1].kwargs["messages"]
+    tool_messages = [m for m in followup_messages if isinstance(m, dict) and m["role"] == "tool"]
+    assert [m["tool_call_id"] for m in tool_messages] == ["call_1", "call_2", "call_3"]
+
+
+def test_tool_call_deadline(main_module):
+    """Test 2: A tool exceeding its deadline returns an error instead of hanging the turn"""
+    async def hung_logs(namespace, pod_name):
+        await asyncio.sleep(5)
+
+    spec = main_module.tool_registry.get("get_pod_logs")
+    with patch.object(spec, "timeout", 0.05), patch.object(spec, "fetch", hung_logs):
+        call = {"id": "call_1", "type": "function", "function": {"name": "get_pod_logs", "arguments": '{"pod_name": "x"}'}}
+        result, cached = asyncio.run(main_module.run_tool_call(call))
+
+    assert "timed out" in result["error"]
+    assert cached is False
+
+
+def chunk(content=None, tool_calls=None):
+    delta = SimpleNamespace(content=content, tool_calls=tool_calls)
+    return SimpleNamespace(choices=[SimpleNamespace(delta=delta)])
+
+
+def tool_delta(index, call_id=None, name=None, arguments=None):
+    return SimpleNamespace(index=index, id=call_id, function=SimpleNamespace(name=name, arguments=arguments))
+
+
+def parse_sse(body: str):
+    events = []
+    for block in body.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+def test_streaming_chat_emits_tool_and_token_events(main_module):
+    """Test 3: The SSE endpoint reports tool timings and streams the answer token by token"""
+    from starlette.testclient import TestClient
+
+    async def stream_of(*chunks):
+        for c in chunks:
+            yield c
+
+    async def fake_create(**kwargs):
+        assert kwargs["stream"] is True
+        if not any(isinstance(m, dict) and m["role"] == "tool" for m in kwargs["messages"]):
+            # First round trip: the tool call arrives split across deltas
+            return stream_of(
+                chunk(tool_calls=[tool_delta(0, "call_1", "list_pods", '{"names')]),
+                chunk(tool_calls=[tool_delta(0, arguments='pace": "star"}')]),
+            )
+        return stream_of(chunk("STAR has "), chunk("2 pods."), SimpleNamespace(choices=[]))
+
+    fake_openai = Mock()
+    fake_openai.chat.completions.create = AsyncMock(side_effect=fake_create)
+
+    async def fake_tool(name, args):
+        return {"namespace": args["namespace"], "count": 2}, False
+
+    with patch.object(main_module, "openai_client", fake_openai), \
+         patch.object(main_module.tool_registry, "execute", side_effect=fake_tool):
+        response = TestClient(main_module.app).post(
+            "/api/agent/chat/stream", json={"message": "pods in star?"}, headers=HEADERS
+        )
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = parse_sse(response.text)
+    names = [e[0] for e in events]
+    assert names == ["start", "tool_start", "tool_end", "token", "token", "done"]
+    assert events[1][1]["arguments"] == '{"namespace": "star"}'
+    assert "durationMs" in events[2][1]
+    assert events[-1][1]["response"] == "STAR has 2 pods."
+    assert events[-1][1]["tool_calls_made"] == ["list_pods"]
+
+
+def test_every_agent_tool_is_registered(main_module):
+    """Test 4: Each AGENT_TOOLS entry has a registered fetch function shared with its REST endpoint"""
+    names = [t["function"]["name"] for t in main_module.AGENT_TOOLS]
+    assert sorted(names) == sorted(main_module.tool_registry.names())
+    assert main_module.tool_registry.get("list_pods").fetch is main_module.fetch_pods
+    assert main_module.tool_registry.get("get_pod_logs").timeout <= main_module.tool_registry.get("list_pods").timeout
+
+
+def test_done_event_reports_usage_and_time_split(main_module):
+    """Test 5: Token usage reported by the API and model/tool time are summed over the turn"""
+    async def fake_create(**kwargs):
+        await asyncio.sleep(0.05)
+        if not any(isinstance(m, dict) and m["role"] == "tool" for m in kwargs["messages"]):
+            response = completion(tool_calls=[tool_call("call_1", "list_pods", '{"namespace": "hsps"}')])
+            response.usage = SimpleNamespace(prompt_tokens=1200, completion_tokens=20)
+            return response
+        response = completion(content="All good.")
+        response.usage = SimpleNamespace(prompt_tokens=1300, completion_tokens=5)
+        return response
+
+    fake_openai = Mock()
+    fake_openai.chat.completions.create = AsyncMock(side_effect=fake_create)
+
+    async def slow_tool(name, args):
+        await asyncio.sleep(0.1)
+        return {"pods": []}, False
+
+    async def run():
+        events = []
+        async for event in main_module.agent_events(main_module.AgentChatRequest(message="pods?")):
+            events.append(event)
+        return events[-1]["data"]
+
+    with patch.object(main_module, "openai_client", fake_openai), \
+         patch.object(main_module.tool_registry, "execute", side_effect=slow_tool):
+        done = asyncio.run(run())
+
+    assert done["usage"] == {"promptTokens": 2500, "completionTokens": 25, "estimated": False}
+    assert done["timingsMs"]["model"] >= 100
+    assert 100 <= done["timingsMs"]["tools"] < 200
+
+
+def test_prefetched_tool_data_is_reused_by_the_model(main_module):
+    """Test 6: Likely tool data loads during the first model call and the model's call finds it cached"""
+    fetches = []
+
+    async def fetch_pods(namespace: str):
+        fetches.append(namespace)
+        await asyncio.sleep(0.05)
+        return [{"name": f"{namespace}-app-0", "status": "Running"}]
+
+    async def fake_create(**kwargs):
+        await asyncio.sleep(0.1)
+        if not any(isinstance(m, dict) and m["role"] == "tool" for m in kwargs["messages"]):
+            return completion(tool_calls=[tool_call("call_1", "list_pods", '{"namespace": "star"}')])
+        return completion(content="STAR pods are running.")
+
+    fake_openai = Mock()
+    fake_openai.chat.completions.create = AsyncMock(side_effect=fake_create)
+    prefetcher = main_module.Prefetcher(
+        main_module.tool_registry,
+        [main_module.PrefetchCandidate("list_pods", {"namespace": ns}, r"\bpods?\b") for ns in ("hsps", "star")],
+        namespaces=["hsps", "star"], enabled=True
+    )
+
+    async def run():
+        events = []
+        request = main_module.AgentChatRequest(message="Are the STAR pods running?")
+        async for event in main_module.agent_events(request):
+            events.append(event)
+        return events
+
+    with patch.object(main_module, "openai_client", fake_openai), \
+         patch.object(main_module, "prefetcher", prefetcher), \
+         patch.object(main_module.tool_registry.get("list_pods"), "fetch", fetch_pods):
+        events = asyncio.run(run())
+
+    done = events[-1]["data"]
+    tool_end = next(e for e in events if e["event"] == "tool_end")
+    assert fetches == ["star"]
+    assert tool_end["data"]["cached"] is True
+    assert tool_end["data"]["durationMs"] < 20
+    assert done["prefetch"] == {"started": 1, "used": 1}
+    assert prefetcher.stats()["candidates"]["list_pods(namespace=star)"]["used"] == 1
+
+
+def test_simple_question_is_answered_without_the_model(main_module):
+    """Test 7: A routed question is answered from the tool result; a failing tool falls back to the model"""
+    from starlette.testclient import TestClient
+
+    pods = {"namespace": "star", "count": 2, "pods": [
+        {"name": "star-app-0", "status": "Running", "ready": True, "restarts": 0, "age": "2d", "ip": None},
+        {"name": "star-app-1", "status": "Pending", "ready": False, "restarts": 0, "age": "1m", "ip": None},
+    ]}
+    fake_openai = Mock()
+    fake_openai.chat.completions.create = AsyncMock(return_value=completion(content="Could not list pods."))
+    router = main_module.IntentRouter(namespaces=["hsps", "star"], enabled=True)
+
+    with patch.object(main_module, "openai_client", fake_openai), \
+         patch.object(main_module, "intent_router", router), \
+         patch.object(main_module.tool_registry, "execute", AsyncMock(return_value=(pods, False))):
+        client = TestClient(main_module.app)
+        routed = client.post("/api/agent/chat", json={"message": "List the pods in star"}, headers=HEADERS)
+        fake_openai.chat.completions.create.assert_not_called()
+        main_module.tool_registry.execute.return_value = ({"error": "forbidden"}, False)
+        failed = client.post("/api/agent/chat", json={"message": "List the pods in star"}, headers=HEADERS)
+        stats = client.get("/api/agent/router/stats", headers=HEADERS).json()
+
+    assert routed.json()["tool_calls_made"] == ["list_pods"]
+    assert "**star** has 2 pods: 1 running, 1 ready." in routed.json()["response"]
+    assert "| star-app-1 | Pending | False | 0 | 1m |" in routed.json()["response"]
+    assert failed.json()["response"] == "Could not list pods."
+    assert fake_openai.chat.completions.create.call_count == 1
+    assert stats["questions"] == 2 and stats["answered"] == 1 and stats["toolErrors"] == 1
+    assert stats["hitRate"] == 0.5
+
+
+def test_model_is_offered_relevant_tools_until_it_needs_another(main_module):
+    """Test 8: A pods question offers the Kubernetes tools; calling an omitted tool offers them all"""
+    offered = []
+
+    async def fake_create(**kwargs):
+        offered.append([t["function"]["name"] for t in kwargs["tools"]])
+        if len(offered) == 1:
+            return completion(tool_calls=[tool_call("call_1", "get_aks_cluster_status")])
+        return completion(content="The cluster is running.")
+
+    fake_openai = Mock()
+    fake_openai.chat.completions.create = AsyncMock(side_effect=fake_create)
+    execute = AsyncMock(return_value=({"powerState": "Running"}, False))
+
+    async def run():
+        events = []
+        async for event in main_module.agent_events(main_module.AgentChatRequest(message="Why do star pods restart?")):
+            events.append(event)
+        return events[-1]["data"]
+
+    with patch.object(main_module, "openai_client", fake_openai), \
+         patch.object(main_module.tool_registry, "execute", execute):
+        done = asyncio.run(run())
+
+    assert set(offered[0]) == {"list_pods", "get_pod_details", "get_deployments", "get_services", "get_pod_logs"}
+    assert len(offered[1]) == len(main_module.AGENT_TOOLS)
+    execute.assert_awaited_once_with("get_aks_cluster_status", {})
+    assert done["toolsOffered"] == [5, len(main_module.AGENT_TOOLS)]
+
+
+def test_session_keeps_history_and_tool_results_server_side(main_module):
+    """Test 9: With a session_id the client sends only the message; earlier tool results stay in the prompt;
+    requests that ask for no session create none"""
+    from starlette.testclient import TestClient
+    from sessions import SessionStore
+
+    prompts = []
+
+    async def fake_create(**kwargs):
+        prompts.append(kwargs["messages"])
+        if len(prompts) == 1:
+            return completion(tool_calls=[tool_call("call_1", "list_pods", '{"namespace": "star"}')])
+        return completion(content=f"answer {len(prompts)}")
+
+    fake_openai = Mock()
+    fake_openai.chat.completions.create = AsyncMock(side_effect=fake_create)
+    pods = {"namespace": "star", "count": 1, "pods": [{"name": "star-app-0", "status": "Running", "ready": True}]}
+
+    store = SessionStore(path="")
+    with patch.object(main_module, "openai_client", fake_openai), \
+         patch.object(main_module, "agent_sessions", store), \
+         patch.object(main_module.tool_registry, "execute", AsyncMock(return_value=(pods, False))):
+        client = TestClient(main_module.app)
+        first = client.post("/api/agent/chat", json={"message": "How is star?", "start_session": True},
+                            headers=HEADERS).json()
+        second = client.post("/api/agent/chat", json={"message": "Any restarts there?", "session_id": first["session_id"]},
+                             headers=HEADERS).json()
+        other = client.post("/api/agent/chat", json={"message": "Hi", "session_id": "unknown"}, headers=HEADERS).json()
+        deleted = client.delete(f"/api/agent/sessions/{first['session_id']}", headers=HEADERS).json()
+        stateless = client.post("/api/agent/chat", json={"message": "Hello"}, headers=HEADERS).json()
+
+    assert stateless["session_id"] is None
+    assert store.counts["created"] == 2
+    assert second["session_id"] == first["session_id"]
+    assert other["session_id"] not in (first["session_id"], "unknown")
+    assert deleted == {"deleted": True}
+    followup = prompts[2]
+    assert [m["role"] for m in followup] == ["system", "user", "assistant", "tool", "assistant", "user"]
+    assert "star-app-0" in followup[3]["content"]
+    assert followup[4]["content"] == "answer 2"
+    assert prompts[3][1:] == [{"role": "user", "content": "Hi"}]
+
+
+def test_routed_questions_need_no_openai_key(main_module):
+    """Test 10: Without an OpenAI key routed questions are still answered; a failed routed tool emits no tool events"""
+    from starlette.testclient import TestClient
+
+    pods = {"namespace": "star", "count": 0, "pods": []}
+    router = main_module.IntentRouter(namespaces=["hsps", "star"], enabled=True)
+    execute = AsyncMock(return_value=(pods, False))
+
+    events = []
+
+    async def run(message):
+        async for event in main_module.agent_events(main_module.AgentChatRequest(message=message)):
+            events.append(event)
+
+    with patch.object(main_module, "openai_client", None), \
+         patch.object(main_module, "intent_router", router), \
+         patch.object(main_module.tool_registry, "execute", execute):
+        client = TestClient(main_module.app)
+        routed = client.post("/api/agent/chat", json={"message": "List the pods in star"}, headers=HEADERS)
+        unrouted = client.post("/api/agent/chat", json={"message": "Why is star slow?"}, headers=HEADERS)
+        execute.return_value = ({"error": "forbidden"}, False)
+        # The routed tool fails and, with no model to fall back to, the turn ends without tool events
+        with pytest.raises(main_module.HTTPException):
+            asyncio.run(run("List the pods in star"))
+
+    assert routed.status_code == 200
+    assert routed.json()["response"] == "There are no pods in the **star** namespace."
+    assert unrouted.status_code == 500
+    assert "OpenAI API key not configured" in unrouted.json()["detail"]
+    assert events == []
+
+
+def test_history_only_requests_create_no_session(main_module):
+    """Test 11: Clients that resend their history without a session_id stay stateless"""
+    from starlette.testclient import TestClient
+    from sessions import SessionStore
+
+    fake_openai = Mock()
+    fake_openai.chat.completions.create = AsyncMock(return_value=completion(content="Fine."))
+    store = SessionStore(path="")
+
+    with patch.object(main_module, "openai_client", fake_openai), \
+         patch.object(main_module, "agent_sessions", store):
+        client = TestClient(main_module.app)
+        history = [{"role": "user", "content": "Hi"}, {"role": "assistant", "content": "Hello."}]
+        first = client.post("/api/agent/chat", json={"message": "How is star?", "history": history}, headers=HEADERS)
+        history += [{"role": "user", "content": "How is star?"}, {"role": "assistant", "content": "Fine."}]
+        second = client.post("/api/agent/chat", json={"message": "And hsps?", "history": history}, headers=HEADERS)
+
+    assert first.json()["session_id"] is None and second.json()["session_id"] is None
+    assert store.stats()["active"] == 0 and store.counts["created"] == 0
+    assert fake_openai.chat.completions.create.call_args.kwargs["messages"][1:5] == history
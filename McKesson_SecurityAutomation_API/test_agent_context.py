@@ -0,0 +1,111 @@
+"""
+Unit tests for token-budgeted agent context compaction
+"""
+
+import json
+
+from agent_context import compact_tool_result, count_tokens, decode_table, fit_to_budget, message_tokens
+
+
+def make_pods(count: int, unhealthy=()):
+    pods = []
+    for i in range(count):
+        name = f"hsps-worker-{i:04d}"
+        bad = name in unhealthy
+        pods.append({
+            "name": name,
+            "status": "CrashLoopBackOff" if bad else "Running",
+            "ready": not bad,
+            "restarts": 7 if bad else 0,
+            "age": "3d",
+            "ip": f"10.0.{i // 256}.{i % 256}"
+        })
+    return {"namespace": "hsps", "pods": pods, "count": len(pods)}
+
+
+def test_small_results_are_not_summarized():
+    """Test 1: Results under the limit keep every row"""
+    result = make_pods(3)
+    compacted = json.loads(compact_tool_result(result, max_tokens=1000))
+    assert [row[0] for row in compacted["pods"]["rows"]] == [p["name"] for p in result["pods"]]
+    assert compacted["count"] == 3
+
+
+def test_large_pod_list_keeps_unhealthy_pods():
+    """Test 2: Hundreds of pods compact to the unhealthy ones plus an aggregate"""
+    result = make_pods(500, unhealthy={"hsps-worker-0042", "hsps-worker-0317"})
+    text = compact_tool_result(result, max_tokens=800)
+
+    assert count_tokens(text) <= 800
+    compacted = json.loads(text)
+    pods = compacted["pods"]
+    assert [row[0] for row in pods["unhealthy"]["rows"]] == ["hsps-worker-0042", "hsps-worker-0317"]
+    assert pods["healthyCount"] == 498
+    assert pods["healthyByStatus"] == {"Running": 498}
+    assert compacted["count"] == 500
+
+
+def test_logs_keep_most_recent_lines():
+    """Test 3: Log payloads keep the newest lines that fit"""
+    result = {"podName": "p", "namespace": "hsps", "logs": [f"line {i} " + "x" * 80 for i in range(200)]}
+    compacted = json.loads(compact_tool_result(result, max_tokens=300))
+
+    assert compacted["logs"][-1].startswith("line 199 ")
+    assert compacted["logsOmitted"] == 200 - len(compacted["logs"])
+
+
+def test_prompt_fitted_to_budget():
+    """Test 4: Old history is dropped first and earlier tool results are shrunk"""
+    history = []
+    for i in range(10):
+        history.append({"role": "user", "content": f"question {i} " + "q" * 400})
+        history.append({"role": "assistant", "content": "a" * 400})
+    big_result = compact_tool_result(make_pods(60), max_tokens=10_000)
+    messages = [{"role": "system", "content": "You are helpful."}] + history + [
+        {"role": "user", "content": "How are my pods?"},
+        {"role": "assistant", "content": None, "tool_calls": [{"id": "1", "type": "function", "function": {"name": "list_pods", "arguments": "{}"}}]},
+        {"role": "tool", "tool_call_id": "1", "content": big_result},
+        {"role": "assistant", "content": None, "tool_calls": [{"id": "2", "type": "function", "function": {"name": "get_pod_logs", "arguments": "{}"}}]},
+        {"role": "tool", "tool_call_id": "2", "content": '{"logs": []}'},
+    ]
+    assert message_tokens(messages) > 2000
+
+    fitted, tokens = fit_to_budget(messages, budget=1200)
+
+    assert tokens == message_tokens(fitted) <= 1200
+    assert fitted[0]["content"] == "You are helpful."
+    assert fitted[1]["role"] == "system" and "earlier messages omitted" in fitted[1]["content"]
+    assert [m["role"] for m in fitted[-5:]] == ["user", "assistant", "tool", "assistant", "tool"]
+    assert fitted[-1]["content"] == '{"logs": []}'
+
+
+def test_list_results_encode_as_projected_tables():
+    """Test 5: Rows become column headers plus values, with columns chosen by the question"""
+    result = make_pods(50)
+    plain = compact_tool_result(result, max_tokens=10_000)
+    with_ips = compact_tool_result(result, max_tokens=10_000, question="What are the pod IP addresses?")
+    everything = compact_tool_result(result, max_tokens=10_000, question="show all details")
+
+    assert json.loads(plain)["pods"]["columns"] == ["name", "status", "ready", "restarts"]
+    assert json.loads(with_ips)["pods"]["columns"] == ["name", "status", "ready", "restarts", "ip"]
+    assert decode_table(json.loads(everything)["pods"]) == result["pods"]
+    raw_tokens = count_tokens(json.dumps(result))
+    assert raw_tokens > 1.8 * count_tokens(everything)
+    assert raw_tokens > 2.5 * count_tokens(plain)
+
+
+def test_dropped_history_never_leaves_orphaned_tool_results():
+    """Test 6: Session history with tool calls loses an assistant call and its results together"""
+    call = {"id": "1", "type": "function", "function": {"name": "list_pods", "arguments": "{}"}}
+    messages = [
+        {"role": "system", "content": "You are helpful."},
+        {"role": "user", "content": "How are my pods?"},
+        {"role": "assistant", "content": None, "tool_calls": [call]},
+        {"role": "tool", "tool_call_id": "1", "content": "p" * 2000},
+        {"role": "assistant", "content": "All running."},
+        {"role": "user", "content": "And now?"},
+    ]
+    fitted, _ = fit_to_budget(messages, budget=300)
+    roles = [m["role"] for m in fitted]
+    assert "tool" not in roles
+    assert roles[-1] == "user"
@@ -0,0 +1,109 @@
+"""
+Unit tests for the offline benchmark fakes (benchmarks/fake_arm.py, fake_kube.py)
+"""
+
+import os
+import sys
+
+import yaml
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmarks"))
+
+import fake_arm  # noqa: E402
+import fake_kube  # noqa: E402
+from api_bench import percentile, summarize  # noqa: E402
+from kube_client import KubeClientManager  # noqa: E402
+
+
+def test_kube_client_reads_fake_cluster_through_fake_arm():
+    """Test 1: The AKS credentials from the fake ARM lead a real ApiClient to the fake cluster"""
+    from azure.mgmt.containerservice import ContainerServiceClient
+
+    kube = fake_kube.make_server(pods=300)
+    fake_kube.serve_in_thread(kube)
+    arm = fake_arm.make_server(f"http://127.0.0.1:{kube.server_port}")
+    fake_arm.serve_in_thread(arm)
+    try:
+        aks = fake_arm.management_client(ContainerServiceClient, "sub", f"http://127.0.0.1:{arm.server_port}")
+        cluster = aks.managed_clusters.get("hsps-demo-rg", "hsps-aks-cluster")
+        manager = KubeClientManager(
+            lambda rg, name: aks.managed_clusters.list_cluster_user_credentials(rg, name).kubeconfigs[0].value
+        )
+        pods = manager.core_v1("hsps-demo-rg", "hsps-aks-cluster").list_namespaced_pod("hsps").items
+        deployment = manager.apps_v1("hsps-demo-rg", "hsps-aks-cluster").read_namespaced_deployment("hsps-app-0", "hsps")
+        pools = list(aks.agent_pools.list("hsps-demo-rg", "hsps-aks-cluster"))
+    finally:
+        fake_kube.stop(kube)
+        arm.shutdown()
+
+    assert cluster.power_state.code == "Running"
+    assert [p.name for p in pools] == ["nodepool1", "userpool"]
+    assert len(pods) == 300
+    assert pods[0].status.container_statuses[0].ready
+    assert deployment.spec.replicas == 25
+    assert deployment.spec.selector.match_labels == {"app": "hsps-app-0"}
+
+
+def test_fake_pod_log_honours_tail_and_timestamps():
+    """Test 2: Log lines are deterministic, tail-limited and optionally timestamped"""
+    cluster = fake_kube.Cluster(pods=10, log_lines=20)
+    lines = cluster.log("hsps", "hsps-app-0-00000", tail_lines=5, timestamps=True).decode().splitlines()
+    assert len(lines) == 5
+    assert all(line.split(" ", 1)[0].endswith("Z") for line in lines)
+    assert yaml.safe_load(fake_arm.kubeconfig("http://kube"))["clusters"][0]["cluster"]["server"] == "http://kube"
+
+
+def test_summary_percentiles():
+    """Test 3: Nearest-rank percentiles, throughput and error counts"""
+    samples = [float(i) for i in range(1, 101)]
+    assert percentile(samples, 50) == 50
+    assert percentile(samples, 95) == 95
+    assert percentile(samples, 99) == 99
+
+    summary = summarize(samples, {200: 90, 304: 5, 500: 5}, elapsed=2.0)
+    assert summary["rps"] == 50.0
+    assert summary["errors"] == 5
+    assert summary["latencyMs"]["p99"] == 99
+
+
+def test_openai_stub_follows_script_and_reports_usage():
+    """Test 4: The stub streams the scripted tool calls, then the answer, with a usage chunk"""
+    import asyncio
+
+    import fake_openai
+    from openai import AsyncOpenAI
+
+    from llm import usage_tokens
+
+    corpus = {"pods in star?": {"question": "pods in star?", "answer": "STAR is healthy.",
+                                "rounds": [[{"name": "list_pods", "arguments": {"namespace": "star"}}]]}}
+    server = fake_openai.make_server(corpus, ttft_ms=0, tokens_per_second=100000, prompt_ms_per_1k=0)
+    fake_kube.serve_in_thread(server)
+
+    async def scenario():
+        client = AsyncOpenAI(api_key="x", base_url=f"http://127.0.0.1:{server.server_port}/v1", max_retries=0)
+        messages = [{"role": "user", "content": "pods in star?"}]
+        chunks = await client.chat.completions.create(
+            model="m", messages=messages, stream=True, extra_body={"stream_options": {"include_usage": True}}
+        )
+        calls, usage = [], None
+        async for chunk in chunks:
+            usage = usage_tokens(getattr(chunk, "usage", None)) or usage
+            for choice in chunk.choices:
+                calls += [tc.function.name for tc in choice.delta.tool_calls or [] if tc.function.name]
+        messages.append({"role": "assistant", "content": None, "tool_calls": [
+            {"id": "call_0_0", "type": "function", "function": {"name": "list_pods", "arguments": "{}"}}]})
+        messages.append({"role": "tool", "tool_call_id": "call_0_0", "content": "[]"})
+        answer = await client.chat.completions.create(model="m", messages=messages)
+        await client.close()
+        return calls, usage, answer
+
+    try:
+        calls, usage, answer = asyncio.run(scenario())
+    finally:
+        server.shutdown()
+
+    assert calls == ["list_pods"]
+    assert usage[0] > 0 and usage[1] > 0
+    assert answer.choices[0].message.content == "STAR is healthy."
+    assert answer.usage.prompt_tokens > usage[0]
@@ -0,0 +1,99 @@
+"""
+Unit tests for ARM client-side rate limiting and throttling retries
+"""
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+
+import pytest
+from prometheus_client import REGISTRY
+
+from arm_throttle import ArmRateLimitExceeded, TokenBucket, arm_client_kwargs
+
+
+def test_bucket_allows_burst_then_paces():
+    """Test 1: The burst is free, later calls wait for the refill rate, long waits fail fast"""
+    bucket = TokenBucket(rate=50, burst=3)
+    started = time.perf_counter()
+    waits = [bucket.acquire() for _ in range(5)]
+    elapsed = time.perf_counter() - started
+
+    assert waits[:3] == [0.0, 0.0, 0.0]
+    assert all(w > 0 for w in waits[3:])
+    assert elapsed >= 0.035
+
+    with pytest.raises(ArmRateLimitExceeded) as exc:
+        bucket.acquire(max_wait=0.001)
+    assert exc.value.status_code == 429
+
+
+def test_low_remaining_quota_slows_the_bucket():
+    """Test 2: Remaining quota below the watermark scales the rate down, recovery restores it"""
+    bucket = TokenBucket(rate=10, burst=5)
+    bucket.observe_remaining(50, low_watermark=200)
+    assert bucket.rate == pytest.approx(2.5)
+    bucket.observe_remaining(0, low_watermark=200)
+    assert bucket.rate == pytest.approx(0.5)
+    bucket.observe_remaining(5000, low_watermark=200)
+    assert bucket.rate == 10
+
+
+class FakeArm(BaseHTTPRequestHandler):
+    """Answers the first `throttle` requests with 429, then with a managed cluster"""
+    throttle = 1
+    calls = 0
+
+    def do_GET(self):
+        type(self).calls += 1
+        if type(self).calls <= type(self).throttle:
+            self.send_response(429)
+            self.send_header("Retry-After", "0")
+            self.send_header("x-ms-ratelimit-remaining-subscription-reads", "0")
+            self.send_header("Content-Type", "application/json")
+            body = json.dumps({"error": {"code": "TooManyRequests", "message": "throttled"}}).encode()
+        else:
+            self.send_response(200)
+            self.send_header("x-ms-ratelimit-remaining-subscription-reads", "11999")
+            self.send_header("Content-Type", "application/json")
+            body = json.dumps({"name": "hsps-aks-cluster", "location": "eastus"}).encode()
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class FakeCredential:
+    def get_token(self, *scopes, **kwargs):
+        return SimpleNamespace(token="token", expires_on=int(time.time()) + 3600)
+
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+def test_management_client_retries_429_and_records_quota():
+    """Test 3: A throttled ARM read is retried after Retry-After and the quota headers are exported"""
+    from azure.mgmt.containerservice import ContainerServiceClient
+
+    FakeArm.calls = 0
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeArm)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    throttled_before = sample("azure_api_arm_throttled_total")
+    try:
+        aks = ContainerServiceClient(
+            FakeCredential(), "sub", base_url=f"http://127.0.0.1:{server.server_port}",
+            **arm_client_kwargs(TokenBucket(rate=100, burst=10))
+        )
+        cluster = aks.managed_clusters.get("rg", "hsps-aks-cluster", enforce_https=False)
+    finally:
+        server.shutdown()
+
+    assert cluster.name == "hsps-aks-cluster"
+    assert FakeArm.calls == 2
+    assert sample("azure_api_arm_throttled_total") == throttled_before + 1
+    assert sample("azure_api_arm_ratelimit_remaining", scope="subscription-reads") == 11999
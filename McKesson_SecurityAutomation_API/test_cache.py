@@ -0,0 +1,120 @@
+"""
+Unit tests for the ARM TTL cache
+"""
+
+import asyncio
+
+import pytest
+
+from cache import TTLCache
+
+
+class CountingLoader:
+    def __init__(self, delay: float = 0.0, fail: bool = False):
+        self.calls = 0
+        self.delay = delay
+        self.fail = fail
+
+    async def __call__(self):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError("upstream failed")
+        return {"version": self.calls}
+
+
+def test_fresh_value_is_served_from_cache():
+    """Test 1: A second lookup inside the TTL does not call the loader"""
+    async def scenario():
+        cache = TTLCache()
+        loader = CountingLoader()
+        first = await cache.get_or_load(("aks_status",), loader, ttl=60)
+        second = await cache.get_or_load(("aks_status",), loader, ttl=60)
+        return cache, loader, first, second
+
+    cache, loader, first, second = asyncio.run(scenario())
+    assert loader.calls == 1
+    assert first == second == {"version": 1}
+    assert cache.stats()["endpoints"]["aks_status"] == {"hits": 1, "stale_hits": 0, "misses": 1, "errors": 0}
+
+
+def test_concurrent_misses_collapse_to_one_call():
+    """Test 2: Concurrent identical requests share a single upstream call"""
+    async def scenario():
+        cache = TTLCache()
+        loader = CountingLoader(delay=0.05)
+        results = await asyncio.gather(*(cache.get_or_load(("resources",), loader, ttl=60) for _ in range(10)))
+        return loader, results
+
+    loader, results = asyncio.run(scenario())
+    assert loader.calls == 1
+    assert all(r == {"version": 1} for r in results)
+
+
+def test_stale_value_served_while_refreshing():
+    """Test 3: Expired entries are returned immediately and refreshed in the background"""
+    async def scenario():
+        cache = TTLCache(stale_seconds=60)
+        loader = CountingLoader()
+        await cache.get_or_load(("node_pools",), loader, ttl=0)
+        stale = await cache.get_or_load(("node_pools",), loader, ttl=0)
+        await asyncio.sleep(0.01)  # let the background refresh finish
+        refreshed = cache._entries[("node_pools",)].value
+        return loader, stale, refreshed
+
+    loader, stale, refreshed = asyncio.run(scenario())
+    assert stale == {"version": 1}
+    assert refreshed == {"version": 2}
+    assert loader.calls == 2
+
+
+def test_errors_are_not_cached():
+    """Test 4: A failed load propagates and the next lookup retries"""
+    async def scenario():
+        cache = TTLCache()
+        loader = CountingLoader(fail=True)
+        with pytest.raises(RuntimeError):
+            await cache.get_or_load(("subscription",), loader, ttl=60)
+        loader.fail = False
+        value = await cache.get_or_load(("subscription",), loader, ttl=60)
+        return cache, value
+
+    cache, value = asyncio.run(scenario())
+    assert value == {"version": 2}
+    assert cache.stats()["totals"]["errors"] == 1
+
+
+def test_invalidate_by_endpoint():
+    """Test 5: Invalidation removes only the requested endpoint's entries"""
+    async def scenario():
+        cache = TTLCache()
+        await cache.get_or_load(("aks_status",), CountingLoader(), ttl=60)
+        await cache.get_or_load(("resource_group", ("rg_name", "a")), CountingLoader(), ttl=60)
+        await cache.get_or_load(("resource_group", ("rg_name", "b")), CountingLoader(), ttl=60)
+        return cache, cache.invalidate("resource_group")
+
+    cache, removed = asyncio.run(scenario())
+    assert removed == 2
+    assert cache.stats()["entries"] == 1
+
+
+def test_only_background_failures_are_logged(caplog):
+    """Test 6: A failed foreground load raises without a warning; a failed background refresh is logged"""
+    async def scenario():
+        cache = TTLCache(stale_seconds=60)
+        loader = CountingLoader(fail=True)
+        with pytest.raises(RuntimeError):
+            await cache.get_or_load(("subscription",), loader, ttl=60)
+        foreground = len(caplog.records)
+
+        loader.fail = False
+        await cache.get_or_load(("node_pools",), loader, ttl=0)
+        loader.fail = True
+        await cache.get_or_load(("node_pools",), loader, ttl=0)
+        await asyncio.sleep(0.01)  # let the background refresh fail
+        return foreground
+
+    with caplog.at_level("WARNING", logger="cache"):
+        foreground = asyncio.run(scenario())
+    assert foreground == 0
+    assert [r.getMessage() for r in caplog.records] == ["Cache load failed: upstream failed"]
@@ -0,0 +1,63 @@
+"""
+Unit tests for lazy client construction (cold start)
+"""
+
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from types import SimpleNamespace
+
+from lazy import LazyObject, is_loaded, load
+
+API_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def test_import_main_defers_sdk_imports():
+    """Test 1: Importing main loads none of the Azure, Kubernetes or OpenAI SDKs"""
+    script = (
+        "import json, sys, main; "
+        "print(json.dumps(sorted(m for m in sys.modules if m.split('.')[0] in ('kubernetes', 'openai', 'httpx') "
+        "or m.startswith(('azure.identity', 'azure.mgmt')))))"
+    )
+    env = {k: v for k, v in os.environ.items() if not k.startswith("VITE_AZURE_")}
+    env.update({"INFORMERS_ENABLED": "false", "PYTHONPATH": API_DIR})
+    result = subprocess.run([sys.executable, "-c", script], cwd=API_DIR, env=env, capture_output=True, text=True)
+
+    # Also no longer fails without credentials: they are only needed by the first Azure call
+    assert result.returncode == 0, result.stderr
+    assert json.loads(result.stdout) == []
+
+
+def test_lazy_object_builds_once_on_first_use():
+    """Test 2: The factory runs once, on first attribute access, even under concurrent access"""
+    calls = []
+
+    def factory():
+        calls.append(1)
+        time.sleep(0.05)
+        return SimpleNamespace(value=42)
+
+    obj = LazyObject(factory)
+    assert not is_loaded(obj)
+    assert calls == []
+
+    threads = [threading.Thread(target=lambda: obj.value) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert calls == [1]
+    assert is_loaded(obj)
+    assert obj.value == 42
+    assert load(obj) is load(obj)
+    assert is_loaded("not lazy")
+
+
+def test_lazy_none_is_falsy():
+    """Test 3: A factory returning None (e.g. no OpenAI key) makes the proxy falsy"""
+    assert not LazyObject(lambda: None)
+    assert LazyObject(lambda: object())
@@ -0,0 +1,111 @@
+"""
+Unit tests for ETag / If-None-Match conditional responses
+"""
+
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
+from starlette.testclient import TestClient
+
+from cache import TTLCache
+from etag import ETags, etag_matches
+
+
+def make_app():
+    app = FastAPI()
+    etags = ETags()
+    cache = TTLCache()
+    state = {"version": 1, "loads": 0}
+
+    @app.get("/api/azure/things/{namespace}")
+    @etags.conditional
+    async def things(namespace: str, limit: int = 10):
+        return {"namespace": namespace, "limit": limit, "version": state["version"]}
+
+    @app.get("/api/azure/cached")
+    @etags.conditional
+    @cache.cached("cached", 60)
+    async def cached():
+        state["loads"] += 1
+        return {"items": list(range(100))}
+
+    @app.get("/api/azure/text")
+    @etags.conditional
+    async def text():
+        return PlainTextResponse("raw")
+
+    return app, etags, state
+
+
+def test_not_modified_until_content_changes():
+    """Test 1: A matching If-None-Match gets an empty 304; changed content gets a new ETag"""
+    app, etags, state = make_app()
+    client = TestClient(app)
+
+    first = client.get("/api/azure/things/hsps?limit=5")
+    assert first.status_code == 200
+    assert first.json() == {"namespace": "hsps", "limit": 5, "version": 1}
+    etag = first.headers["etag"]
+
+    again = client.get("/api/azure/things/hsps?limit=5", headers={"If-None-Match": etag})
+    assert again.status_code == 304
+    assert again.content == b""
+    assert again.headers["etag"] == etag
+
+    state["version"] = 2
+    changed = client.get("/api/azure/things/hsps?limit=5", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["etag"] != etag
+    assert etags.stats()["notModified"] == 1
+
+
+def test_cached_result_is_encoded_once():
+    """Test 2: Polling a cached endpoint reuses the encoded body instead of serializing again"""
+    app, etags, state = make_app()
+    client = TestClient(app)
+
+    etag = client.get("/api/azure/cached").headers["etag"]
+    for _ in range(5):
+        response = client.get("/api/azure/cached", headers={"If-None-Match": etag})
+        assert response.status_code == 304
+
+    assert state["loads"] == 1
+    assert etags.stats()["encoded"] == 1
+    assert etags.stats()["memoHits"] == 5
+    assert etags.stats()["bytesSaved"] == 5 * len('{"items":[' + ",".join(map(str, range(100))) + "]}")
+
+
+def test_explicit_responses_pass_through():
+    """Test 3: Endpoints returning a Response (e.g. streams) are not rewritten"""
+    app, _, _ = make_app()
+    response = TestClient(app).get("/api/azure/text")
+    assert response.text == "raw"
+    assert "etag" not in response.headers
+
+
+def test_if_none_match_parsing():
+    """Test 4: Lists, weak validators and * are honoured"""
+    assert etag_matches('"a", W/"b"', '"b"')
+    assert etag_matches("*", '"b"')
+    assert not etag_matches('"a"', '"b"')
+    assert not etag_matches(None, '"b"')
+
+
+def test_volatile_keys_are_left_out_of_the_etag():
+    """Test 5: Per-call timings are sent but do not change the ETag, and nothing is memoized"""
+    app = FastAPI()
+    etags = ETags()
+    state = {"calls": 0}
+
+    @app.get("/api/azure/overview")
+    @etags.conditional(volatile=("totalMs",))
+    async def overview():
+        state["calls"] += 1
+        return {"sections": {"pods": 3}, "totalMs": state["calls"] * 10.0}
+
+    client = TestClient(app)
+    first = client.get("/api/azure/overview")
+    assert first.json() == {"sections": {"pods": 3}, "totalMs": 10.0}
+
+    again = client.get("/api/azure/overview", headers={"If-None-Match": first.headers["etag"]})
+    assert again.status_code == 304
+    assert etags.stats()["memoEntries"] == 0
@@ -0,0 +1,61 @@
+"""
+Unit tests for the blocking-call execution layer
+"""
+
+import asyncio
+import threading
+import time
+
+import executor
+from executor import run_blocking
+
+
+def test_blocking_call_does_not_block_event_loop():
+    """Test 1: The event loop keeps running while a blocking call is in flight"""
+    async def scenario():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.01)
+
+        task = asyncio.create_task(ticker())
+        result = await run_blocking("arm", lambda: time.sleep(0.2) or "done")
+        task.cancel()
+        return result, ticks
+
+    result, ticks = asyncio.run(scenario())
+    assert result == "done"
+    assert ticks >= 5
+
+
+def test_pool_bounds_concurrency(monkeypatch):
+    """Test 2: At most POOL_SIZES[dependency] calls run at once"""
+    executor.shutdown_pools()
+    monkeypatch.setitem(executor.POOL_SIZES, "bounded-test", 2)
+    in_flight = 0
+    peak = 0
+    lock = threading.Lock()
+
+    def work():
+        nonlocal in_flight, peak
+        with lock:
+            in_flight += 1
+            peak = max(peak, in_flight)
+        time.sleep(0.05)
+        with lock:
+            in_flight -= 1
+
+    async def scenario():
+        await asyncio.gather(*(run_blocking("bounded-test", work) for _ in range(6)))
+
+    asyncio.run(scenario())
+    assert peak == 2
+
+
+def test_dependencies_use_separate_pools():
+    """Test 3: Each dependency gets its own pool"""
+    assert executor.get_pool("arm") is not executor.get_pool("kubernetes")
+    assert executor.get_pool("arm") is executor.get_pool("arm")
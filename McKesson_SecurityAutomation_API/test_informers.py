@@ -0,0 +1,137 @@
+"""
+Unit tests for the watch-based informer cache
+"""
+
+import time
+from types import SimpleNamespace
+from unittest.mock import Mock, patch
+
+from kubernetes.client.rest import ApiException
+
+from informers import Informer, InformerManager, InformerStore
+
+
+def make_obj(name: str, rv: str, namespace: str = "hsps"):
+    return SimpleNamespace(metadata=SimpleNamespace(name=name, namespace=namespace, resource_version=rv))
+
+
+def make_list(items, rv: str):
+    return SimpleNamespace(items=items, metadata=SimpleNamespace(resource_version=rv))
+
+
+class FakeWatch:
+    """Plays back one scripted step per stream() call: a list of events or an exception"""
+    script = []
+
+    def __init__(self):
+        self.stopped = False
+
+    def stream(self, func, namespace, **kwargs):
+        step = FakeWatch.script.pop(0) if FakeWatch.script else []
+        if isinstance(step, Exception):
+            raise step
+        for event in step:
+            yield event
+
+    def stop(self):
+        self.stopped = True
+
+
+def wait_for(condition, timeout: float = 2.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def test_store_applies_events():
+    """Test 1: Store is keyed by namespace/name and tracks resource versions"""
+    store = InformerStore()
+    store.replace([make_obj("b", "1"), make_obj("a", "1")], "1")
+    store.upsert(make_obj("c", "2"))
+    store.delete(make_obj("b", "3"))
+
+    assert [o.metadata.name for o in store.list()] == ["a", "c"]
+    assert store.get("hsps", "c").metadata.resource_version == "2"
+    assert store.resource_version == "3"
+    assert store.synced
+
+
+@patch('kubernetes.watch.Watch', FakeWatch)
+def test_informer_lists_then_watches():
+    """Test 2: Initial LIST populates the store and WATCH events are applied"""
+    FakeWatch.script = [[
+        {"type": "ADDED", "object": make_obj("pod-2", "11")},
+        {"type": "MODIFIED", "object": make_obj("pod-1", "12")},
+    ]]
+    list_fn = Mock(return_value=make_list([make_obj("pod-1", "10")], "10"))
+    informer = Informer("pods", "hsps", lambda: list_fn, InformerStore())
+    informer.start()
+    try:
+        assert wait_for(lambda: len(informer.store) == 2 and informer.store.resource_version == "12")
+        assert list_fn.call_count == 1
+    finally:
+        informer.stop()
+
+
+@patch('kubernetes.watch.Watch', FakeWatch)
+def test_informer_relists_on_410_gone():
+    """Test 3: A 410 Gone from the watch triggers a fresh LIST"""
+    FakeWatch.script = [ApiException(status=410, reason="Gone")]
+    list_fn = Mock(side_effect=[
+        make_list([make_obj("old", "1")], "1"),
+        make_list([make_obj("new", "50")], "50"),
+    ] + [make_list([make_obj("new", "50")], "50")] * 100)
+    informer = Informer("pods", "hsps", lambda: list_fn, InformerStore())
+    informer.start()
+    try:
+        assert wait_for(lambda: informer.relists >= 2)
+        assert [o.metadata.name for o in informer.store.list()] == ["new"]
+    finally:
+        informer.stop()
+
+
+def test_manager_only_serves_synced_stores():
+    """Test 4: Unwatched or unsynced kinds return None so callers fall back to LIST"""
+    manager = InformerManager({"pods": Mock()}, namespaces=["hsps"])
+    assert manager.store("pods", "hsps") is None
+    assert manager.store("pods", "default") is None
+
+
+@patch('kubernetes.watch.Watch', FakeWatch)
+def test_failed_watch_unsyncs_store_and_invalidates_on_401():
+    """Test 5: A failing watch stops serving the store, and a 401 drops the cached credentials"""
+    FakeWatch.script = [ApiException(status=401, reason="Unauthorized")]
+    synced_lists = [make_list([make_obj("pod-1", "10")], "10")]
+    list_fn = Mock(side_effect=synced_lists + [ApiException(status=503, reason="Unavailable")] * 100)
+    on_unauthorized = Mock()
+    manager = InformerManager({"pods": lambda: list_fn}, namespaces=["hsps"], on_unauthorized=on_unauthorized)
+    manager.start()
+    try:
+        assert wait_for(lambda: on_unauthorized.called)
+        assert wait_for(lambda: manager.store("pods", "hsps") is None)
+        assert manager.status()["pods/hsps"]["synced"] is False
+    finally:
+        manager.stop()
+
+
+def test_derived_results_are_reused_until_the_store_changes():
+    """Test 6: derive() returns the same object for an unchanged store and rebuilds after an event"""
+    store = InformerStore()
+    store.replace([make_obj("a", "1")], "1")
+    builds = []
+
+    def names(namespace, objects):
+        builds.append(namespace)
+        return {"namespace": namespace, "names": [o.metadata.name for o in objects]}
+
+    first = store.derive(names, "hsps")
+    assert store.derive(names, "hsps") is first
+    store.upsert(make_obj("b", "2"))
+    changed = store.derive(names, "hsps")
+
+    assert changed is not first
+    assert changed["names"] == ["a", "b"]
+    assert len(builds) == 2
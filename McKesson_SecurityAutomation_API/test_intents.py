@@ -0,0 +1,79 @@
+"""
+Unit tests for the agent's deterministic fast path
+"""
+
+from intents import IntentRouter, render_aks_status, render_deployments, render_node_pools
+
+NAMESPACES = ["hsps", "star"]
+
+
+def test_only_simple_single_tool_questions_are_routed():
+    """Test 1: Routed questions map to one tool and namespace; anything else goes to the model"""
+    router = IntentRouter(namespaces=NAMESPACES)
+
+    def route(message):
+        match = router.match(message)
+        return (match.intent.tool, match.arguments) if match else None
+
+    assert route("List the pods in star") == ("list_pods", {"namespace": "star"})
+    assert route("How are the hsps pods doing?") == ("list_pods", {"namespace": "hsps"})
+    assert route("Is the AKS cluster running?") == ("get_aks_cluster_status", {})
+    assert route("Show node pools") == ("get_aks_node_pools", {})
+    assert route("Show the node pools of the AKS cluster") == ("get_aks_node_pools", {})
+    assert route("Are all deployments in hsps fully available?") == ("get_deployments", {"namespace": "hsps"})
+    assert route("What services are exposed in star?") == ("get_services", {"namespace": "star"})
+
+    # Reasoning, several things at once, writes, no or two namespaces, unknown detail
+    assert route("Why are the pods in star crashing?") is None
+    assert route("List pods and deployments in hsps") is None
+    assert route("Can you scale the star deployments to zero?") is None
+    assert route("Which pods aren't ready in star?") is None
+    assert route("How many pods are running?") is None
+    assert route("Compare pods in hsps with star") is None
+    assert route("List pods in star with their node placement and image versions") is None
+    assert route("What are we spending this month?") is None
+
+
+def test_hit_rate_and_disabled_router():
+    """Test 2: route() counts questions; answered and failed renders update the hit rate"""
+    router = IntentRouter(namespaces=NAMESPACES)
+    match = router.route("Show node pools")
+    assert router.route("Give me an overall health check") is None
+    assert router.render(match, {"error": "timed out"}) is None
+    assert router.render(match, {"nodePools": [], "count": 0}) == "The AKS cluster has no node pools."
+
+    stats = router.stats()
+    assert (stats["questions"], stats["answered"], stats["toolErrors"]) == (2, 1, 1)
+    assert stats["hitRate"] == 0.5
+    assert stats["byIntent"]["node_pools"] == 1
+
+    router.enabled = False
+    assert router.route("Show node pools") is None
+    assert router.stats()["questions"] == 2
+
+
+def test_renderers_flag_unhealthy_rows():
+    """Test 3: Templates summarize, and list what needs attention first"""
+    deployments = render_deployments({"namespace": "hsps", "count": 2, "deployments": [
+        {"name": "api", "replicas": 3, "availableReplicas": 3, "readyReplicas": 3, "updatedReplicas": 3},
+        {"name": "worker", "replicas": 2, "availableReplicas": 1, "readyReplicas": 1, "updatedReplicas": 2},
+    ]})
+    assert deployments.startswith("**hsps** has 2 deployments; 1 fully available.")
+    assert "| worker | 2 | 1 | 1 | 2 |" in deployments
+    assert "| api |" not in deployments
+
+    pools = render_node_pools({"count": 2, "nodePools": [
+        {"name": "nodepool1", "count": 3, "vmSize": "Standard_DS2_v2", "osType": "Linux",
+         "provisioningState": "Succeeded", "powerState": "Running"},
+        {"name": "userpool", "count": 2, "vmSize": "Standard_DS2_v2", "osType": "Linux",
+         "provisioningState": "Succeeded", "powerState": "Stopped"},
+    ]})
+    assert pools.startswith("The AKS cluster has 2 node pools with 5 nodes in total.")
+    assert "**Needs attention:** userpool not running normally." in pools
+
+    status = render_aks_status({
+        "name": "hsps-aks-cluster", "location": "eastus", "powerState": "Running",
+        "provisioningState": "Succeeded", "kubernetesVersion": "1.28.5", "agentPoolProfiles": [],
+    })
+    assert status == ("The AKS cluster **hsps-aks-cluster** (eastus) is **Running**, "
+                      "provisioning state Succeeded, Kubernetes 1.28.5.")
@@ -0,0 +1,126 @@
+"""
+Unit tests for the shared Kubernetes client manager
+"""
+
+import base64
+import json
+import threading
+import time
+from unittest.mock import Mock, patch
+
+import yaml
+
+from kube_client import KubeClientManager, credential_expiry
+
+
+def make_kubeconfig(token: str) -> bytes:
+    return yaml.safe_dump({
+        "current-context": "aks",
+        "contexts": [{"name": "aks", "context": {"cluster": "aks", "user": "aks-user"}}],
+        "clusters": [{"name": "aks", "cluster": {"server": "https://aks.example:443"}}],
+        "users": [{"name": "aks-user", "user": {"token": token}}],
+    }).encode("utf-8")
+
+
+def make_jwt(exp: float) -> str:
+    payload = base64.urlsafe_b64encode(json.dumps({"exp": exp}).encode()).decode().rstrip("=")
+    return f"eyJhbGciOiJub25lIn0.{payload}.sig"
+
+
+def test_credential_expiry_from_jwt():
+    """Test 1: Token expiry is read from the JWT exp claim"""
+    exp = time.time() + 1234
+    assert credential_expiry(yaml.safe_load(make_kubeconfig(make_jwt(exp)))) == exp
+    assert credential_expiry(yaml.safe_load(make_kubeconfig("opaque-token"))) is None
+
+
+@patch('kubernetes.config.new_client_from_config_dict')
+def test_client_reused_until_expiry(mock_new_client):
+    """Test 2: Credentials are fetched once and reused while the token is valid"""
+    mock_new_client.side_effect = lambda *a, **kw: Mock()
+    loader = Mock(return_value=bytearray(make_kubeconfig(make_jwt(time.time() + 3600))))
+    manager = KubeClientManager(loader, max_age=7200, refresh_skew=60)
+
+    first = manager.get_api_client("rg", "aks")
+    second = manager.get_api_client("rg", "aks")
+
+    assert first is second
+    assert loader.call_count == 1
+
+
+@patch('kubernetes.config.new_client_from_config_dict')
+def test_client_refreshed_near_expiry(mock_new_client):
+    """Test 3: A client whose token is inside the refresh window is rebuilt"""
+    mock_new_client.side_effect = lambda *a, **kw: Mock()
+    loader = Mock(return_value=make_kubeconfig(make_jwt(time.time() + 30)))
+    manager = KubeClientManager(loader, max_age=7200, refresh_skew=60)
+
+    first = manager.get_api_client("rg", "aks")
+    second = manager.get_api_client("rg", "aks")
+
+    assert first is not second
+    assert loader.call_count == 2
+
+
+@patch('kubernetes.config.new_client_from_config_dict')
+def test_concurrent_callers_share_one_refresh(mock_new_client):
+    """Test 4: Concurrent first calls trigger a single credential fetch"""
+    mock_new_client.side_effect = lambda *a, **kw: Mock()
+
+    def slow_loader(rg, name):
+        time.sleep(0.05)
+        return make_kubeconfig("opaque-token")
+
+    loader = Mock(side_effect=slow_loader)
+    manager = KubeClientManager(loader, max_age=3600, refresh_skew=60)
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(manager.get_api_client("rg", "aks"))) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert loader.call_count == 1
+    assert len({id(r) for r in results}) == 1
+
+
+@patch('kubernetes.config.new_client_from_config_dict')
+def test_invalidate_forces_refetch(mock_new_client):
+    """Test 5: Invalidation drops the cached client"""
+    mock_new_client.side_effect = lambda *a, **kw: Mock()
+    loader = Mock(return_value=make_kubeconfig("opaque-token"))
+    manager = KubeClientManager(loader, max_age=3600, refresh_skew=60)
+
+    manager.get_api_client("rg", "aks")
+    manager.invalidate("rg", "aks")
+    manager.get_api_client("rg", "aks")
+
+    assert loader.call_count == 2
+
+
+def test_replaced_clients_release_their_connection_pools():
+    """Test 6: Refreshed and invalidated clients close their urllib3 connection pools"""
+    from kubernetes import config
+    real_new_client = config.new_client_from_config_dict
+
+    def new_client(kubeconfig, persist_config=False):
+        api_client = real_new_client(kubeconfig, persist_config=persist_config)
+        # What a first request leaves behind: a host pool holding an idle connection
+        pool = api_client.rest_client.pool_manager.connection_from_url("https://aks.example:443")
+        pool._put_conn(pool._new_conn())
+        return api_client
+
+    loader = Mock(return_value=make_kubeconfig(make_jwt(time.time() + 30)))
+    manager = KubeClientManager(loader, max_age=7200, refresh_skew=60)
+    with patch('kubernetes.config.new_client_from_config_dict', side_effect=new_client):
+        first = manager.get_api_client("rg", "aks")
+        first_pool = first.rest_client.pool_manager.connection_from_url("https://aks.example:443")
+        second = manager.get_api_client("rg", "aks")
+
+    assert len(first.rest_client.pool_manager.pools) == 0
+    assert first_pool.pool is None  # closed, idle connections dropped
+    assert len(second.rest_client.pool_manager.pools) == 1
+
+    manager.invalidate()
+    assert len(second.rest_client.pool_manager.pools) == 0
@@ -0,0 +1,74 @@
+"""
+Unit tests for the async OpenAI client wrapper (timeouts and retry budget)
+"""
+
+import asyncio
+import time
+
+import httpx
+import pytest
+from openai import AsyncOpenAI, RateLimitError
+
+from llm import RetryBudget, create_chat_completion, retry_after_seconds
+
+COMPLETION = {
+    "id": "chatcmpl-1",
+    "object": "chat.completion",
+    "created": 0,
+    "model": "gpt-4o-mini",
+    "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": "ok"}}],
+}
+
+
+def stub_client(responses):
+    """AsyncOpenAI backed by an in-process transport that plays back `responses`"""
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(time.monotonic())
+        return responses.pop(0)
+
+    http_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    client = AsyncOpenAI(api_key="test", base_url="http://stub/v1", max_retries=0, http_client=http_client)
+    return client, calls
+
+
+def test_retry_honors_retry_after():
+    """Test 1: A 429 is retried after the server's Retry-After delay"""
+    client, calls = stub_client([
+        httpx.Response(429, headers={"retry-after-ms": "150"}, json={"error": {"message": "slow down"}}),
+        httpx.Response(200, json=COMPLETION),
+    ])
+
+    response = asyncio.run(create_chat_completion(client, RetryBudget(), model="gpt-4o-mini", messages=[]))
+
+    assert response.choices[0].message.content == "ok"
+    assert len(calls) == 2
+    assert calls[1] - calls[0] >= 0.15
+
+
+def test_budget_exhaustion_raises():
+    """Test 2: Retries stop once the per-request budget cannot cover the wait"""
+    client, calls = stub_client([
+        httpx.Response(429, headers={"retry-after": "30"}, json={"error": {"message": "slow down"}}),
+    ])
+
+    with pytest.raises(RateLimitError):
+        asyncio.run(create_chat_completion(client, RetryBudget(max_retries=3, max_wait_seconds=5), model="m", messages=[]))
+    assert len(calls) == 1
+
+
+def test_non_retryable_errors_are_not_retried():
+    """Test 3: Client errors such as 400 surface immediately"""
+    client, calls = stub_client([httpx.Response(400, json={"error": {"message": "bad request"}})])
+
+    with pytest.raises(Exception):
+        asyncio.run(create_chat_completion(client, RetryBudget(), model="m", messages=[]))
+    assert len(calls) == 1
+
+
+def test_retry_after_parsing():
+    """Test 4: Retry-After accepts seconds and milliseconds"""
+    assert retry_after_seconds(httpx.Response(429, headers={"retry-after": "2"})) == 2.0
+    assert retry_after_seconds(httpx.Response(429, headers={"retry-after-ms": "250"})) == 0.25
+    assert retry_after_seconds(httpx.Response(429)) is None
@@ -0,0 +1,141 @@
+"""
+Unit tests for follow-mode log streaming
+"""
+
+import asyncio
+import json
+import threading
+import time
+
+import pytest
+
+from logstream import (
+    compile_field_filter, compile_line_filter, follow_lines, format_ndjson, format_sse,
+    labels_match, merge_pod_logs, parse_label_selector
+)
+
+
+class FakeLogResponse:
+    """Stands in for the urllib3 response of read_namespaced_pod_log(_preload_content=False)"""
+
+    def __init__(self, lines, block_after: bool = False, fail_with: Exception = None):
+        self.lines = lines
+        self.block_after = block_after
+        self.fail_with = fail_with
+        self.read = 0
+        self.closed = threading.Event()
+
+    def __iter__(self):
+        for line in self.lines:
+            if self.closed.is_set():
+                raise ConnectionError("connection closed")
+            self.read += 1
+            yield line.encode() + b"\n"
+        if self.fail_with:
+            raise self.fail_with
+        if self.block_after:
+            # Follow mode: no more lines until the connection is closed
+            self.closed.wait(5)
+            raise ConnectionError("connection closed")
+
+    def close(self):
+        self.closed.set()
+
+
+async def collect(response, **kwargs):
+    return [item async for item in follow_lines(response, **kwargs)]
+
+
+def test_lines_are_filtered_and_stream_ends():
+    """Test 1: Lines are filtered server-side and the stream reports its end"""
+    response = FakeLogResponse(["INFO start", "WARNING disk 91%", "INFO tick", "ERROR crash"])
+    items = asyncio.run(collect(response, line_filter=compile_line_filter(r"WARNING|ERROR")))
+
+    assert items == [("line", "WARNING disk 91%"), ("line", "ERROR crash"), ("end", None)]
+    assert response.closed.is_set()
+
+
+def test_invalid_filter_is_rejected():
+    """Test 2: A malformed regex raises ValueError (reported as 400 by the endpoint)"""
+    with pytest.raises(ValueError):
+        compile_line_filter("([unclosed")
+
+
+def test_slow_consumer_applies_backpressure():
+    """Test 3: With a full queue the pump stops reading upstream until the client catches up"""
+    response = FakeLogResponse([f"line {i}" for i in range(100)], block_after=True)
+
+    async def scenario():
+        stream = follow_lines(response, queue_size=5)
+        first = await stream.__anext__()
+        await asyncio.sleep(0.3)
+        read_while_stalled = response.read
+        await stream.aclose()
+        return first, read_while_stalled
+
+    first, read_while_stalled = asyncio.run(scenario())
+    assert first == ("line", "line 0")
+    assert read_while_stalled <= 8
+    assert response.closed.is_set()
+
+
+def test_disconnect_closes_upstream():
+    """Test 4: An idle stream checks for disconnects and closes the upstream connection"""
+    response = FakeLogResponse(["only line"], block_after=True)
+    disconnected = {"value": False}
+
+    async def is_disconnected():
+        return disconnected["value"]
+
+    async def scenario():
+        items = []
+        async for item in follow_lines(response, is_disconnected=is_disconnected, heartbeat=0.05):
+            items.append(item)
+            if item[0] == "heartbeat":
+                disconnected["value"] = True
+        return items
+
+    started = time.perf_counter()
+    items = asyncio.run(scenario())
+    assert items == [("line", "only line"), ("heartbeat", None)]
+    assert response.closed.is_set()
+    assert time.perf_counter() - started < 2
+
+
+def test_upstream_error_and_formats():
+    """Test 5: Upstream failures are streamed as an error record; NDJSON and SSE encodings"""
+    response = FakeLogResponse(["a"], fail_with=RuntimeError("stream reset"))
+    items = asyncio.run(collect(response))
+    assert items == [("line", "a"), ("error", "stream reset")]
+
+    assert json.loads(format_ndjson("line", "a", {"pod": "p"})) == {"type": "line", "line": "a", "pod": "p"}
+    assert format_sse("error", "stream reset", {}) == 'event: error\ndata: {"detail": "stream reset"}\n\n'
+    assert format_sse("heartbeat", None, {}) == ": keepalive\n\n"
+
+
+def test_merge_pod_logs_by_timestamp():
+    """Test 6: Per-pod logs are k-way merged on normalized RFC3339Nano timestamps"""
+    logs = {
+        "db-1": "2024-05-01T10:00:00.5Z first\n2024-05-01T10:00:02Z third",
+        "db-2": "2024-05-01T10:00:00.45Z zeroth\n  continuation\n2024-05-01T10:00:01Z second",
+    }
+    merged = list(merge_pod_logs(logs))
+    assert [line for _, _, line in merged] == ["zeroth", "  continuation", "first", "second", "third"]
+    assert merged[1] == ("db-2", None, "  continuation")
+
+
+def test_field_filter_and_label_selector():
+    """Test 7: field=value matches JSON fields or logfmt tokens; equality selectors match labels"""
+    warning = compile_field_filter("level=warning")
+    assert warning('{"level": "WARNING", "message": "x"}')
+    assert not warning('{"level": "INFO"}')
+    assert warning('ts=1 level=WARNING msg="x"')
+    assert not warning("WARNING without a field")
+    with pytest.raises(ValueError):
+        compile_field_filter("level")
+
+    requirements = parse_label_selector("app=star-database-simulator,tier!=cache")
+    assert labels_match({"app": "star-database-simulator"}, requirements)
+    assert not labels_match({"app": "star-database-simulator", "tier": "cache"}, requirements)
+    with pytest.raises(ValueError):
+        parse_label_selector("app in (a,b)")
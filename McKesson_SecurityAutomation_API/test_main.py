@@ -4,9 +4,10 @@ Tests all 15 Azure read-only API endpoints
 """
 
 import pytest
-from unittest.mock import Mock, patch, MagicMock
+from unittest.mock import Mock, patch, MagicMock, AsyncMock
 import os
 import sys
+import threading
 
 BEARER_TOKEN = "your-secret-token-123"
 HEADERS = {"Authorization": f"Bearer {BEARER_TOKEN}"}
@@ -314,5 +315,181 @@ def test_subscription_info(mock_resource_client, mock_azure_credentials):
     data = response.json()
     assert "subscriptionId" in data
 
+def test_cluster_overview_partial_results(mock_azure_credentials):
+    """Test 16: Overview fans out sections and reports failures per section"""
+    from starlette.testclient import TestClient
+    import main
+    main.arm_cache.invalidate()
+
+    mock_pool = Mock()
+    mock_pool.name = "nodepool1"
+    mock_pool.count = 2
+    mock_pool.vm_size = "Standard_B2s"
+    mock_pool.os_type = "Linux"
+    mock_pool.provisioning_state = "Succeeded"
+    mock_pool.power_state.code = "Running"
+
+    with patch('main.aks_client') as mock_aks, patch('main.list_kube_objects', new=AsyncMock(return_value=[])):
+        mock_aks.managed_clusters.get.side_effect = Exception("ARM unavailable")
+        mock_aks.agent_pools.list.return_value = [mock_pool]
+
+        response = TestClient(main.app).get(
+            "/api/azure/overview?sections=aks,nodePools,pods", headers=HEADERS
+        )
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["errors"] == {"aks": "ARM unavailable"}
+    assert data["sections"]["nodePools"]["count"] == 1
+    assert set(data["sections"]["pods"]) == {"hsps", "star"}
+
+class FakeLogUpstream:
+    """Stands in for read_namespaced_pod_log(_preload_content=False): yields lines, then follows until closed"""
+
+    def __init__(self, lines, follow=False):
+        self.lines = lines
+        self.follow = follow
+        self.closed = threading.Event()
+
+    def __iter__(self):
+        for line in self.lines:
+            yield line.encode() + b"\n"
+        if self.follow:
+            self.closed.wait(5)
+            raise ConnectionError("connection closed")
+
+    def close(self):
+        self.closed.set()
+
+def test_log_stream_slots(mock_azure_credentials):
+    """Test 17: Log streams beyond the limit get 429; the slot is freed on upstream errors, disconnects and unread bodies"""
+    import asyncio
+    import httpx
+    from kubernetes.client.rest import ApiException
+    from starlette.requests import Request
+    import main
+
+    opening = threading.Event()
+    release_open = threading.Event()
+    upstreams = []
+
+    def read_log(name, namespace, **kwargs):
+        if name == "missing":
+            raise ApiException(status=404, reason="Not Found")
+        if name == "slow":
+            opening.set()
+            release_open.wait(5)
+        upstreams.append(FakeLogUpstream(["a", "b"], follow=kwargs["follow"]))
+        return upstreams[-1]
+
+    v1 = Mock()
+    v1.read_namespaced_pod_log.side_effect = read_log
+
+    async def scenario():
+        async def receive():
+            await asyncio.sleep(60)
+            return {"type": "http.disconnect"}
+
+        request = Request({"type": "http", "headers": []}, receive)
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            url = "/api/azure/pods/hsps/{}/logs/stream?follow=false"
+            # The slot is taken before the upstream opens, so a second request cannot slip in
+            slow = asyncio.ensure_future(client.get(url.format("slow"), headers=HEADERS))
+            await asyncio.get_running_loop().run_in_executor(None, opening.wait, 5)
+            rejected = await client.get(url.format("other"), headers=HEADERS)
+            release_open.set()
+            finished = await slow
+            results = {"rejected": rejected.status_code, "finished": finished.text, "free": not main.log_stream_slots.locked()}
+
+            missing = await client.get(url.format("missing"), headers=HEADERS)
+            results.update(missing=missing.status_code, freeAfterError=not main.log_stream_slots.locked())
+
+        # Client disconnects after the first line
+        response = await main.stream_pod_logs(request, "hsps", "p", follow=True)
+        body = response.body_iterator
+        first = await body.__anext__()
+        held = main.log_stream_slots.locked()
+        await body.aclose()
+        results.update(first=first, held=held, freeAfterDisconnect=not main.log_stream_slots.locked())
+
+        # The body is never iterated: the background task frees the slot
+        response = await main.stream_pod_logs(request, "hsps", "p", follow=True)
+        held = main.log_stream_slots.locked()
+        await response.background()
+        results.update(heldUnread=held, freeAfterUnread=not main.log_stream_slots.locked())
+        return results
+
+    with patch('main.get_core_v1', new=AsyncMock(return_value=v1)), \
+         patch.object(main, 'log_stream_slots', asyncio.Semaphore(1)):
+        results = asyncio.run(scenario())
+
+    assert results["rejected"] == 429
+    assert '"line": "a"' in results["finished"] and results["free"]
+    assert results["missing"] == 404 and results["freeAfterError"]
+    assert '"a"' in results["first"] and results["held"] and results["freeAfterDisconnect"]
+    assert results["heldUnread"] and results["freeAfterUnread"]
+    assert all(upstream.closed.is_set() for upstream in upstreams)
+
+def test_deployment_logs_merged_by_timestamp(mock_azure_credentials):
+    """Test 18: Deployment logs are fetched per replica, filtered and merged by timestamp"""
+    from starlette.testclient import TestClient
+    import main
+
+    def make_pod(name, app):
+        pod = Mock()
+        pod.metadata.name = name
+        pod.metadata.labels = {"app": app, "pod-template-hash": "abc"}
+        return pod
+
+    deployment = Mock()
+    deployment.spec.selector.match_labels = {"app": "star-database-simulator"}
+    pods = [make_pod("db-1", "star-database-simulator"), make_pod("db-2", "star-database-simulator"),
+            make_pod("api-1", "star-api-simulator")]
+    logs = {
+        "db-1": '2024-05-01T10:00:00.5Z {"level": "WARNING", "message": "slow query"}\n'
+                '2024-05-01T10:00:02Z {"level": "INFO", "message": "ok"}',
+        "db-2": '2024-05-01T10:00:00.25Z {"level": "WARNING", "message": "auth failure"}\n'
+                '2024-05-01T10:00:01Z {"level": "WARNING", "message": "connection spike"}',
+    }
+    v1 = Mock()
+    v1.read_namespaced_pod_log.side_effect = lambda name, ns, **kwargs: logs[name]
+    apps_v1 = Mock()
+    apps_v1.read_namespaced_deployment.return_value = deployment
+
+    with patch('main.list_kube_objects', new=AsyncMock(return_value=pods)), \
+         patch('main.get_core_v1', new=AsyncMock(return_value=v1)), \
+         patch.object(main.kube_clients, 'apps_v1', return_value=apps_v1):
+        response = TestClient(main.app).get(
+            "/api/azure/deployments/star/star-database-simulator/logs?match=level=WARNING", headers=HEADERS
+        )
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["pods"] == ["db-1", "db-2"]
+    assert [(l["pod"], l["timestamp"]) for l in data["lines"]] == [
+        ("db-2", "2024-05-01T10:00:00.25Z"),
+        ("db-1", "2024-05-01T10:00:00.5Z"),
+        ("db-2", "2024-05-01T10:00:01Z"),
+    ]
+    assert v1.read_namespaced_pod_log.call_args.kwargs["timestamps"] is True
+    assert v1.read_namespaced_pod_log.call_args.kwargs["_request_timeout"] == main.LOG_READ_TIMEOUT_SECONDS
+
+def test_pod_log_read_has_http_timeout(mock_azure_credentials):
+    """Test 19: Pod log reads pass an HTTP timeout, so a hung kubelet read frees its pool thread"""
+    from starlette.testclient import TestClient
+    import main
+
+    v1 = Mock()
+    v1.read_namespaced_pod_log.return_value = "line 1\nline 2"
+
+    with patch('main.get_core_v1', new=AsyncMock(return_value=v1)):
+        response = TestClient(main.app).get("/api/azure/pods/hsps/hsps-app-0/logs", headers=HEADERS)
+
+    assert response.status_code == 200
+    assert response.json()["logs"] == ["line 1", "line 2"]
+    assert v1.read_namespaced_pod_log.call_args.kwargs["_request_timeout"] == main.LOG_READ_TIMEOUT_SECONDS
+    assert main.tool_registry.get("get_pod_logs").timeout == main.LOG_READ_TIMEOUT_SECONDS
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
@@ -0,0 +1,100 @@
+"""
+Unit tests for Prometheus metrics and upstream instrumentation
+"""
+
+import asyncio
+
+import pytest
+from fastapi import FastAPI
+from prometheus_client import CollectorRegistry, REGISTRY
+
+from executor import drain, run_blocking
+from metrics import MetricsMiddleware, StatsCollector, operation_name, track_upstream
+
+
+class ManagedClustersOperations:
+    def get(self, rg, name):
+        return {"name": name}
+
+
+    def list_cluster_user_credentials(self, rg, name):
+        raise RuntimeError("AuthorizationFailed")
+
+
+class CoreV1Api:
+    def list_namespaced_pod(self, namespace):
+        return []
+
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+def test_operation_names_are_bounded():
+    """Test 1: SDK methods map to stable operation labels; anonymous callables to "other" """
+    assert operation_name(ManagedClustersOperations().get) == "managed_clusters.get"
+    assert operation_name(CoreV1Api().list_namespaced_pod) == "core_v1.list_namespaced_pod"
+    assert operation_name(lambda: None) == "other"
+    assert operation_name(len) == "len"
+
+
+def test_run_blocking_records_upstream_latency():
+    """Test 2: run_blocking times calls per dependency and operation, including failures"""
+    before_ok = sample("azure_api_upstream_duration_seconds_count", upstream="arm", operation="managed_clusters.get", outcome="ok")
+    before_drain = sample("azure_api_upstream_duration_seconds_count", upstream="kubernetes", operation="core_v1.list_namespaced_pod", outcome="ok")
+
+    async def scenario():
+        await run_blocking("arm", ManagedClustersOperations().get, "rg", "aks")
+        await run_blocking("kubernetes", drain, CoreV1Api().list_namespaced_pod, "hsps")
+        with pytest.raises(RuntimeError):
+            await run_blocking("arm", ManagedClustersOperations().list_cluster_user_credentials, "rg", "aks")
+
+    asyncio.run(scenario())
+    assert sample("azure_api_upstream_duration_seconds_count", upstream="arm", operation="managed_clusters.get", outcome="ok") == before_ok + 1
+    assert sample("azure_api_upstream_duration_seconds_count", upstream="kubernetes", operation="core_v1.list_namespaced_pod", outcome="ok") == before_drain + 1
+    assert sample("azure_api_upstream_duration_seconds_count", upstream="arm", operation="managed_clusters.list_cluster_user_credentials", outcome="error") >= 1
+    assert sample("azure_api_upstream_in_flight", upstream="arm") == 0
+
+    with pytest.raises(RuntimeError):
+        with track_upstream("openai", "chat.completions.create"):
+            raise RuntimeError("boom")
+    assert sample("azure_api_upstream_duration_seconds_count", upstream="openai", operation="chat.completions.create", outcome="error") >= 1
+
+
+def test_middleware_labels_by_route_template():
+    """Test 3: Requests are labelled with the route template, never the raw path"""
+    from starlette.testclient import TestClient
+
+    app = FastAPI()
+    app.add_middleware(MetricsMiddleware)
+
+    @app.get("/items/{item_id}")
+    async def get_item(item_id: str):
+        return {"id": item_id}
+
+    client = TestClient(app)
+    for i in range(3):
+        client.get(f"/items/{i}")
+    client.get("/nope")
+
+    assert sample("azure_api_request_duration_seconds_count", method="GET", route="/items/{item_id}", status="2xx") == 3
+    assert sample("azure_api_request_duration_seconds_count", method="GET", route="unmatched", status="4xx") >= 1
+    assert sample("azure_api_request_duration_seconds_count", method="GET", route="/items/1", status="2xx") == 0
+
+
+def test_stats_collector_exports_cache_and_informer_state():
+    """Test 4: Cache hit ratios and informer status are read at scrape time"""
+    class FakeCache:
+        def stats(self):
+            return {"entries": 2, "hitRatio": 0.75,
+                    "endpoints": {"aks_status": {"hits": 3, "stale_hits": 0, "misses": 1, "errors": 0}}}
+
+    registry = CollectorRegistry()
+    registry.register(StatsCollector(
+        lambda: {"arm": FakeCache()},
+        lambda: {"pods/hsps": {"synced": True, "objects": 12, "relists": 1}}
+    ))
+
+    assert registry.get_sample_value("azure_api_cache_hit_ratio", {"cache": "arm"}) == 0.75
+    assert registry.get_sample_value("azure_api_cache_lookups_total", {"cache": "arm", "endpoint": "aks_status", "outcome": "hits"}) == 3
+    assert registry.get_sample_value("azure_api_informer_objects", {"informer": "pods/hsps"}) == 12
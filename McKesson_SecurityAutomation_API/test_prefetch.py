@@ -0,0 +1,102 @@
+"""
+Unit tests for speculative tool prefetch
+"""
+
+import asyncio
+
+from prefetch import PrefetchCandidate, Prefetcher
+from tools import ToolRegistry
+
+
+def make_registry(calls: list) -> ToolRegistry:
+    registry = ToolRegistry()
+
+    @registry.tool("list_pods", cache_ttl=60, defaults={"namespace": "hsps"})
+    async def fetch_pods(namespace: str):
+        calls.append(("list_pods", namespace))
+        await asyncio.sleep(0.05)
+        return [{"name": f"{namespace}-app-0"}]
+
+    @registry.tool("get_aks_cluster_status", cache_ttl=60)
+    async def fetch_status():
+        calls.append(("get_aks_cluster_status",))
+        return {"powerState": "Running"}
+
+    @registry.tool("get_cost_analysis")
+    async def fetch_costs():
+        calls.append(("get_cost_analysis",))
+        return {}
+
+    return registry
+
+
+def make_prefetcher(registry: ToolRegistry, **kwargs) -> Prefetcher:
+    return Prefetcher(registry, [
+        PrefetchCandidate("list_pods", {"namespace": "hsps"}, r"\bpods?\b|crash"),
+        PrefetchCandidate("list_pods", {"namespace": "star"}, r"\bpods?\b|crash"),
+        PrefetchCandidate("get_aks_cluster_status", keywords=r"\baks\b|cluster"),
+        PrefetchCandidate("get_cost_analysis", keywords=r"cost"),
+    ], namespaces=["hsps", "star"], **kwargs)
+
+
+def test_plan_follows_message_and_history():
+    """Test 1: Keywords and named namespaces pick candidates; history counts for less"""
+    prefetcher = make_prefetcher(make_registry([]))
+    labels = lambda planned: [c.label for c in planned]
+
+    assert labels(prefetcher.plan("Any crashing pods in STAR?")) == ["list_pods(namespace=star)"]
+    assert labels(prefetcher.plan("How many pods are running?")) == [
+        "list_pods(namespace=hsps)", "list_pods(namespace=star)"
+    ]
+    assert labels(prefetcher.plan("Is the AKS cluster up?")) == ["get_aks_cluster_status()"]
+    assert prefetcher.plan("Hello") == []
+    # "what about restarts?" after a pods question: history alone scores below the threshold
+    assert prefetcher.plan("what about restarts?", ["show hsps pods"]) == []
+    prefetcher.min_score = 0.3
+    assert labels(prefetcher.plan("what about restarts?", ["show hsps pods"])) == ["list_pods(namespace=hsps)"]
+
+
+def test_prefetch_warms_cache_once():
+    """Test 2: A prefetch loads the tool once; the model's call joins it and the turn counts it as used"""
+    calls = []
+    registry = make_registry(calls)
+    prefetcher = make_prefetcher(registry)
+
+    async def scenario():
+        turn = prefetcher.start("pods in hsps and what do they cost?")
+        await asyncio.sleep(0.01)
+        assert turn.requested("list_pods", {})  # defaults make this the same call
+        result = await registry.execute("list_pods", {})
+        later = await registry.execute("list_pods", {"namespace": "hsps"})
+        return turn.finish(), result, later
+
+    counts, result, later = asyncio.run(scenario())
+    assert calls == [("list_pods", "hsps")]
+    assert result[0] == [{"name": "hsps-app-0"}]
+    assert later[1] is True
+    assert counts == {"started": 1, "used": 1}
+    # "cost" matched too, but a tool without a cache TTL is never prefetched
+    assert registry.stats()["list_pods"]["prefetches"] == 1
+    assert registry.stats()["get_cost_analysis"]["prefetches"] == 0
+
+
+def test_unused_prefetches_lose_precision_and_popular_calls_gain():
+    """Test 3: Hit rates from past turns raise or lower a candidate's score"""
+    prefetcher = make_prefetcher(make_registry([]), enabled=False)
+    star = prefetcher.candidates[1]
+
+    # Prefetched for "star pods" questions that the model answered without calling the tool
+    for _ in range(6):
+        prefetcher._learn([star], set())
+    assert prefetcher.plan("star pods?") == []
+
+    stats = prefetcher.stats()["candidates"]
+    assert stats["list_pods(namespace=star)"] == {"prefetched": 6, "used": 0, "requested": 0, "precision": 0.3}
+
+    # The model keeps calling the cluster status even for unrelated questions
+    prefetcher = make_prefetcher(make_registry([]), enabled=False)
+    status = prefetcher.candidates[2]
+    for _ in range(20):
+        prefetcher._learn([], {status})
+    assert [c.label for c in prefetcher.plan("anything new?")] == ["get_aks_cluster_status()"]
+    assert prefetcher.stats()["candidates"]["get_aks_cluster_status()"]["requested"] == 20
@@ -0,0 +1,97 @@
+"""
+Unit tests for server-side agent sessions
+"""
+
+import asyncio
+import json
+import time
+from unittest.mock import patch
+
+import sessions
+from sessions import Session, SessionStore
+
+
+def tool_turn(question: str, call_id: str, result_size: int) -> list:
+    call = {"id": call_id, "type": "function", "function": {"name": "list_pods", "arguments": "{}"}}
+    pods = [{"name": f"pod-{i}", "status": "Running", "ready": True, "restarts": 0} for i in range(result_size)]
+    return [
+        {"role": "user", "content": question},
+        {"role": "assistant", "content": None, "tool_calls": [call]},
+        {"role": "tool", "tool_call_id": call_id, "content": json.dumps({"pods": pods, "count": result_size})},
+        {"role": "assistant", "content": "All pods are running."},
+    ]
+
+
+def test_turns_are_compacted_and_dropped_whole():
+    """Test 1: Earlier tool results shrink; whole turns go once the history is over its bounds"""
+    session = Session("s")
+    session.record_turn(tool_turn("pods in hsps?", "a", 200))
+    assert len(session.messages[2]["content"]) > 5000  # the newest turn is kept as the model saw it
+
+    session.record_turn(tool_turn("pods in star?", "b", 3))
+    assert json.loads(session.messages[2]["content"])["count"] == 200
+    assert len(session.messages[2]["content"]) < 2500
+    assert session.user_messages() == ["pods in hsps?", "pods in star?"]
+
+    with patch.object(sessions, "SESSION_MAX_TURNS", 2):
+        session.record_turn(tool_turn("and now?", "c", 3))
+    assert session.turns == 3
+    assert session.user_messages() == ["pods in star?", "and now?"]
+    assert session.messages[0]["role"] == "user" and session.messages[2]["tool_call_id"] == "b"
+
+
+def test_memory_store_resumes_expires_and_evicts():
+    """Test 2: Sessions resume by ID, expire when idle and are evicted least recently used first"""
+    store = SessionStore(path="", max_sessions=2, idle_seconds=60)
+
+    async def scenario():
+        first = await store.open(None)
+        first.record_turn([{"role": "user", "content": "hi"}, {"role": "assistant", "content": "hello"}])
+        await store.save(first)
+        resumed = await store.open(first.id)
+        unknown = await store.open("nope")
+
+        second, third = Session("2"), Session("3")
+        await store.save(second)
+        await store.save(third)  # evicts `first`
+        evicted = await store.get(first.id)
+
+        third.updated_at = time.time() - 61
+        expired = await store.get("3")
+        deleted = await store.delete("2")
+        return first, resumed, unknown, evicted, expired, deleted
+
+    first, resumed, unknown, evicted, expired, deleted = asyncio.run(scenario())
+    assert resumed is first and resumed.turns == 1
+    assert unknown.id not in ("nope", first.id) and unknown.turns == 0
+    assert evicted is None and expired is None and deleted
+    assert store.stats()["created"] == 2 and store.stats()["resumed"] == 1
+    assert store.stats()["evicted"] == 1 and store.stats()["expired"] == 1
+
+
+def test_sqlite_sessions_are_shared_between_workers(tmp_path):
+    """Test 3: Another store on the same file resumes the session and sees later turns"""
+    path = str(tmp_path / "sessions.sqlite")
+    worker_a, worker_b = SessionStore(path=path), SessionStore(path=path)
+
+    async def scenario():
+        session = await worker_a.open(None)
+        session.record_turn(tool_turn("pods in hsps?", "a", 3))
+        await worker_a.save(session)
+
+        on_b = await worker_b.open(session.id)
+        resumed = on_b.user_messages()
+        on_b.record_turn(tool_turn("pods in star?", "b", 3))
+        await worker_b.save(on_b)
+
+        # Worker A's in-memory copy is out of date and is reloaded
+        back_on_a = await worker_a.get(session.id)
+        await worker_b.delete(session.id)
+        gone = await worker_a.get(session.id)
+        return resumed, back_on_a, gone
+
+    resumed, back_on_a, gone = asyncio.run(scenario())
+    assert resumed == ["pods in hsps?"]
+    assert back_on_a.user_messages() == ["pods in hsps?", "pods in star?"]
+    assert back_on_a.version == 2
+    assert gone is None
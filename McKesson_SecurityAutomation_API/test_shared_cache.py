@@ -0,0 +1,99 @@
+"""
+Unit tests for the cross-worker shared cache
+"""
+
+import asyncio
+
+from cache import TTLCache
+from shared_cache import SharedStore
+
+
+class CountingLoader:
+    def __init__(self, delay: float = 0.0):
+        self.calls = 0
+        self.delay = delay
+
+    async def __call__(self):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        return {"version": self.calls}
+
+
+def worker_caches(tmp_path, n: int = 2):
+    """One TTLCache per simulated worker, all on the same SQLite file"""
+    path = str(tmp_path / "cache.sqlite")
+    return [TTLCache(shared=SharedStore(path, "arm")) for _ in range(n)]
+
+
+def test_second_worker_reads_shared_value(tmp_path):
+    """Test 1: A value loaded by one worker is served to another without an upstream call"""
+    first, second = worker_caches(tmp_path)
+    loader = CountingLoader()
+
+    async def scenario():
+        a = await first.lookup(("aks_status",), loader, ttl=60)
+        b = await second.lookup(("aks_status",), loader, ttl=60)
+        c = await second.lookup(("aks_status",), loader, ttl=60)
+        return a, b, c
+
+    a, b, c = asyncio.run(scenario())
+    assert loader.calls == 1
+    assert a == ({"version": 1}, "miss")
+    assert b == ({"version": 1}, "shared_hit")
+    assert c == ({"version": 1}, "hit")
+    assert second.stats()["endpoints"]["aks_status"]["shared_hits"] == 1
+    assert second.stats()["shared"]["entries"] == 1
+
+
+def test_concurrent_refresh_is_coordinated(tmp_path):
+    """Test 2: Workers missing the same key at once make one upstream call between them"""
+    caches = worker_caches(tmp_path, 4)
+    loader = CountingLoader(delay=0.2)
+
+    async def scenario():
+        return await asyncio.gather(*(c.get_or_load(("node_pools",), loader, ttl=60) for c in caches))
+
+    results = asyncio.run(scenario())
+    assert loader.calls == 1
+    assert results == [{"version": 1}] * 4
+
+
+def test_expired_shared_value_is_refreshed_once(tmp_path):
+    """Test 3: After the TTL one worker refreshes while another keeps serving the stale value"""
+    first, second = worker_caches(tmp_path)
+    loader = CountingLoader(delay=0.1)
+
+    async def scenario():
+        await first.get_or_load(("resources",), loader, ttl=0.05)
+        await asyncio.sleep(0.1)
+        # first starts the background refresh; second finds it holding the lease
+        stale_first = await first.lookup(("resources",), loader, ttl=0.05)
+        await asyncio.sleep(0.03)
+        stale_second = await second.lookup(("resources",), loader, ttl=0.05)
+        await asyncio.sleep(0.2)
+        return stale_first, stale_second, loader.calls
+
+    stale_first, stale_second, calls = asyncio.run(scenario())
+    assert calls == 2
+    assert stale_first == ({"version": 1}, "stale_hit")
+    assert stale_second == ({"version": 1}, "shared_hit")
+    stored, _, _ = second.shared.get(SharedStore.encode_key(("resources",))[0])
+    assert stored == {"version": 2}
+
+
+def test_invalidate_clears_shared_entries(tmp_path):
+    """Test 4: Invalidation removes the shared rows so the next worker reloads"""
+    first, second = worker_caches(tmp_path)
+    loader = CountingLoader()
+
+    async def scenario():
+        await first.get_or_load(("aks_status",), loader, ttl=60)
+        await first.get_or_load(("subscription",), loader, ttl=60)
+        removed = first.invalidate("aks")
+        value = await second.get_or_load(("aks_status",), loader, ttl=60)
+        return removed, value
+
+    removed, value = asyncio.run(scenario())
+    assert removed == 1
+    assert value == {"version": 3}
+    assert second.stats()["shared"]["entries"] == 2
@@ -0,0 +1,54 @@
+"""
+Unit tests for per-question tool schema selection
+"""
+
+from tool_selection import ToolGroup, ToolSelector
+
+
+def schema(name: str) -> dict:
+    return {"type": "function", "function": {"name": name, "description": f"Run {name}",
+                                             "parameters": {"type": "object", "properties": {}}}}
+
+
+TOOLS = [schema(n) for n in ("get_aks_cluster_status", "list_pods", "get_pod_logs", "get_cost_analysis")]
+GROUPS = [
+    ToolGroup("kubernetes", ["list_pods", "get_pod_logs"], r"\bpods?\b|\blogs?\b|\bstar\b"),
+    ToolGroup("cluster", ["get_aks_cluster_status"], r"\baks\b|cluster"),
+    ToolGroup("costs", ["get_cost_analysis"], r"\bcost|spend"),
+]
+
+
+def names(selection) -> list:
+    return [t["function"]["name"] for t in selection.tools]
+
+
+def test_groups_follow_the_question_and_recent_history():
+    """Test 1: Matching groups are offered in AGENT_TOOLS order; no match means every tool"""
+    selector = ToolSelector(TOOLS, GROUPS)
+
+    assert names(selector.select("Show pod logs for the AKS cluster")) == [
+        "get_aks_cluster_status", "list_pods", "get_pod_logs"
+    ]
+    assert names(selector.select("What do we spend?")) == ["get_cost_analysis"]
+    assert names(selector.select("and yesterday?", ["what did we spend this week?"])) == ["get_cost_analysis"]
+    assert selector.select("Hello").full
+
+    stats = selector.stats()
+    assert (stats["turns"], stats["subset"], stats["full"]) == (4, 3, 1)
+    assert stats["avgToolsOffered"] == 2.25
+    assert stats["schemaTokens"]["total"] == sum(v for k, v in stats["schemaTokens"].items() if k != "total")
+
+    selector.enabled = False
+    assert selector.select("What do we spend?").full
+
+
+def test_calling_a_left_out_tool_expands_to_the_full_set():
+    """Test 2: A call outside the subset switches the turn to every tool, once"""
+    selector = ToolSelector(TOOLS, GROUPS)
+    selection = selector.select("pods in star?")
+
+    assert not selection.expand_for(["list_pods", "not_a_tool"])
+    assert selection.expand_for(["list_pods", "get_cost_analysis"])
+    assert selection.full and selection.expanded
+    assert not selection.expand_for(["get_aks_cluster_status"])
+    assert selector.stats()["expanded"] == 1
@@ -0,0 +1,96 @@
+"""
+Unit tests for the agent tool registry
+"""
+
+import asyncio
+
+from tools import LatencyHistogram, ToolRegistry
+
+
+def test_results_are_memoized_and_errors_are_not():
+    """Test 1: Identical calls within the TTL reuse the first result; errors are retried"""
+    registry = ToolRegistry()
+    calls = []
+
+    @registry.tool("list_pods", cache_ttl=60, defaults={"namespace": "hsps"})
+    async def fetch_pods(namespace: str):
+        calls.append(("list_pods", namespace))
+        return {"namespace": namespace, "count": 3}
+
+    @registry.tool("get_pod_logs", cache_ttl=60)
+    async def fetch_logs(namespace: str, pod_name: str):
+        calls.append(("get_pod_logs", pod_name))
+        raise RuntimeError("pod not found")
+
+    async def scenario():
+        first = await registry.execute("list_pods", {"namespace": "hsps"})
+        second = await registry.execute("list_pods", {})
+        other = await registry.execute("list_pods", {"namespace": "star"})
+        failed = await registry.execute("get_pod_logs", {"namespace": "hsps", "pod_name": "x"})
+        await registry.execute("get_pod_logs", {"pod_name": "x", "namespace": "hsps"})
+        return first, second, other, failed
+
+    first, second, other, failed = asyncio.run(scenario())
+    assert first == ({"namespace": "hsps", "count": 3}, False)
+    assert second == ({"namespace": "hsps", "count": 3}, True)
+    assert other[1] is False
+    assert failed == ({"error": "pod not found"}, False)
+    assert [c[0] for c in calls] == ["list_pods", "list_pods", "get_pod_logs", "get_pod_logs"]
+    assert registry.stats()["get_pod_logs"]["errors"] == 2
+    assert registry.cache.stats()["endpoints"]["list_pods"]["hits"] == 1
+
+
+def test_deadline_and_in_flight_limit():
+    """Test 2: Calls beyond max_in_flight queue, and a hung call times out at its deadline"""
+    registry = ToolRegistry()
+    active = {"now": 0, "peak": 0}
+
+    @registry.tool("get_pod_logs", timeout=0.2, max_in_flight=2)
+    async def fetch_logs(pod_name: str):
+        active["now"] += 1
+        active["peak"] = max(active["peak"], active["now"])
+        try:
+            await asyncio.sleep(0.05 if pod_name != "hung" else 5)
+        finally:
+            active["now"] -= 1
+        return {"podName": pod_name}
+
+    async def scenario():
+        ok = await asyncio.gather(*(registry.execute("get_pod_logs", {"pod_name": f"p{i}"}) for i in range(4)))
+        hung = await registry.execute("get_pod_logs", {"pod_name": "hung"})
+        return ok, hung
+
+    ok, hung = asyncio.run(scenario())
+    assert all("error" not in r for r, _ in ok)
+    assert active["peak"] == 2
+    assert "timed out after 0.2s" in hung[0]["error"]
+    stats = registry.stats()["get_pod_logs"]
+    assert stats["timeouts"] == 1
+    assert stats["latency"]["count"] == 5
+
+
+def test_unknown_tool_and_missing_arguments():
+    """Test 3: Unknown tools and missing required arguments are reported, not raised"""
+    registry = ToolRegistry()
+
+    @registry.tool("get_pod_details")
+    async def fetch_pod(namespace: str, pod_name: str):
+        return {}
+
+    result, _ = asyncio.run(registry.execute("delete_pod", {}))
+    assert result == {"error": "Unknown tool: delete_pod"}
+    result, _ = asyncio.run(registry.execute("get_pod_details", {"namespace": "hsps", "bogus": 1}))
+    assert result == {"error": "Missing arguments for get_pod_details: pod_name"}
+
+
+def test_latency_histogram_percentiles():
+    """Test 4: Observations land in the right buckets and percentiles use bucket bounds"""
+    histogram = LatencyHistogram(buckets=(10, 100, 1000))
+    for ms in (3, 4, 5, 50, 60, 70, 80, 90, 500, 4000):
+        histogram.observe(ms)
+
+    snapshot = histogram.snapshot()
+    assert snapshot["buckets"] == {"le_10": 3, "le_100": 5, "le_1000": 1, "le_inf": 1}
+    assert snapshot["p50Ms"] == 100.0
+    assert snapshot["p95Ms"] == 4000.0
+    assert snapshot["maxMs"] == 4000.0
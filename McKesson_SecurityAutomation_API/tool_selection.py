@@ -0,0 +1,105 @@
+"""
+Per-question subset of the agent's tool schemas.
+
+Every tool definition (name, description, JSON schema) is part of the prompt
+of every model call, each loop iteration included. Most questions need one
+area only (Kubernetes workloads, the AKS cluster, Azure resources, apps,
+costs), so the ToolSelector offers just the groups whose keywords appear in
+the question or the last user messages.
+
+The subset never limits what the agent can do:
+
+- a question matching no group (or disabled selection) gets the full set;
+- if the model calls a tool that was left out (it knows the names from the
+  history), the call runs as usual and the rest of the turn offers the full
+  set.
+"""
+
+import json
+import os
+import re
+from typing import Dict, List, Sequence
+
+from agent_context import count_tokens
+from metrics import AGENT_TOOL_SELECTION
+
+AGENT_TOOL_SELECTION_ENABLED = os.getenv("AGENT_TOOL_SELECTION_ENABLED", "true").lower() == "true"
+# Recent user messages whose groups stay selected (follow-ups like "and in star?")
+TOOL_SELECTION_HISTORY_MESSAGES = 2
+
+
+class ToolGroup:
+    """Tools offered together when any of `keywords` appears"""
+
+    def __init__(self, name: str, tools: Sequence[str], keywords: str):
+        self.name = name
+        self.tools = list(tools)
+        self.pattern = re.compile(keywords, re.IGNORECASE)
+
+
+class ToolSelection:
+    """The tools offered to the model for one agent turn"""
+
+    def __init__(self, selector: "ToolSelector", names: set, groups: List[str]):
+        self.selector = selector
+        self.names = names
+        self.groups = groups
+        self.expanded = False
+
+    @property
+    def full(self) -> bool:
+        return len(self.names) == len(self.selector.tools)
+
+    @property
+    def tools(self) -> List[dict]:
+        """Tool schemas in AGENT_TOOLS order"""
+        if self.full:
+            return self.selector.tools
+        return [t for t in self.selector.tools if t["function"]["name"] in self.names]
+
+    def expand_for(self, called: Sequence[str]) -> bool:
+        """Switch to the full set if the model called a tool it was not offered; returns whether it did"""
+        if self.full or all(name in self.names or name not in self.selector.by_name for name in called):
+            return False
+        self.names = set(self.selector.by_name)
+        self.expanded = True
+        self.selector.counts["expanded"] += 1
+        AGENT_TOOL_SELECTION.labels("expanded").inc()
+        return True
+
+
+class ToolSelector:
+    """Chooses tool groups per question by keyword matching; see the module docstring"""
+
+    def __init__(self, tools: List[dict], groups: Sequence[ToolGroup], enabled: bool = AGENT_TOOL_SELECTION_ENABLED):
+        self.tools = tools
+        self.by_name: Dict[str, dict] = {t["function"]["name"]: t for t in tools}
+        self.groups = list(groups)
+        self.enabled = enabled
+        self.counts = {"turns": 0, "subset": 0, "full": 0, "expanded": 0, "toolsOffered": 0}
+        self.schema_tokens = {name: count_tokens(json.dumps(t)) for name, t in self.by_name.items()}
+
+    def select(self, message: str, history: Sequence[str] = ()) -> ToolSelection:
+        texts = [message, *history[-TOOL_SELECTION_HISTORY_MESSAGES:]] if self.enabled else []
+        groups = [g for g in self.groups if any(g.pattern.search(text) for text in texts)]
+        names = {name for g in groups for name in g.tools}
+        if not names:
+            names = set(self.by_name)
+        selection = ToolSelection(self, names, [g.name for g in groups])
+
+        outcome = "full" if selection.full else "subset"
+        self.counts["turns"] += 1
+        self.counts[outcome] += 1
+        self.counts["toolsOffered"] += len(names)
+        AGENT_TOOL_SELECTION.labels(outcome).inc()
+        return selection
+
+    def stats(self) -> dict:
+        turns = self.counts["turns"]
+        return {
+            "enabled": self.enabled,
+            **self.counts,
+            "avgToolsOffered": round(self.counts["toolsOffered"] / turns, 2) if turns else None,
+            "schemaTokens": {"total": sum(self.schema_tokens.values()), **self.schema_tokens},
+            "groups": {g.name: g.tools for g in self.groups},
+        }
@@ -0,0 +1,232 @@
+"""
+Registry of the agent's tools.
+
+Each tool name in AGENT_TOOLS maps to one shared async fetch function (the same
+one the REST endpoint uses) plus its execution policy: a deadline, a limit on
+concurrent in-flight calls and a cache TTL. Every call is recorded in a
+per-tool latency histogram so the tools that dominate agent latency are
+visible.
+"""
+
+import asyncio
+import bisect
+import inspect
+import json
+import math
+import os
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from cache import TTLCache, ttl_from_env
+
+# Defaults for tools that do not declare their own policy
+TOOL_DEFAULT_TIMEOUT = float(os.getenv("AGENT_TOOL_TIMEOUT_SECONDS", "20"))
+TOOL_DEFAULT_MAX_IN_FLIGHT = int(os.getenv("AGENT_TOOL_MAX_IN_FLIGHT", "4"))
+
+# Upper bounds (ms) of the latency histogram buckets; the last bucket is +Inf
+LATENCY_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram with approximate percentiles"""
+
+    def __init__(self, buckets=LATENCY_BUCKETS_MS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def observe(self, elapsed_ms: float):
+        self.counts[bisect.bisect_left(self.buckets, elapsed_ms)] += 1
+        self.count += 1
+        self.total_ms += elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+
+    def percentile(self, q: float) -> Optional[float]:
+        """Upper bound of the bucket holding the q-th quantile (max observed for +Inf)"""
+        if not self.count:
+            return None
+        rank = max(1, math.ceil(q * self.count))  # nearest-rank
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank:
+                return float(self.buckets[i]) if i < len(self.buckets) else round(self.max_ms, 1)
+        return round(self.max_ms, 1)
+
+    def snapshot(self) -> dict:
+        labels = [f"le_{b}" for b in self.buckets] + ["le_inf"]
+        return {
+            "count": self.count,
+            "avgMs": round(self.total_ms / self.count, 1) if self.count else None,
+            "maxMs": round(self.max_ms, 1),
+            "p50Ms": self.percentile(0.5),
+            "p95Ms": self.percentile(0.95),
+            "p99Ms": self.percentile(0.99),
+            "buckets": dict(zip(labels, self.counts)),
+        }
+
+
+class ToolError(Exception):
+    """Raised inside the cache loader so error results are not memoized"""
+    def __init__(self, result: dict):
+        self.result = result
+
+
+class ToolSpec:
+    """One registered tool: its fetch function and execution policy"""
+
+    def __init__(self, name: str, fetch: Callable[..., Awaitable[Any]], timeout: float,
+                 max_in_flight: int, cache_ttl: float, defaults: Optional[dict] = None):
+        self.name = name
+        self.fetch = fetch
+        self.timeout = timeout
+        self.max_in_flight = max_in_flight
+        self.cache_ttl = cache_ttl
+        self.defaults = defaults or {}
+        self.semaphore = asyncio.Semaphore(max_in_flight)
+        self.latency = LatencyHistogram()
+        self.errors = 0
+        self.timeouts = 0
+        self.cache_hits = 0
+        self.prefetches = 0
+
+        params = inspect.signature(fetch).parameters
+        self.params = set(params)
+        self.required = [
+            p.name for p in params.values()
+            if p.default is inspect.Parameter.empty and p.name not in self.defaults
+        ]
+
+    def stats(self) -> dict:
+        return {
+            "timeoutSeconds": self.timeout,
+            "maxInFlight": self.max_in_flight,
+            "cacheTtlSeconds": self.cache_ttl,
+            "inFlight": self.max_in_flight - self.semaphore._value,
+            "errors": self.errors,
+            "timeouts": self.timeouts,
+            "cacheHits": self.cache_hits,
+            "prefetches": self.prefetches,
+            "latency": self.latency.snapshot(),
+        }
+
+
+class ToolRegistry:
+    """
+    Maps tool names to ToolSpecs and executes calls under each tool's policy.
+
+    `on_error` is called with any exception raised by a fetch function (e.g. to
+    drop a Kubernetes client whose credentials were rejected).
+    """
+
+    def __init__(self, cache: Optional[TTLCache] = None, on_error: Optional[Callable[[Exception], None]] = None):
+        # Expired tool results are never served
+        self.cache = cache or TTLCache(stale_seconds=0)
+        self.on_error = on_error
+        self._tools: Dict[str, ToolSpec] = {}
+
+    def tool(self, name: str, timeout: float = TOOL_DEFAULT_TIMEOUT, max_in_flight: int = TOOL_DEFAULT_MAX_IN_FLIGHT,
+             cache_ttl: float = 0, defaults: Optional[dict] = None):
+        """
+        Decorator registering an async fetch function as tool `name`. The cache
+        TTL is overridable via CACHE_TTL_TOOL_<NAME>. The function is returned
+        unchanged so REST handlers can call it directly.
+        """
+        def decorator(fetch: Callable[..., Awaitable[Any]]):
+            self._tools[name] = ToolSpec(
+                name, fetch, timeout, max_in_flight, ttl_from_env(f"tool_{name}", cache_ttl), defaults
+            )
+            return fetch
+        return decorator
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._tools
+
+    def get(self, name: str) -> Optional[ToolSpec]:
+        return self._tools.get(name)
+
+    def names(self):
+        return list(self._tools)
+
+    @staticmethod
+    def _kwargs(spec: ToolSpec, arguments: dict) -> dict:
+        kwargs = dict(spec.defaults)
+        kwargs.update((k, v) for k, v in arguments.items() if k in spec.params)
+        return kwargs
+
+    @staticmethod
+    def _cache_key(spec: ToolSpec, kwargs: dict) -> Tuple[str, str]:
+        return spec.name, json.dumps(kwargs, sort_keys=True, separators=(",", ":"))
+
+    def call_key(self, name: str, arguments: dict) -> Optional[Tuple[str, str]]:
+        """Normalized (tool, arguments) key of a call, as used for caching; None for unknown tools"""
+        spec = self._tools.get(name)
+        return self._cache_key(spec, self._kwargs(spec, arguments)) if spec else None
+
+    async def execute(self, name: str, arguments: dict) -> Tuple[Any, bool]:
+        """Run tool `name` within its deadline; returns (result, cached). Failures come back as {"error": ...}"""
+        spec = self._tools.get(name)
+        if spec is None:
+            return {"error": f"Unknown tool: {name}"}, False
+
+        kwargs = self._kwargs(spec, arguments)
+        missing = [p for p in spec.required if p not in kwargs]
+        if missing:
+            return {"error": f"Missing arguments for {name}: {', '.join(missing)}"}, False
+
+        started = time.perf_counter()
+        try:
+            result, cached = await asyncio.wait_for(self._call(spec, kwargs), spec.timeout)
+        except asyncio.TimeoutError:
+            spec.timeouts += 1
+            result, cached = {"error": f"{name} timed out after {spec.timeout:g}s"}, False
+        finally:
+            spec.latency.observe((time.perf_counter() - started) * 1000)
+
+        if cached:
+            spec.cache_hits += 1
+        elif isinstance(result, dict) and "error" in result:
+            spec.errors += 1
+        return result, cached
+
+    async def prefetch(self, name: str, arguments: dict) -> bool:
+        """
+        Load a cacheable tool's result into the cache ahead of the model asking
+        for it. Not recorded as a call; errors and timeouts are dropped (the real
+        call will retry). Returns whether the result is now cached.
+        """
+        spec = self._tools.get(name)
+        if spec is None or not spec.cache_ttl:
+            return False
+        kwargs = self._kwargs(spec, arguments)
+        if any(p not in kwargs for p in spec.required):
+            return False
+        spec.prefetches += 1
+        try:
+            result, _ = await asyncio.wait_for(self._call(spec, kwargs), spec.timeout)
+        except asyncio.TimeoutError:
+            return False
+        return not (isinstance(result, dict) and "error" in result)
+
+    async def _call(self, spec: ToolSpec, kwargs: dict) -> Tuple[Any, bool]:
+        async def load():
+            async with spec.semaphore:
+                try:
+                    return await spec.fetch(**kwargs)
+                except Exception as e:
+                    if self.on_error:
+                        self.on_error(e)
+                    raise ToolError({"error": str(e)})
+
+        try:
+            if not spec.cache_ttl:
+                return await load(), False
+            value, outcome = await self.cache.lookup(self._cache_key(spec, kwargs), load, spec.cache_ttl)
+            return value, outcome != "miss"
+        except ToolError as e:
+            return e.result, False
+
+    def stats(self) -> dict:
+        return {name: spec.stats() for name, spec in self._tools.items()}
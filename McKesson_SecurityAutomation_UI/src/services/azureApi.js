@@ -88,9 +88,79 @@ export const azureFunctions = {
   // 15. Get Cost Analysis Summary (Last 30 Days)
   getCostAnalysis: async () => {
     return await callBackendApi('/api/azure/costs/summary')
+  },
+
+  // 16. Get Cluster Overview (AKS, node pools, pods, deployments, services, resources in one request)
+  // sections: optional array, e.g. ['aks', 'pods']; failed sections are listed in data.errors
+  getClusterOverview: async (sections = []) => {
+    const query = sections.length ? `?sections=${sections.join(',')}` : ''
+    return await callBackendApi(`/api/azure/overview${query}`)
+  },
+
+  // 17. Stream Pod Logs (follow mode, one long-lived connection instead of polling)
+  // options: { filter, sinceSeconds, tailLines, container }; onRecord receives each NDJSON record
+  // ({ type: 'line' | 'heartbeat' | 'end' | 'error', ... }). Returns an AbortController to stop.
+  streamPodLogs: (namespace, podName, options = {}, onRecord = () => {}) => {
+    const params = new URLSearchParams()
+    if (options.filter) params.set('filter', options.filter)
+    if (options.sinceSeconds) params.set('since_seconds', options.sinceSeconds)
+    if (options.tailLines) params.set('tail_lines', options.tailLines)
+    if (options.container) params.set('container', options.container)
+    const query = params.toString() ? `?${params}` : ''
+    return streamNdjson(`/api/azure/pods/${namespace}/${podName}/logs/stream${query}`, onRecord)
+  },
+
+  // 18. Get Deployment Logs (all replicas merged by timestamp)
+  // options: { match: 'level=WARNING', filter: regex, sinceSeconds, tailLines, container }
+  getDeploymentLogs: async (namespace, deployment, options = {}) => {
+    const params = new URLSearchParams()
+    if (options.match) params.set('match', options.match)
+    if (options.filter) params.set('filter', options.filter)
+    if (options.sinceSeconds) params.set('since_seconds', options.sinceSeconds)
+    if (options.tailLines) params.set('tail_lines', options.tailLines)
+    if (options.container) params.set('container', options.container)
+    const query = params.toString() ? `?${params}` : ''
+    return await callBackendApi(`/api/azure/deployments/${namespace}/${deployment}/logs${query}`)
   }
 }
 
+/**
+ * Read an NDJSON endpoint, calling onRecord for each record until it ends or is aborted
+ */
+function streamNdjson(endpoint, onRecord) {
+  const controller = new AbortController()
+  ;(async () => {
+    try {
+      const response = await fetch(`${BACKEND_API_URL}${endpoint}`, {
+        headers: { 'Authorization': `Bearer ${config.portal.bearerToken}` },
+        signal: controller.signal
+      })
+      if (!response.ok) {
+        throw new Error(`API call failed: ${response.status}`)
+      }
+      const reader = response.body.getReader()
+      const decoder = new TextDecoder()
+      let buffer = ''
+      while (true) {
+        const { done, value } = await reader.read()
+        if (done) break
+        buffer += decoder.decode(value, { stream: true })
+        const lines = buffer.split('\n')
+        buffer = lines.pop()
+        for (const line of lines) {
+          if (line.trim()) onRecord(JSON.parse(line))
+        }
+      }
+    } catch (error) {
+      if (error.name !== 'AbortError') {
+        console.error('Azure API stream error:', error)
+        onRecord({ type: 'error', detail: error.message })
+      }
+    }
+  })()
+  return controller
+}
+
 /**
  * Helper function to call backend API
  */